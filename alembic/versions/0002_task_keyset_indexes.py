@@ -0,0 +1,49 @@
+"""Task priority/status columns and keyset pagination indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('priority', sa.String(length=20), server_default='medium', nullable=False))
+    op.add_column('tasks', sa.Column('status', sa.String(length=20), server_default='todo', nullable=False))
+    # CONCURRENTLY so a live tasks table is not write-locked while indexing
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_owner_id_id', 'tasks', ['owner_id', 'id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_tasks_owner_id_due_date_id', 'tasks', ['owner_id', 'due_date', 'id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_tasks_owner_id_completed_category_id_id', 'tasks',
+            ['owner_id', 'completed', 'category_id', 'id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_owner_id_completed_category_id_id', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_owner_id_due_date_id', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_owner_id_id', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('tasks', 'status')
+    op.drop_column('tasks', 'priority')
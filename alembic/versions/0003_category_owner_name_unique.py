@@ -0,0 +1,30 @@
+"""Category color column and per-owner unique name index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('categories', sa.Column('color', sa.String(length=7), server_default='#000000', nullable=False))
+    op.create_unique_constraint('uq_categories_owner_id_name', 'categories', ['owner_id', 'name'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_categories_owner_id_name', 'categories', type_='unique')
+    op.drop_column('categories', 'color')
@@ -0,0 +1,59 @@
+"""Server-side timestamp defaults and cascading foreign keys
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMPED_TABLES = ('users', 'categories', 'tasks')
+UTC_NOW = sa.text("TIMEZONE('utc', CURRENT_TIMESTAMP)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TIMESTAMPED_TABLES:
+        op.alter_column(table, 'created_at', server_default=UTC_NOW)
+        op.alter_column(table, 'updated_at', server_default=UTC_NOW)
+
+    # Single-statement deletes rely on the database to cascade
+    op.drop_constraint('categories_owner_id_fkey', 'categories', type_='foreignkey')
+    op.create_foreign_key(
+        'categories_owner_id_fkey', 'categories', 'users',
+        ['owner_id'], ['id'], ondelete='CASCADE'
+    )
+    op.drop_constraint('tasks_owner_id_fkey', 'tasks', type_='foreignkey')
+    op.create_foreign_key(
+        'tasks_owner_id_fkey', 'tasks', 'users',
+        ['owner_id'], ['id'], ondelete='CASCADE'
+    )
+    op.drop_constraint('tasks_category_id_fkey', 'tasks', type_='foreignkey')
+    op.create_foreign_key(
+        'tasks_category_id_fkey', 'tasks', 'categories',
+        ['category_id'], ['id'], ondelete='SET NULL'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('tasks_category_id_fkey', 'tasks', type_='foreignkey')
+    op.create_foreign_key('tasks_category_id_fkey', 'tasks', 'categories', ['category_id'], ['id'])
+    op.drop_constraint('tasks_owner_id_fkey', 'tasks', type_='foreignkey')
+    op.create_foreign_key('tasks_owner_id_fkey', 'tasks', 'users', ['owner_id'], ['id'])
+    op.drop_constraint('categories_owner_id_fkey', 'categories', type_='foreignkey')
+    op.create_foreign_key('categories_owner_id_fkey', 'categories', 'users', ['owner_id'], ['id'])
+
+    for table in TIMESTAMPED_TABLES:
+        op.alter_column(table, 'updated_at', server_default=None)
+        op.alter_column(table, 'created_at', server_default=None)
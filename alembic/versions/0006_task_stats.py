@@ -0,0 +1,61 @@
+"""Task completion time and per-user task stats counters
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('completed_at', sa.DateTime(), nullable=True))
+    # Best available guess for tasks completed before the column existed
+    op.execute("UPDATE tasks SET completed_at = updated_at WHERE completed IS TRUE")
+
+    op.create_table(
+        'task_stats',
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('dimension', sa.String(length=20), nullable=False),
+        sa.Column('key', sa.String(length=50), nullable=False),
+        sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('owner_id', 'dimension', 'key')
+    )
+    # Initial counters; the reconciliation job (python -m app.services.stats) rebuilds the same rows
+    op.execute("""
+        INSERT INTO task_stats (owner_id, dimension, key, count)
+        SELECT owner_id, 'total', 'all', count(*) FROM tasks GROUP BY owner_id
+        UNION ALL
+        SELECT owner_id, 'status', status, count(*) FROM tasks GROUP BY owner_id, status
+        UNION ALL
+        SELECT owner_id, 'priority', priority, count(*) FROM tasks GROUP BY owner_id, priority
+        UNION ALL
+        SELECT owner_id, 'category', coalesce(category_id::text, 'none'), count(*)
+        FROM tasks GROUP BY owner_id, category_id
+        UNION ALL
+        SELECT owner_id, 'completed', CASE WHEN completed IS TRUE THEN 'true' ELSE 'false' END, count(*)
+        FROM tasks GROUP BY owner_id, completed IS TRUE
+        UNION ALL
+        SELECT owner_id, 'completed_week', to_char(date_trunc('week', TIMEZONE('utc', CURRENT_TIMESTAMP)), 'YYYY-MM-DD'), count(*)
+        FROM tasks
+        WHERE completed IS TRUE AND completed_at >= date_trunc('week', TIMEZONE('utc', CURRENT_TIMESTAMP))
+        GROUP BY owner_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('task_stats')
+    op.drop_column('tasks', 'completed_at')
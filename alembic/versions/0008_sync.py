@@ -0,0 +1,66 @@
+"""Change sequence and tombstones for delta sync
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'change_counters',
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('compacted_seq', sa.BigInteger(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('owner_id')
+    )
+
+    # Existing rows keep change_seq 0 and are picked up by a client's first full sync
+    for table in ('tasks', 'categories'):
+        op.add_column(table, sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        op.create_index(f'ix_{table}_owner_id_change_seq', table, ['owner_id', 'change_seq'], unique=False)
+        op.create_index(
+            f'ix_{table}_deleted_at', table, ['deleted_at'],
+            unique=False,
+            postgresql_where=sa.text('deleted_at IS NOT NULL')
+        )
+
+    # Tombstones keep their names, so uniqueness only covers live categories
+    op.drop_constraint('uq_categories_owner_id_name', 'categories', type_='unique')
+    op.create_index(
+        'uq_categories_owner_id_name', 'categories', ['owner_id', 'name'],
+        unique=True,
+        postgresql_where=sa.text('deleted_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Tombstones would violate the full unique constraint and are dropped first
+    op.execute("DELETE FROM tasks WHERE deleted_at IS NOT NULL")
+    op.execute("DELETE FROM categories WHERE deleted_at IS NOT NULL")
+    op.drop_index('uq_categories_owner_id_name', table_name='categories')
+    op.create_unique_constraint('uq_categories_owner_id_name', 'categories', ['owner_id', 'name'])
+
+    for table in ('categories', 'tasks'):
+        op.drop_index(f'ix_{table}_deleted_at', table_name=table)
+        op.drop_index(f'ix_{table}_owner_id_change_seq', table_name=table)
+        op.drop_column(table, 'deleted_at')
+        op.drop_column(table, 'change_seq')
+
+    op.drop_table('change_counters')
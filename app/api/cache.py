@@ -0,0 +1,57 @@
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from fastapi import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.serialization import json_response
+from app.db.replicas import is_replica_session
+from app.db.session import AsyncSessionLocal
+from app.services.cache import response_cache
+
+Build = Callable[[AsyncSession], Awaitable[bytes]]
+
+
+async def cached_body(
+    scope: str,
+    user_id: int,
+    params: Dict[str, Any],
+    db: AsyncSession,
+    build: Build
+) -> Tuple[bytes, bool]:
+    """
+    A body from the response cache, built and stored on a miss, and whether
+    it was a hit. `params` must hold every input that changes the body.
+
+    `build` queries the session it is passed. A body that will be stored is
+    built on the primary even when `db` is a replica: the key already holds
+    the generation bumped by the latest write, and a lagging replica could
+    still return the rows from before it.
+    """
+    key = await response_cache.key(scope, user_id, params)
+    if not key:
+        return await build(db), False
+    body = await response_cache.get(key)
+    if body is not None:
+        return body, True
+
+    if is_replica_session(db):
+        async with AsyncSessionLocal() as primary:
+            body = await build(primary)
+    else:
+        body = await build(db)
+    await response_cache.set(key, body)
+    return body, False
+
+
+def cache_headers(hit: bool) -> Dict[str, str]:
+    return {"X-Cache": "HIT" if hit else "MISS"}
+
+
+async def cached_json(
+    scope: str,
+    user_id: int,
+    params: Dict[str, Any],
+    db: AsyncSession,
+    build: Build
+) -> Response:
+    """Serve a JSON body from the response cache, as cached_body."""
+    body, hit = await cached_body(scope, user_id, params, db, build)
+    return json_response(body, headers=cache_headers(hit))
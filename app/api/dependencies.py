@@ -1,12 +1,17 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, FrozenSet, Optional
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.security import verify_token, get_token_data
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.api.errors import UnauthorizedError
-from app.db.session import SessionLocal
+from app.crud.user import USER_COLLECTIONS
+from app.db.replicas import read_your_writes, replica_set
+from app.db.session import AsyncSessionLocal
+from app.services.auth import peek_user_id, verified_user_id
+from app.services.rate_limit import RateLimitResult, create_rate_limit_backend
 
 logger = get_logger(__name__)
 
@@ -15,13 +20,48 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 # Database dependency
-def get_db() -> Generator[Session, None, None]:
-    """Get database session."""
-    db = SessionLocal()
-    try:
+def _bearer_token(request: Request) -> Optional[str]:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Get async database session on the primary."""
+    async with AsyncSessionLocal() as db:
+        # Commits by this user keep their next reads on the primary
+        user_id = peek_user_id(_bearer_token(request))
+        if user_id is not None:
+            db.info["user_id"] = user_id
+            # Where a commit leaves the user for ReadYourWritesMiddleware
+            db.info["request_state"] = request.state
         yield db
-    finally:
-        db.close()
+
+def _is_connection_error(exc: BaseException) -> bool:
+    if isinstance(exc, (OperationalError, InterfaceError, OSError, TimeoutError)):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+async def get_db_read(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async database session for read-only endpoints.
+    Uses a healthy read replica unless the user wrote recently; falls back
+    to the primary when no replica is configured or all are ejected.
+    """
+    user_id = peek_user_id(_bearer_token(request))
+    replica = None
+    if user_id is None or not await read_your_writes.is_sticky(user_id):
+        replica = replica_set.choose()
+    if replica is None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    async with replica.sessionmaker() as db:
+        try:
+            yield db
+        except Exception as e:
+            if _is_connection_error(e):
+                replica_set.eject(replica)
+            raise
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     """
@@ -44,6 +84,24 @@ async def get_current_active_user(
     """
     return current_user
 
+def user_includes(
+    include: Optional[str] = Query(
+        None,
+        description="Comma-separated collections to embed: " + ", ".join(USER_COLLECTIONS)
+    )
+) -> FrozenSet[str]:
+    """
+    Parse ?include= for user responses.
+    """
+    names = frozenset(name.strip() for name in (include or "").split(",") if name.strip())
+    unknown = names - USER_COLLECTIONS.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}"
+        )
+    return names
+
 def get_token_header(x_token: str = Depends(oauth2_scheme)) -> str:
     """
     Dependency for token header validation.
@@ -52,32 +110,70 @@ def get_token_header(x_token: str = Depends(oauth2_scheme)) -> str:
 
 class RateLimiter:
     """
-    Basic rate limiting implementation.
-    Should be replaced with proper rate limiting in production.
+    Sliding-window rate limiting per route scope and per user.
+    Limits come from settings.RATE_LIMIT_ROUTES, falling back to
+    RATE_LIMIT_DEFAULT for scopes without their own limit.
     """
-    def __init__(self, requests_per_minute: int = 60):
-        self.requests_per_minute = requests_per_minute
-        # In production, use Redis or similar for rate limiting
-        self._requests = {}
+    def __init__(self, backend: Any, limits: Dict[str, int], default_limit: int, enabled: bool = True):
+        self.backend = backend
+        self.limits = limits
+        self.default_limit = default_limit
+        self.enabled = enabled
+        self.rejected = 0
+
+    def limit_for(self, scope: str) -> int:
+        return self.limits.get(scope, self.default_limit)
 
-    async def check_rate_limit(self, user_id: str) -> bool:
+    async def check_rate_limit(self, scope: str, client_key: str) -> Optional[RateLimitResult]:
         """
-        Check if user has exceeded rate limit.
+        Count a request against the client's limit for a scope.
+        Returns None when limiting is disabled or the backend is unavailable.
         """
-        # Implement proper rate limiting logic here
-        return True
+        if not self.enabled:
+            return None
+        try:
+            result = await self.backend.hit(f"{scope}:{client_key}", self.limit_for(scope))
+        except Exception as e:
+            # Fail open: a broken shared backend must not take the API down
+            logger.error(f"Rate limiter error: {str(e)}")
+            return None
+        if not result.allowed:
+            self.rejected += 1
+        return result
 
-rate_limiter = RateLimiter()
+    def stats(self) -> Dict[str, Any]:
+        return {**self.backend.stats(), "enabled": self.enabled, "rejected": self.rejected}
 
-async def check_rate_limit(
-    current_user: dict = Depends(get_current_active_user)
-) -> None:
+rate_limiter = RateLimiter(
+    create_rate_limit_backend(),
+    limits=settings.RATE_LIMIT_ROUTES,
+    default_limit=settings.RATE_LIMIT_DEFAULT,
+    enabled=settings.RATE_LIMIT_ENABLED
+)
+
+def _client_key(request: Request) -> str:
+    user_id = verified_user_id(_bearer_token(request))
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def rate_limit(scope: str) -> Callable[[Request], Awaitable[None]]:
     """
-    Rate limiting dependency.
+    Rate limiting dependency for a route scope.
+    Successful responses get X-RateLimit-* headers through
+    RateLimitHeadersMiddleware; rejected requests get a 429 with Retry-After.
     """
-    is_allowed = await rate_limiter.check_rate_limit(current_user["username"])
-    if not is_allowed:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Rate limit exceeded"
-        )
\ No newline at end of file
+    async def dependency(request: Request) -> None:
+        result = await rate_limiter.check_rate_limit(scope, _client_key(request))
+        if result is None:
+            return
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers=result.headers()
+            )
+        request.state.rate_limit = result
+    return dependency
+
+check_rate_limit = rate_limit("default")
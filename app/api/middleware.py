@@ -0,0 +1,149 @@
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.logging import get_logger
+from app.db.profiling import end_profile, preview, start_profile
+from app.db.replicas import read_your_writes
+from app.services.metrics import UNMATCHED, RequestMetrics
+
+logger = get_logger(__name__)
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Adds X-RateLimit-* headers to responses of rate limited routes.
+    The rate_limit dependency leaves its result on the request state, which
+    also covers routes that return a Response object directly.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                result = scope.get("state", {}).get("rate_limit")
+                if result is not None:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in result.headers().items():
+                        headers.setdefault(name, value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Shares a user's commit with every worker before the response is sent,
+    so the client's next request stays on the primary wherever it lands.
+    get_db's sessions leave the committing user on the request state.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_after_sharing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                user_id = scope.get("state", {}).get("read_your_writes")
+                if user_id is not None:
+                    await read_your_writes.share_write(user_id)
+            await send(message)
+
+        await self.app(scope, receive, send_after_sharing)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the route that handled the request, e.g.
+    /api/v1/tasks/{task_id}; UNMATCHED if no route did.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return UNMATCHED
+    # Routes of included routers only know their own path, without the
+    # router prefixes: find the tail of the URL the route matched
+    path = scope["path"]
+    start = 0
+    while start != -1:
+        if route.path_regex.match(path[start:]):
+            return path[:start] + template
+        start = path.find("/", start + 1)
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status and in-flight count of every HTTP request.
+    Requests are labelled with the matched route's path template, e.g.
+    /api/v1/tasks/{task_id}, so raw URLs never create new series. Latency
+    runs until the response body is sent, so streamed responses count in full.
+    """
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.in_flight -= 1
+            metrics.observe(scope["method"], route_template(scope), status_code, time.perf_counter() - started)
+
+
+class QueryProfileMiddleware:
+    """
+    Attributes the statements run while handling a request to it: adds a
+    Server-Timing header with their count and duration, and logs requests
+    running more than `query_budget` queries, which usually means an N+1
+    pattern. Statements run after the headers are sent, e.g. while
+    streaming a response, only count towards the budget.
+    """
+    def __init__(self, app: ASGIApp, query_budget: int = 0):
+        self.app = app
+        self.query_budget = query_budget
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_profile()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and stats.queries:
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_profile(token)
+            if self.query_budget and stats.queries > self.query_budget:
+                logger.warning(
+                    f"{scope['method']} {route_template(scope)} ran {stats.queries} queries "
+                    f"(budget {self.query_budget}) in {stats.seconds * 1000:.1f} ms; "
+                    f"slowest {stats.slowest_seconds * 1000:.1f} ms: {preview(stats.slowest_statement)}"
+                )
@@ -0,0 +1,34 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, List, Sequence
+from fastapi import HTTPException, status
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(sort: str, key: Sequence[Any]) -> str:
+    """Encode the sort key of the last row into an opaque cursor."""
+    payload = json.dumps({"s": sort, "k": list(key)}, default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """Decode a cursor produced by `encode_cursor` for the same sort order."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key = data["k"]
+        if data["s"] != sort or not isinstance(key, list):
+            raise ValueError("Cursor does not match sort order")
+        return key
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -1,9 +1,28 @@
-from fastapi import APIRouter
-from app.api.routes import auth, users, tasks, categories
+from fastapi import APIRouter, Depends
+from app.api.dependencies import rate_limit
+from app.api.routes import auth, users, tasks, categories, sync, events
 
 api_router = APIRouter()
 
-api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
-api_router.include_router(users.router, tags=["users"])
-api_router.include_router(categories.router, tags=["categories"])
-api_router.include_router(tasks.router, tags=["tasks"])
+api_router.include_router(
+    auth.router, prefix="/auth", tags=["auth"],
+    dependencies=[Depends(rate_limit("auth"))]
+)
+api_router.include_router(
+    users.router, tags=["users"],
+    dependencies=[Depends(rate_limit("users"))]
+)
+api_router.include_router(
+    categories.router, tags=["categories"],
+    dependencies=[Depends(rate_limit("categories"))]
+)
+api_router.include_router(
+    tasks.router, tags=["tasks"],
+    dependencies=[Depends(rate_limit("tasks"))]
+)
+api_router.include_router(
+    sync.router, tags=["sync"],
+    dependencies=[Depends(rate_limit("sync"))]
+)
+# WebSocket routes cannot take the rate_limit dependency; the SSE route applies it itself
+api_router.include_router(events.router, tags=["events"])
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from typing import FrozenSet
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from app.api.errors import UnauthorizedError, ValidationError
 from app.core.security import create_access_token
 from app.core.config import settings
 from app.crud import user
-from app.api.dependencies import get_db
-from app.schemas.user import User
+from app.api.dependencies import get_db, user_includes
+from app.models.user import User as UserModel
+from app.schemas.user import UserDetail
+from app.services.auth import Principal, build_token_claims, get_principal
 from app.schemas.token import Token
 
 router = APIRouter(tags=["auth"])  # Remove prefix here since it's handled by main router
@@ -15,12 +18,12 @@ router = APIRouter(tags=["auth"])  # Remove prefix here since it's handled by ma
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")  # Add full path
 
 async def get_current_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
-) -> User:
-    """Get current user from token."""
+) -> Principal:
+    """Get current principal from token, without a user lookup."""
     try:
-        current_user = user.get_user_by_token(db, token)
+        current_user = await get_principal(db, token)
         if not current_user:
             raise UnauthorizedError("Invalid authentication credentials")
         return current_user
@@ -28,19 +31,29 @@ async def get_current_user(
         raise UnauthorizedError("Could not validate credentials")
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """Check if current user is active."""
     if not current_user.is_active:  # Changed from disabled to is_active
         raise ValidationError("Inactive user")
     return current_user
 
+async def get_current_db_user(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+) -> UserModel:
+    """Load the current user row, for endpoints that need the full record."""
+    db_user = await user.get(db, current_user.id)
+    if not db_user:
+        raise UnauthorizedError("Could not validate credentials")
+    return db_user
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    user_obj = user.authenticate(
+    user_obj = await user.authenticate(
         db, username=form_data.username, password=form_data.password
     )
     if not user_obj:
@@ -51,13 +64,16 @@ async def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user_obj.username}, expires_delta=access_token_expires
+        data=build_token_claims(user_obj), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-@router.get("/users/me", response_model=User)
+@router.get("/users/me", response_model=UserDetail, response_model_exclude_unset=True)
 async def read_users_me(
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_db_user),
+    include: FrozenSet[str] = Depends(user_includes)
 ):
-    """Get current user profile."""
+    """Get current user profile, with ?include=tasks,categories to embed collections."""
+    await user.load_collections(db, [current_user], include, settings.USER_INCLUDE_MAX_ITEMS)
     return current_user
@@ -1,89 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from typing import List
-from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.cache import cached_json
+from app.api.dependencies import get_db, get_db_read
+from app.api.serialization import ListSerializer
 from app.api.routes.auth import get_current_active_user
-from app.api.errors import NotFoundError, ValidationError
+from app.api.errors import NotFoundError
+from app.crud import category as crud_category
+from app.schemas.category import Category, CategoryCreate, CategoryUpdate
+from app.services import cache as cache_scopes
+from app.services.auth import Principal
 
 router = APIRouter()
 
-class CategoryBase(BaseModel):
-    name: str
-    description: str = None
+_category_list = ListSerializer(Category)
 
-class CategoryCreate(CategoryBase):
-    pass
-
-class Category(CategoryBase):
-    id: int
-    owner: str
-
-    class Config:
-        orm_mode = True
-
-# Temporary in-memory storage
-categories_db = {}
-category_id_counter = 1
+def _duplicate_name_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Category with this name already exists"
+    )
 
 @router.post("/categories/", response_model=Category)
 async def create_category(
     category: CategoryCreate,
-    current_user: dict = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    global category_id_counter
-    new_category = Category(
-        id=category_id_counter,
-        **category.dict(),
-        owner=current_user.username
-    )
-    categories_db[category_id_counter] = new_category
-    category_id_counter += 1
-    return new_category
+    try:
+        return await crud_category.create_category(db, category, current_user.id)
+    except IntegrityError:
+        raise _duplicate_name_error()
 
 @router.get("/categories/", response_model=List[Category])
-async def get_categories(current_user: dict = Depends(get_current_active_user)):
-    return [cat for cat in categories_db.values() if cat.owner == current_user.username]
+async def get_categories(
+    db: AsyncSession = Depends(get_db_read),
+    current_user: Principal = Depends(get_current_active_user),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500)
+):
+    async def build(session: AsyncSession) -> bytes:
+        categories = await crud_category.get_categories(session, current_user.id, skip=skip, limit=limit)
+        return _category_list.dump(categories)
+
+    return await cached_json(
+        cache_scopes.CATEGORIES,
+        current_user.id,
+        {"skip": skip, "limit": limit},
+        db,
+        build
+    )
 
 @router.get("/categories/{category_id}", response_model=Category)
 async def get_category(
     category_id: int,
-    current_user: dict = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db_read),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    if category_id not in categories_db:
-        raise NotFoundError("Category not found")
-    category = categories_db[category_id]
-    if category.owner != current_user.username:
+    category = await crud_category.get_category(db, category_id, current_user.id)
+    if not category:
         raise NotFoundError("Category not found")
     return category
 
 @router.put("/categories/{category_id}", response_model=Category)
 async def update_category(
     category_id: int,
-    category_update: CategoryCreate,
-    current_user: dict = Depends(get_current_active_user)
+    category_update: CategoryUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    if category_id not in categories_db:
+    try:
+        category = await crud_category.update_category(
+            db, category_id, category_update, current_user.id
+        )
+    except IntegrityError:
+        raise _duplicate_name_error()
+    if not category:
         raise NotFoundError("Category not found")
-    category = categories_db[category_id]
-    if category.owner != current_user.username:
-        raise NotFoundError("Category not found")
-    
-    update_data = category_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(category, field, value)
-    
-    categories_db[category_id] = category
     return category
 
 @router.delete("/categories/{category_id}")
 async def delete_category(
     category_id: int,
-    current_user: dict = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    if category_id not in categories_db:
-        raise NotFoundError("Category not found")
-    category = categories_db[category_id]
-    if category.owner != current_user.username:
+    if not await crud_category.delete_category(db, category_id, current_user.id):
         raise NotFoundError("Category not found")
-    
-    del categories_db[category_id]
     return {"message": "Category deleted successfully"}
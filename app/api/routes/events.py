@@ -0,0 +1,125 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from starlette.requests import HTTPConnection
+from typing import AsyncIterator, Optional
+from app.api.dependencies import rate_limit
+from app.core.config import settings
+from app.db import session as db_session
+from app.services.auth import Principal, get_principal
+from app.services.events import HEARTBEAT, Subscription, SubscriptionClosed, event_broker
+
+router = APIRouter()
+
+# Close codes telling WebSocket clients why the server hung up
+_CLOSE_CODES = {
+    "slow consumer": status.WS_1013_TRY_AGAIN_LATER,
+    "shutdown": status.WS_1001_GOING_AWAY,
+}
+
+def _token(connection: HTTPConnection) -> Optional[str]:
+    # Browsers cannot set headers on WebSocket or EventSource requests
+    scheme, _, token = connection.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    return connection.query_params.get("token")
+
+async def _authenticate(connection: HTTPConnection) -> Optional[Principal]:
+    """
+    Principal of the connecting client. The session is closed before the
+    stream starts, so idle connections never hold a pooled connection.
+    """
+    token = _token(connection)
+    if not token:
+        return None
+    async with db_session.AsyncSessionLocal() as db:
+        principal = await get_principal(db, token)
+    if principal is None or not principal.is_active:
+        return None
+    return principal
+
+async def _close_on_disconnect(websocket: WebSocket, subscription: Subscription) -> None:
+    # Incoming messages are ignored; reading only notices the disconnect
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        subscription.close("disconnected")
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket):
+    """
+    Push the user's task and category change events as JSON text messages,
+    e.g. {"type": "task.updated", "ids": [1, 2]}, with a heartbeat message
+    when idle. Fetch the changes themselves through GET /sync.
+    Authenticate with a bearer token header or `?token=`.
+    """
+    principal = await _authenticate(websocket)
+    if principal is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    subscription = event_broker.subscribe(principal.id)
+    if subscription is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    await websocket.accept()
+    reader = asyncio.create_task(_close_on_disconnect(websocket, subscription))
+    try:
+        while True:
+            try:
+                message = await subscription.get(settings.EVENTS_HEARTBEAT_SECONDS)
+            except SubscriptionClosed:
+                break
+            await websocket.send_text(message or HEARTBEAT)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
+        event_broker.unsubscribe(subscription)
+    code = _CLOSE_CODES.get(subscription.reason)
+    if code is not None:
+        try:
+            await websocket.close(code=code, reason=subscription.reason)
+        except RuntimeError:
+            pass
+
+@router.get("/events", dependencies=[Depends(rate_limit("events"))])
+async def events_stream(request: Request):
+    """
+    Server-sent events variant of /ws: each change event is a `data:` line,
+    and a comment line is sent as heartbeat. Browsers reconnect on their own
+    after the stream is closed, e.g. for falling too far behind.
+    """
+    principal = await _authenticate(request)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    subscription = event_broker.subscribe(principal.id)
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event subscribers, please retry",
+            headers={"Retry-After": "5"},
+        )
+
+    async def stream() -> AsyncIterator[str]:
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    message = await subscription.get(settings.EVENTS_HEARTBEAT_SECONDS)
+                except SubscriptionClosed:
+                    return
+                yield f"data: {message}\n\n" if message is not None else ": heartbeat\n\n"
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering or caching the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,64 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.dependencies import get_db_read
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.serialization import ListSerializer, json_response
+from app.api.routes.auth import get_current_active_user
+from app.core.config import settings
+from app.schemas.category import Category
+from app.schemas.sync import SyncResponse
+from app.schemas.task import Task
+from app.services import sync as sync_service
+from app.services.auth import Principal
+from app.services.sync import Position
+
+router = APIRouter()
+
+_task_list = ListSerializer(Task)
+_category_list = ListSerializer(Category)
+
+def _parse_sync_token(token: str) -> Tuple[Position, Position]:
+    key = decode_cursor(token, "sync")
+    try:
+        task_seq, task_id, category_seq, category_id = (int(value) for value in key)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+    return (task_seq, task_id), (category_seq, category_id)
+
+def _dump_changes(changes: Dict[str, Any]) -> bytes:
+    tasks = [task for task in changes["tasks"] if task.deleted_at is None]
+    categories = [category for category in changes["categories"] if category.deleted_at is None]
+    rest = {
+        "deleted_tasks": [task.id for task in changes["tasks"] if task.deleted_at is not None],
+        "deleted_categories": [c.id for c in changes["categories"] if c.deleted_at is not None],
+        "next_token": encode_cursor("sync", [*changes["tasks_after"], *changes["categories_after"]]),
+        "has_more": changes["has_more"],
+        "reset": changes["reset"],
+    }
+    return (
+        b'{"tasks":' + _task_list.dump(tasks)
+        + b',"categories":' + _category_list.dump(categories)
+        + b"," + json.dumps(rest, separators=(",", ":")).encode()[1:]
+    )
+
+@router.get("/sync", response_model=SyncResponse)
+async def sync(
+    since: Optional[str] = None,
+    limit: int = Query(settings.SYNC_PAGE_DEFAULT, ge=1, le=settings.SYNC_PAGE_MAX),
+    db: AsyncSession = Depends(get_db_read),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """
+    Tasks and categories changed since the `since` token, plus the ids of
+    those deleted. Omit `since` for a full sync; pass back `next_token`, and
+    keep going while `has_more` is set. Changes arrive oldest first, at most
+    `limit` tasks and `limit` categories per call.
+    """
+    after = _parse_sync_token(since) if since else None
+    changes = await sync_service.get_changes(db, current_user.id, after, limit)
+    return json_response(_dump_changes(changes))
@@ -1,132 +1,346 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Optional
-from pydantic import BaseModel
+import csv
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, List, Optional, Sequence
 from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.cache import cache_headers, cached_body, cached_json
+from app.api.dependencies import get_db, get_db_read
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.serialization import ListSerializer, json_response
+from app.api.transfer import FileEncoder, FileReader
 from app.api.routes.auth import get_current_active_user
-from app.api.routes.categories import categories_db
-from app.api.errors import NotFoundError, ValidationError
+from app.api.errors import NotFoundError
+from app.core.config import settings
+from app.crud import category as crud_category
+from app.crud import task as crud_task
+from app.models.task import Task as TaskModel
+from app.schemas.task import (
+    Task,
+    TaskBulkCreate,
+    TaskBulkDelete,
+    TaskBulkItemResult,
+    TaskBulkResponse,
+    TaskBulkStatus,
+    TaskBulkUpdate,
+    TaskCreate,
+    TaskFileFormat,
+    TaskImportResult,
+    TaskPage,
+    TaskSortField,
+    TaskStats,
+    TaskUpdate
+)
+from app.services import cache as cache_scopes
+from app.services import stats as stats_service
+from app.services.auth import Principal
 
 router = APIRouter()
 
-class TaskBase(BaseModel):
-    title: str
-    description: Optional[str] = None
-    due_date: Optional[datetime] = None
-    category_id: Optional[int] = None
-    completed: bool = False
+# List endpoints return pre-serialized bodies; response_model only documents them
+_task_list = ListSerializer(Task)
 
-class TaskCreate(TaskBase):
-    pass
+def _task_sort_key(task: TaskModel, order_by: TaskSortField) -> List[Any]:
+    if order_by == TaskSortField.DUE_DATE:
+        return [task.due_date, task.id]
+    return [task.id]
 
-class Task(TaskBase):
-    id: int
-    owner: str
-    created_at: datetime
-    updated_at: datetime
+def _parse_task_cursor(cursor: str, order_by: TaskSortField) -> List[Any]:
+    key = decode_cursor(cursor, order_by.value)
+    try:
+        if order_by == TaskSortField.DUE_DATE:
+            due_date, task_id = key
+            return [datetime.fromisoformat(due_date) if due_date else None, int(task_id)]
+        (task_id,) = key
+        return [int(task_id)]
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
-    class Config:
-        orm_mode = True
+def _check_batch_size(size: int) -> None:
+    if size > settings.TASK_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch exceeds {settings.TASK_BULK_MAX_ITEMS} items"
+        )
 
-# Temporary in-memory storage
-tasks_db = {}
-task_id_counter = 1
+async def _check_category(db: AsyncSession, category_id: Optional[int], user_id: int) -> None:
+    if category_id and not await crud_category.get_category(db, category_id, user_id):
+        raise NotFoundError("Category not found")
 
 @router.post("/tasks/", response_model=Task)
 async def create_task(
     task: TaskCreate,
-    current_user: dict = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    global task_id_counter
-    
-    if task.category_id and task.category_id not in categories_db:
+    new_task = await crud_task.create_task(db, task, current_user.id)
+    if not new_task:
         raise NotFoundError("Category not found")
-
-    new_task = Task(
-        id=task_id_counter,
-        **task.dict(),
-        owner=current_user.username,
-        created_at=datetime.now(),
-        updated_at=datetime.now()
-    )
-    tasks_db[task_id_counter] = new_task
-    task_id_counter += 1
     return new_task
 
-@router.get("/tasks/", response_model=List[Task])
+@router.get("/tasks/", response_model=TaskPage)
 async def get_tasks(
-    current_user: dict = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db_read),
+    current_user: Principal = Depends(get_current_active_user),
     category_id: Optional[int] = None,
-    completed: Optional[bool] = None
+    completed: Optional[bool] = None,
+    order_by: TaskSortField = TaskSortField.ID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None
+):
+    after = _parse_task_cursor(cursor, order_by) if cursor else None
+
+    async def build(session: AsyncSession) -> bytes:
+        # Fetch one extra row to know whether another page exists
+        tasks = await crud_task.get_tasks(
+            session,
+            current_user.id,
+            limit=limit + 1,
+            category_id=category_id,
+            completed=completed,
+            order_by=order_by,
+            after=after
+        )
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = encode_cursor(order_by.value, _task_sort_key(tasks[-1], order_by))
+        return _task_list.dump_page(tasks, next_cursor)
+
+    return await cached_json(
+        cache_scopes.TASKS,
+        current_user.id,
+        {
+            "category_id": category_id,
+            "completed": completed,
+            "order_by": order_by.value,
+            "limit": limit,
+            "cursor": cursor
+        },
+        db,
+        build
+    )
+
+# Stats, search, bulk and export routes are declared before /tasks/{task_id} so they are not parsed as an id
+@router.get("/tasks/stats", response_model=TaskStats)
+async def get_task_stats(
+    db: AsyncSession = Depends(get_db_read),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Task totals by status, priority and category, plus overdue and completed this week."""
+    overdue = None
+
+    async def build(session: AsyncSession) -> bytes:
+        nonlocal overdue
+        stats = await stats_service.get_task_stats(session, current_user.id)
+        # Tasks become overdue as time passes, without a write to invalidate the cache
+        overdue = stats.pop("overdue")
+        return TaskStats(**stats).model_dump_json(exclude={"overdue"}).encode()
+
+    # The week is part of the key, so completed_this_week resets on Monday
+    body, hit = await cached_body(
+        cache_scopes.TASKS,
+        current_user.id,
+        {"view": "stats", "week": stats_service.current_week()},
+        db,
+        build
+    )
+    stats = TaskStats.model_validate_json(body)
+    stats.overdue = await stats_service.count_overdue(db, current_user.id) if overdue is None else overdue
+    return json_response(stats.model_dump_json().encode(), headers=cache_headers(hit))
+
+@router.get("/tasks/search", response_model=TaskPage)
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    db: AsyncSession = Depends(get_db_read),
+    current_user: Principal = Depends(get_current_active_user),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None
+):
+    """Search task titles and descriptions, best match first."""
+    after = None
+    if cursor:
+        try:
+            rank, task_id = decode_cursor(cursor, "rank")
+            after = [float(rank), int(task_id)]
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    hits = await crud_task.search_tasks(db, current_user.id, q, limit=limit + 1, after=after)
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        last_task, last_rank = hits[-1]
+        next_cursor = encode_cursor("rank", [last_rank, last_task.id])
+    return json_response(_task_list.dump_page([task for task, _ in hits], next_cursor))
+
+
+@router.post("/tasks/bulk", response_model=TaskBulkResponse)
+async def bulk_create_tasks(
+    payload: TaskBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    _check_batch_size(len(payload.items))
+    results = await crud_task.bulk_create_tasks(db, payload.items, current_user.id)
+    return {"results": [
+        TaskBulkItemResult(
+            index=index,
+            id=task.id if task else None,
+            status=item_status,
+            task=task
+        )
+        for index, (item_status, task) in enumerate(results)
+    ]}
+
+@router.patch("/tasks/bulk", response_model=TaskBulkResponse)
+async def bulk_update_tasks(
+    payload: TaskBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    tasks = [task for task in tasks_db.values() if task.owner == current_user.username]
-    
-    if category_id is not None:
-        tasks = [task for task in tasks if task.category_id == category_id]
-    if completed is not None:
-        tasks = [task for task in tasks if task.completed == completed]
-    
-    return tasks
+    _check_batch_size(len(payload.items))
+    if len({item.id for item in payload.items}) != len(payload.items):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Duplicate task ids in batch"
+        )
+    results = await crud_task.bulk_update_tasks(db, payload.items, current_user.id)
+    return {"results": [
+        TaskBulkItemResult(index=index, id=item.id, status=item_status, task=task)
+        for index, (item, (item_status, task)) in enumerate(zip(payload.items, results))
+    ]}
+
+@router.delete("/tasks/bulk", response_model=TaskBulkResponse)
+async def bulk_delete_tasks(
+    payload: TaskBulkDelete,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    _check_batch_size(len(payload.ids))
+    deleted = await crud_task.bulk_delete_tasks(db, payload.ids, current_user.id)
+    return {"results": [
+        TaskBulkItemResult(
+            index=index,
+            id=task_id,
+            status=TaskBulkStatus.DELETED if task_id in deleted else TaskBulkStatus.NOT_FOUND
+        )
+        for index, task_id in enumerate(payload.ids)
+    ]}
+
+@router.get("/tasks/export")
+async def export_tasks(
+    format: TaskFileFormat = TaskFileFormat.NDJSON,
+    db: AsyncSession = Depends(get_db_read),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """
+    Download all of the user's tasks, one per line as NDJSON or CSV with a
+    header row. The file is streamed as rows come off a server-side cursor,
+    which keeps the session open until the last byte is sent.
+    """
+    encoder = FileEncoder(_task_list, format)
+
+    async def stream() -> AsyncIterator[bytes]:
+        yield encoder.header()
+        async for tasks in crud_task.stream_tasks(db, current_user.id, settings.TASK_EXPORT_BATCH_SIZE):
+            yield encoder.encode(tasks)
+
+    return StreamingResponse(
+        stream(),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'},
+    )
+
+@router.post("/tasks/import", response_model=TaskImportResult)
+async def import_tasks(
+    file: UploadFile = File(...),
+    format: TaskFileFormat = TaskFileFormat.NDJSON,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """
+    Create tasks from an uploaded NDJSON or CSV file, e.g. an export. Valid
+    rows are imported together; invalid ones and ones pointing at another
+    user's category are skipped and reported by line number.
+    """
+    reader = FileReader(
+        file.file,
+        format,
+        TaskCreate,
+        settings.TASK_IMPORT_CHUNK_SIZE,
+        settings.TASK_IMPORT_MAX_ERRORS
+    )
+
+    async def owned_chunks() -> AsyncIterator[Sequence[TaskCreate]]:
+        async for chunk in reader.chunks():
+            owned = await crud_category.get_owned_category_ids(
+                db, (task.category_id for _, task in chunk if task.category_id is not None), current_user.id
+            )
+            tasks = []
+            for line, task in chunk:
+                if task.category_id is not None and task.category_id not in owned:
+                    reader.reject(line, "Category not found")
+                else:
+                    tasks.append(task)
+            yield tasks
+
+    try:
+        imported = await crud_task.import_tasks(db, owned_chunks(), current_user.id)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unreadable {format.value} file: {str(e)}"
+        )
+    return {"imported": imported, "failed": reader.failed, "errors": reader.errors}
 
 @router.get("/tasks/{task_id}", response_model=Task)
 async def get_task(
     task_id: int,
-    current_user: dict = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db_read),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    if task_id not in tasks_db:
-        raise NotFoundError("Task not found")
-    task = tasks_db[task_id]
-    if task.owner != current_user.username:
+    task = await crud_task.get_task(db, task_id, current_user.id)
+    if not task:
         raise NotFoundError("Task not found")
     return task
 
 @router.put("/tasks/{task_id}", response_model=Task)
 async def update_task(
     task_id: int,
-    task_update: TaskCreate,
-    current_user: dict = Depends(get_current_active_user)
+    task_update: TaskUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    if task_id not in tasks_db:
-        raise NotFoundError("Task not found")
-    task = tasks_db[task_id]
-    if task.owner != current_user.username:
+    task = await crud_task.update_task(db, task_id, task_update, current_user.id)
+    if not task:
+        # Only the failure path pays for working out which check failed
+        await _check_category(db, task_update.category_id, current_user.id)
         raise NotFoundError("Task not found")
-
-    if task_update.category_id and task_update.category_id not in categories_db:
-        raise NotFoundError("Category not found")
-    
-    update_data = task_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(task, field, value)
-    
-    task.updated_at = datetime.now()
-    tasks_db[task_id] = task
     return task
 
 @router.delete("/tasks/{task_id}")
 async def delete_task(
     task_id: int,
-    current_user: dict = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    if task_id not in tasks_db:
+    if not await crud_task.delete_task(db, task_id, current_user.id):
         raise NotFoundError("Task not found")
-    task = tasks_db[task_id]
-    if task.owner != current_user.username:
-        raise NotFoundError("Task not found")
-    
-    del tasks_db[task_id]
     return {"message": "Task deleted successfully"}
 
 @router.patch("/tasks/{task_id}/toggle", response_model=Task)
 async def toggle_task(
     task_id: int,
-    current_user: dict = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    if task_id not in tasks_db:
-        raise NotFoundError("Task not found")
-    task = tasks_db[task_id]
-    if task.owner != current_user.username:
+    task = await crud_task.toggle_task_completion(db, task_id, current_user.id)
+    if not task:
         raise NotFoundError("Task not found")
-    
-    task.completed = not task.completed
-    task.updated_at = datetime.now()
     return task
@@ -1,86 +1,108 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from sqlalchemy.orm import Session
+from typing import FrozenSet, List
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from app.api.routes.auth import get_current_active_user
-from app.api.dependencies import get_db
-from app.core.security import get_password_hash
+from app.api.routes.auth import get_current_active_user, get_current_db_user
+from app.api.dependencies import get_db, get_db_read, user_includes
+from app.core.config import settings
+from app.core.security import PasswordHasherBusyError
 from app.crud.user import user as crud_user  # Updated import
-from app.schemas.user import User, UserCreate, UserUpdate
-from app.api.errors import NotFoundError, ValidationError, ConflictError
+from app.models.user import User as UserModel
+from app.services.auth import DELETED, Principal, principal_cache, token_versions
+from app.schemas.user import User, UserCreate, UserDetail, UserUpdate
+from app.api.errors import NotFoundError
 
 router = APIRouter()
 
 @router.post("/users/", response_model=User)
 async def create_new_user(
     user_in: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new user."""
     # Check if user with this email exists
-    if crud_user.get_by_email(db, email=user_in.email):
+    if await crud_user.get_by_email(db, email=user_in.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     try:
-        user = crud_user.create(db, obj_in=user_in)
+        user = await crud_user.create(db, obj_in=user_in)
         return user
+    except PasswordHasherBusyError:
+        raise
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this email already exists"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
-@router.get("/users/", response_model=List[User])
+@router.get("/users/", response_model=List[UserDetail], response_model_exclude_unset=True)
 async def list_users(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db_read),
+    current_user: Principal = Depends(get_current_active_user),
+    include: FrozenSet[str] = Depends(user_includes),
     skip: int = 0,
     limit: int = 100
 ):
-    """Get list of users."""
-    users = crud_user.get_multi(db, skip=skip, limit=limit)
+    """Get list of users, with ?include=tasks,categories to embed collections."""
+    users = await crud_user.get_multi(db, skip=skip, limit=limit)
+    await crud_user.load_collections(db, users, include, settings.USER_INCLUDE_MAX_ITEMS)
     return users
 
 @router.put("/users/me", response_model=User)
 async def update_current_user(
     user_in: UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_db_user)
 ):
-    """Update current user."""
-    user = crud_user.update(db, db_obj=current_user, obj_in=user_in)
+    """Update current user. A new username signs out tokens carrying the old one."""
+    values = user_in.model_dump(exclude_unset=True)
+    renamed = values.get("username") not in (None, current_user.username)
+    if renamed:
+        values["token_version"] = current_user.token_version + 1
+    user = await crud_user.update(db, db_obj=current_user, obj_in=values)
     if not user:
         raise NotFoundError("User not found")
+    principal_cache.invalidate_user(user.id)
+    if renamed:
+        await token_versions.set(user.id, user.token_version)
     return user
 
 @router.delete("/users/me")
 async def delete_current_user(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Delete current user."""
-    success = crud_user.remove(db, id=current_user.id)
+    success = await crud_user.remove(db, id=current_user.id)
     if not success:
         raise NotFoundError("User not found")
+    principal_cache.invalidate_user(current_user.id)
+    await token_versions.set(current_user.id, DELETED)
     return {"message": "User deleted successfully"}
 
 @router.post("/users/me/disable")
 async def disable_current_user(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_db_user)
 ):
     """Disable current user."""
-    user = crud_user.update(db, db_obj=current_user, obj_in=UserUpdate(disabled=True))
+    user = await crud_user.update(
+        db,
+        db_obj=current_user,
+        obj_in={"is_active": False, "token_version": current_user.token_version + 1}
+    )
     if not user:
         raise NotFoundError("User not found")
+    principal_cache.invalidate_user(user.id)
+    await token_versions.set(user.id, user.token_version)
     return {"message": "User disabled successfully"}
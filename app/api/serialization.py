@@ -0,0 +1,105 @@
+from dataclasses import is_dataclass
+from operator import attrgetter
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, get_args
+from fastapi import Response
+from pydantic import AliasChoices, BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+SchemaType = TypeVar("SchemaType", bound=BaseModel)
+
+_cursor = TypeAdapter(Optional[str])
+
+
+def json_response(body: bytes, **kwargs: Any) -> Response:
+    """Raw JSON response for a body that is already serialized."""
+    return Response(content=body, media_type="application/json", **kwargs)
+
+
+def _attribute_names(name: str, field: Any) -> Tuple[str, ...]:
+    alias = field.validation_alias
+    if isinstance(alias, AliasChoices):
+        return (name, *[choice for choice in alias.choices if isinstance(choice, str)])
+    if isinstance(alias, str):
+        return (name, alias)
+    return (name,)
+
+
+def _has_model(annotation: Any) -> bool:
+    """Whether a type holds a model anywhere, e.g. Optional[Model] or Dict[str, List[Model]]."""
+    if isinstance(annotation, type) and (issubclass(annotation, BaseModel) or is_dataclass(annotation)):
+        return True
+    return any(_has_model(arg) for arg in get_args(annotation))
+
+
+def _is_flat(schema: Type[BaseModel]) -> bool:
+    """Whether dumping the schema is just reading its fields: no nested models or custom serializers."""
+    decorators = schema.__pydantic_decorators__
+    if decorators.field_serializers or decorators.model_serializers or decorators.computed_fields:
+        return False
+    return not any(_has_model(field.annotation) for field in schema.model_fields.values())
+
+
+class ListSerializer(Generic[SchemaType]):
+    """
+    Serializes lists of ORM rows for a response schema straight to JSON bytes.
+
+    The TypeAdapter is built once per schema instead of per request. Rows
+    loaded by our own queries already satisfy the schema, so when orjson is
+    installed and the schema is flat, `dump` reads the fields off the rows
+    without validating them again. Otherwise rows are validated from
+    attributes and dumped by pydantic-core.
+    """
+    def __init__(self, schema: Type[SchemaType]):
+        self.schema = schema
+        self.adapter = TypeAdapter(List[schema])
+        self.trusted = orjson is not None and _is_flat(schema)
+        self._fields = [
+            (name, _attribute_names(name, field))
+            for name, field in schema.model_fields.items()
+        ]
+        self._names = tuple(name for name, _ in self._fields)
+        # ORM class -> getter returning the field values of a row as a tuple
+        self._readers: Dict[type, Callable[[Any], Tuple[Any, ...]]] = {}
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """Field names of the schema, in order."""
+        return self._names
+
+    def _reader(self, row_type: type) -> Callable[[Any], Tuple[Any, ...]]:
+        reader = self._readers.get(row_type)
+        if reader is None:
+            attributes = []
+            for name, candidates in self._fields:
+                attribute = next((a for a in candidates if hasattr(row_type, a)), None)
+                if attribute is None:
+                    raise AttributeError(f"{row_type.__name__} has no attribute for field '{name}'")
+                attributes.append(attribute)
+            reader = self._readers[row_type] = attrgetter(*attributes)
+        return reader
+
+    def to_python(self, rows: Sequence[Any]) -> List[Dict[str, Any]]:
+        """Rows as plain dicts keyed by field name, without validation."""
+        if not rows:
+            return []
+        reader, names = self._reader(type(rows[0])), self._names
+        return [dict(zip(names, reader(row))) for row in rows]
+
+    def dump(self, rows: Sequence[Any]) -> bytes:
+        """JSON array of `rows`."""
+        if self.trusted:
+            return orjson.dumps(self.to_python(rows), option=orjson.OPT_UTC_Z)
+        return self.adapter.dump_json(self.adapter.validate_python(rows, from_attributes=True))
+
+    def dump_page(self, rows: Sequence[Any], next_cursor: Optional[str]) -> bytes:
+        """JSON object in the `{"items": [...], "next_cursor": ...}` page shape."""
+        if self.trusted:
+            return orjson.dumps(
+                {"items": self.to_python(rows), "next_cursor": next_cursor},
+                option=orjson.OPT_UTC_Z
+            )
+        return b'{"items":' + self.dump(rows) + b',"next_cursor":' + _cursor.dump_json(next_cursor) + b"}"
@@ -0,0 +1,149 @@
+import csv
+import io
+from datetime import datetime
+from enum import Enum
+from itertools import islice
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Sequence, Tuple, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+from app.api.serialization import ListSerializer, orjson
+from app.schemas.task import TaskFileFormat
+
+SchemaType = TypeVar("SchemaType", bound=BaseModel)
+
+MEDIA_TYPES = {
+    TaskFileFormat.NDJSON: "application/x-ndjson",
+    TaskFileFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class FileEncoder:
+    """
+    Encodes batches of ORM rows for a response schema as NDJSON or CSV, for
+    streamed exports. A CSV file starts with a header row of field names.
+    """
+    def __init__(self, serializer: ListSerializer, file_format: TaskFileFormat):
+        self.serializer = serializer
+        self.format = file_format
+        self.media_type = MEDIA_TYPES[file_format]
+
+    def header(self) -> bytes:
+        if self.format == TaskFileFormat.CSV:
+            return self._csv([self.serializer.names])
+        return b""
+
+    def encode(self, rows: Sequence[Any]) -> bytes:
+        if self.format == TaskFileFormat.CSV:
+            names = self.serializer.names
+            return self._csv(
+                [_csv_value(item[name]) for name in names]
+                for item in self.serializer.to_python(rows)
+            )
+        if self.serializer.trusted:
+            return b"".join(
+                orjson.dumps(item, option=orjson.OPT_UTC_Z | orjson.OPT_APPEND_NEWLINE)
+                for item in self.serializer.to_python(rows)
+            )
+        schema = self.serializer.schema
+        return b"".join(
+            schema.model_validate(row, from_attributes=True).model_dump_json().encode() + b"\n"
+            for row in rows
+        )
+
+    def _csv(self, rows: Any) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode()
+
+
+def _error_detail(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}" if error["loc"] else error["msg"]
+        for error in exc.errors()
+    )
+
+
+class FileReader:
+    """
+    Reads an uploaded NDJSON or CSV file in chunks of rows validated with
+    `schema`, paired with their line numbers, so a file of any size is held
+    one chunk at a time. Reads run in the threadpool, as an upload larger
+    than a megabyte is spooled to disk.
+
+    Invalid rows are left out of the chunks and counted in `failed`; the
+    first `max_errors` are kept in `errors`. Callers reject rows failing
+    their own checks with `reject`. CSV columns are the schema's fields,
+    e.g. an export's header row; other columns are ignored and empty
+    values are treated as missing.
+    """
+    def __init__(
+        self,
+        file: BinaryIO,
+        file_format: TaskFileFormat,
+        schema: Type[SchemaType],
+        chunk_size: int,
+        max_errors: int
+    ):
+        self.schema = schema
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        # A byte order mark, as spreadsheet programs write, is skipped
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        self._rows = self._csv_rows(text) if file_format == TaskFileFormat.CSV else self._ndjson_rows(text)
+
+    def reject(self, line: int, detail: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "detail": detail})
+
+    async def chunks(self) -> AsyncIterator[List[Tuple[int, SchemaType]]]:
+        """Raises UnicodeDecodeError or csv.Error for a file that cannot be parsed at all."""
+        while True:
+            chunk = await run_in_threadpool(self._read_chunk)
+            if not chunk:
+                return
+            valid = [(line, row) for line, row in chunk if row is not None]
+            if valid:
+                yield valid
+
+    def _read_chunk(self) -> List[Tuple[int, Any]]:
+        chunk = []
+        for line, data in islice(self._rows, self.chunk_size):
+            try:
+                row = (
+                    self.schema.model_validate_json(data) if isinstance(data, str)
+                    else self.schema.model_validate(data)
+                )
+            except ValidationError as e:
+                self.reject(line, _error_detail(e))
+                row = None
+            chunk.append((line, row))
+        return chunk
+
+    def _ndjson_rows(self, text: io.TextIOWrapper) -> Iterator[Tuple[int, str]]:
+        for line, data in enumerate(text, 1):
+            if data.strip():
+                yield line, data
+
+    def _csv_rows(self, text: io.TextIOWrapper) -> Iterator[Tuple[int, Dict[str, str]]]:
+        reader = csv.DictReader(text)
+        for record in reader:
+            # line_num is the record's last line, which differs for quoted line breaks
+            yield reader.line_num, {
+                name: value for name, value in record.items()
+                if name is not None and value not in ("", None)
+            }
@@ -2,6 +2,9 @@ from app.core.config import settings
 from app.core.security import (
     verify_password,
     get_password_hash,
+    needs_rehash,
+    password_hasher,
+    PasswordHasherBusyError,
     create_access_token,
     verify_token,
     get_token_data
@@ -12,6 +15,9 @@ __all__ = [
     "settings",
     "verify_password",
     "get_password_hash",
+    "needs_rehash",
+    "password_hasher",
+    "PasswordHasherBusyError",
     "create_access_token",
     "verify_token",
     "get_token_data",
@@ -18,6 +18,17 @@ class Settings(BaseSettings):
     # Security Settings
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_ALGORITHM: str = "HS256"
+    PRINCIPAL_CACHE_MAX_SIZE: int = Field(default=10000, ge=1)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = Field(default=300, ge=1)
+    # Longest a revoked token can still be accepted by a worker that cached
+    # the user's token version in memory; the shared cache backend revokes at once
+    TOKEN_VERSION_CACHE_TTL_SECONDS: float = Field(default=30.0, gt=0)
+
+    # Password Hashing Settings
+    BCRYPT_ROUNDS: int = Field(default=12, ge=4, le=31)
+    PASSWORD_HASH_EXECUTOR: str = Field(default="thread", pattern="^(thread|process)$")
+    PASSWORD_HASH_WORKERS: int = Field(default=4, ge=1)
+    PASSWORD_HASH_MAX_PENDING: int = Field(default=64, ge=1)
 
     # CORS Settings
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
@@ -29,10 +40,133 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = Field(default=os.getenv("DATABASE_PORT", "5432"))
     POSTGRES_DB: str = Field(default=os.getenv("DATABASE_NAME", "todo"))
 
+    # Connection Pool Settings
+    DB_POOL_SIZE: int = Field(default=10, ge=1)
+    DB_MAX_OVERFLOW: int = Field(default=20, ge=0)
+    DB_POOL_TIMEOUT: float = Field(default=10.0, gt=0)
+    DB_POOL_RECYCLE: int = Field(default=1800, ge=-1)
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = Field(default=30000, ge=0)
+    # What each worker does with the schema on startup: "verify" checks the
+    # Alembic revision, "init" also creates, migrates and seeds (single
+    # process development), "skip" does nothing. Deploys run
+    # `python -m app.db.init_db` once instead.
+    DB_STARTUP_MODE: str = Field(default="verify", pattern="^(verify|init|skip)$")
+
+    # Query Profiling Settings
+    # Per-request query count and DB time, sent as a Server-Timing header
+    DB_PROFILING_ENABLED: bool = True
+    # Requests running more queries than this are logged with their slowest
+    # statement, to catch N+1 patterns; 0 disables the warning
+    DB_QUERY_BUDGET: int = Field(default=10, ge=0)
+
     @property
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    # Read Replica Settings
+    # Comma-separated "host" or "host:port" entries, same credentials as the primary
+    POSTGRES_REPLICA_SERVERS: str = Field(default=os.getenv("DATABASE_REPLICA_HOSTS", ""))
+    REPLICA_EJECT_SECONDS: float = Field(default=30.0, gt=0)
+    # Reads stay on the primary this long after a user's commit. The window is
+    # kept in the response cache backend: use "shared" when running several
+    # workers, or a user's next request may read a replica on another worker
+    READ_YOUR_WRITES_SECONDS: float = Field(default=5.0, ge=0)
+
+    @property
+    def ASYNC_REPLICA_DATABASE_URLS(self) -> List[str]:
+        urls = []
+        for entry in filter(None, (e.strip() for e in self.POSTGRES_REPLICA_SERVERS.split(","))):
+            host, _, port = entry.partition(":")
+            urls.append(f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{host}:{port or self.POSTGRES_PORT}/{self.POSTGRES_DB}")
+        return urls
+
+    # Response Cache Settings
+    # "memory" is per process; use "shared" when running several workers
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = Field(default="memory", pattern="^(memory|shared)$")
+    # redis:// URL for the shared backend, or local:// for an in-process stand-in
+    RESPONSE_CACHE_URL: str = "local://"
+    RESPONSE_CACHE_MAX_BYTES: int = Field(default=64 * 1024 * 1024, ge=1)
+    RESPONSE_CACHE_TTL_SECONDS: float = Field(default=60.0, gt=0)
+
+    # Rate Limit Settings
+    # Limits are requests per window, per user (or per client IP when anonymous)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = Field(default="memory", pattern="^(memory|shared)$")
+    RATE_LIMIT_URL: str = "local://"
+    RATE_LIMIT_WINDOW_SECONDS: float = Field(default=60.0, gt=0)
+    RATE_LIMIT_DEFAULT: int = Field(default=120, ge=1)
+    RATE_LIMIT_ROUTES: Dict[str, int] = {
+        "auth": 20,
+        "users": 60,
+        "categories": 120,
+        "tasks": 240,
+        "sync": 120,
+        "events": 30,
+    }
+    RATE_LIMIT_MAX_KEYS: int = Field(default=100000, ge=1)
+
+    # User Settings
+    # Most items embedded per collection by ?include=tasks,categories
+    USER_INCLUDE_MAX_ITEMS: int = Field(default=100, ge=1)
+
+    # Task Settings
+    TASK_BULK_MAX_ITEMS: int = Field(default=100, ge=1)
+    # Rebuild of the per-user stats counters; 0 leaves scheduling to cron
+    TASK_STATS_RECONCILE_INTERVAL_SECONDS: int = Field(default=0, ge=0)
+    TASK_STATS_RECONCILE_BATCH_SIZE: int = Field(default=500, ge=1)
+    # Rows fetched per round trip by GET /tasks/export
+    TASK_EXPORT_BATCH_SIZE: int = Field(default=1000, ge=1)
+    # Rows validated and copied per chunk by POST /tasks/import
+    TASK_IMPORT_CHUNK_SIZE: int = Field(default=5000, ge=1)
+    # Rejected rows listed in an import response; all of them are counted
+    TASK_IMPORT_MAX_ERRORS: int = Field(default=100, ge=0)
+    # Statement timeout within an import's transaction, replacing
+    # DB_STATEMENT_TIMEOUT_MS for the final INSERT of every row; 0 disables it
+    TASK_IMPORT_STATEMENT_TIMEOUT_MS: int = Field(default=600000, ge=0)
+
+    # Activity Log Settings
+    # Task and category changes are queued in memory and written in batches
+    ACTIVITY_LOG_ENABLED: bool = True
+    ACTIVITY_LOG_QUEUE_SIZE: int = Field(default=10000, ge=1)
+    ACTIVITY_LOG_BATCH_SIZE: int = Field(default=500, ge=1)
+    ACTIVITY_LOG_FLUSH_SECONDS: float = Field(default=1.0, gt=0)
+    # When the queue is full: "drop" the record, or "block" the request up to the timeout first
+    ACTIVITY_LOG_OVERFLOW: str = Field(default="drop", pattern="^(drop|block)$")
+    ACTIVITY_LOG_BLOCK_TIMEOUT_SECONDS: float = Field(default=0.1, gt=0)
+    ACTIVITY_LOG_SHUTDOWN_TIMEOUT_SECONDS: float = Field(default=10.0, gt=0)
+
+    # Sync Settings
+    SYNC_PAGE_DEFAULT: int = Field(default=500, ge=1)
+    SYNC_PAGE_MAX: int = Field(default=1000, ge=1)
+    # Tombstones of deleted rows are kept this long for offline clients to pick up
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = Field(default=30, ge=1)
+    SYNC_COMPACT_BATCH_SIZE: int = Field(default=1000, ge=1)
+    # Purge of expired tombstones; 0 leaves scheduling to cron
+    SYNC_COMPACT_INTERVAL_SECONDS: int = Field(default=0, ge=0)
+
+    # Event Push Settings
+    # Change events for WebSocket/SSE clients; "postgres" fans out to all workers via LISTEN/NOTIFY
+    EVENTS_ENABLED: bool = True
+    EVENTS_BACKEND: str = Field(default="memory", pattern="^(memory|postgres)$")
+    EVENTS_CHANNEL: str = Field(default="todo_events", pattern="^[a-z_][a-z0-9_]*$")
+    # Events buffered per connection before it is closed as a slow consumer
+    EVENTS_QUEUE_SIZE: int = Field(default=100, ge=1)
+    EVENTS_MAX_SUBSCRIPTIONS: int = Field(default=50000, ge=1)
+    EVENTS_HEARTBEAT_SECONDS: float = Field(default=30.0, gt=0)
+
+    # Request Metrics Settings
+    METRICS_ENABLED: bool = True
+    # Directory shared by the workers of one server, for /metrics to cover
+    # all of them; empty reports this worker only. Clear it on deploy.
+    METRICS_MULTIPROCESS_DIR: str = ""
+    METRICS_FLUSH_SECONDS: float = Field(default=5.0, gt=0)
+
     # Email Settings
     SMTP_TLS: bool = True
     SMTP_PORT: Optional[int] = None
@@ -46,6 +180,15 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(levelprefix)s | %(asctime)s | %(message)s"
     LOG_FILE: Path = Path("logs/todo-app.log")
+    LOG_ROTATION_BYTES: int = Field(default=10 * 1024 * 1024, ge=1)
+    LOG_RETENTION_DAYS: int = Field(default=7, ge=1)
+    # Sinks write from background threads and rotated files are zipped by a
+    # separate process, so log calls never wait on I/O or compression
+    LOG_ASYNC: bool = True
+    # One JSON object per line without colors, for log collectors in production
+    LOG_JSON: bool = False
+    # Share of DEBUG records kept, for debug logging under production load
+    LOG_DEBUG_SAMPLE_RATE: float = Field(default=1.0, ge=0, le=1)
 
     # Debug Mode
     DEBUG: bool = False
@@ -1,12 +1,38 @@
+import json
 import logging
+import os
+import queue
+import random
+import subprocess
 import sys
-from typing import Any
+import threading
+import time
+import traceback
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, TextIO
 from pathlib import Path
 from loguru import logger
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
 
 # Log file configuration
-LOG_FILE_PATH = Path("logs/todo-app.log")
-LOG_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
+LOG_FILE_PATH = settings.LOG_FILE
+
+TEXT_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+
+# Zips a rotated log file and removes the original, in its own process
+_COMPRESS_SCRIPT = (
+    "import os, sys, zipfile\n"
+    "path = sys.argv[1]\n"
+    "with zipfile.ZipFile(path + '.zip', 'w', zipfile.ZIP_DEFLATED) as archive:\n"
+    "    archive.write(path, os.path.basename(path))\n"
+    "os.remove(path)\n"
+)
 
 # Logging configuration
 class InterceptHandler(logging.Handler):
@@ -16,8 +42,9 @@ class InterceptHandler(logging.Handler):
         except ValueError:
             level = record.levelno
 
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
+        # Find the caller that logged the record, skipping logging's own frames
+        frame, depth = sys._getframe(1), 1
+        while frame is not None and frame.f_code.co_filename == logging.__file__:
             frame = frame.f_back
             depth += 1
 
@@ -25,35 +52,266 @@ class InterceptHandler(logging.Handler):
             level, record.getMessage()
         )
 
+
+class BackgroundSink(ABC):
+    """
+    Loguru sink that hands records to a writer thread, which renders them
+    with `render` and writes them in batches. A log call costs building the
+    record and a queue put; formatting and I/O happen off the request path.
+    Records arriving while the queue holds `max_pending` are dropped and
+    counted. Loguru calls `stop()` when the sink is removed, at the latest
+    on exit, which writes whatever is still queued.
+    """
+    def __init__(
+        self,
+        name: str,
+        render: Callable[[Dict[str, Any]], str],
+        max_pending: int = 100000,
+        batch_size: int = 1000
+    ):
+        self.render = render
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.errors = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def write(self, message: Any) -> None:
+        # Added with format=deferred_format, so the message is empty but carries its record
+        try:
+            self._queue.put_nowait(message.record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Optional[Dict[str, Any]]] = [self._queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = batch[-1] is None
+            records = batch[:-1] if stopping else batch
+            try:
+                if records:
+                    self._write("".join(map(self.render, records)))
+            except Exception as e:
+                self.errors += 1
+                # Not logged: the record would come back to this failing sink
+                print(f"Error writing log messages: {str(e)}", file=sys.stderr)
+            if stopping:
+                self._close()
+                return
+
+    @abstractmethod
+    def _write(self, text: str) -> None:
+        ...
+
+    def _close(self) -> None:
+        pass
+
+
+class BackgroundStreamSink(BackgroundSink):
+    """Writes to a stream such as stdout, flushing once per batch."""
+    def __init__(self, stream: TextIO, render: Callable[[Dict[str, Any]], str], **kwargs: Any):
+        self.stream = stream
+        super().__init__("log-stream-writer", render, **kwargs)
+
+    def _write(self, text: str) -> None:
+        self.stream.write(text)
+        self.stream.flush()
+
+
+class BackgroundFileSink(BackgroundSink):
+    """
+    Appends to `path`, rotating it once it reaches `rotation_bytes`. The
+    rotated file is zipped by a separate process and files older than
+    `retention` are deleted, so neither the request path nor the writer
+    thread waits for compression.
+    """
+    def __init__(
+        self,
+        path: Path,
+        render: Callable[[Dict[str, Any]], str],
+        rotation_bytes: int,
+        retention: timedelta,
+        **kwargs: Any
+    ):
+        self.path = path
+        self.rotation_bytes = rotation_bytes
+        self.retention = retention
+        self._compressors: List[subprocess.Popen] = []
+        self._open()
+        super().__init__("log-file-writer", render, **kwargs)
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+
+    def _write(self, text: str) -> None:
+        data = text.encode("utf-8", "backslashreplace")
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+        if self._size >= self.rotation_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        rotated = self.path.with_name(
+            f"{self.path.stem}.{datetime.now():%Y-%m-%d_%H-%M-%S_%f}{self.path.suffix}"
+        )
+        os.replace(self.path, rotated)
+        self._open()
+        # Reap finished compressors; a running one is never waited for
+        self._compressors = [process for process in self._compressors if process.poll() is None]
+        self._compressors.append(subprocess.Popen(
+            [sys.executable, "-c", _COMPRESS_SCRIPT, str(rotated)],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL
+        ))
+        self._purge()
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.retention.total_seconds()
+        for old in self.path.parent.glob(f"{self.path.stem}.*"):
+            try:
+                if old != self.path and old.stat().st_mtime < cutoff:
+                    old.unlink()
+            except OSError:
+                pass
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(entry, default=str).decode()
+    return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _exception_text(record: Dict[str, Any]) -> str:
+    if record["exception"] is None:
+        return ""
+    return "".join(traceback.format_exception(*record["exception"]))
+
+
+def render_text(record: Dict[str, Any]) -> str:
+    """A record as TEXT_FORMAT renders it, followed by any traceback."""
+    return (
+        f"{record['time'].strftime('%Y-%m-%d %H:%M:%S')} | {record['level'].name: <8} | "
+        f"{record['name']}:{record['function']}:{record['line']} - {record['message']}\n"
+        f"{_exception_text(record)}"
+    )
+
+
+def render_json(record: Dict[str, Any]) -> str:
+    """A record as one JSON object per line, e.g. for log collectors."""
+    extra = record["extra"]
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": extra.get("name", record["name"]),
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    context = {key: value for key, value in extra.items() if key != "name" and not key.startswith("_")}
+    if context:
+        entry["extra"] = context
+    if record["exception"] is not None:
+        entry["exception"] = _exception_text(record)
+    return _dumps(entry) + "\n"
+
+
+def json_format(record: Dict[str, Any]) -> str:
+    """Loguru format for render_json, for sinks loguru writes itself."""
+    record["extra"]["_json"] = render_json(record)
+    return "{extra[_json]}"
+
+
+def deferred_format(record: Dict[str, Any]) -> str:
+    # BackgroundSink renders the record on its writer thread instead
+    return ""
+
+
+def debug_sampler(rate: float) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Loguru filter keeping a `rate` share of records below INFO. The choice
+    is stored on the record, so every sink keeps or drops the same ones.
+    """
+    info = logger.level("INFO").no
+
+    def keep(record: Dict[str, Any]) -> bool:
+        if record["level"].no >= info:
+            return True
+        extra = record["extra"]
+        sampled = extra.get("_sampled")
+        if sampled is None:
+            sampled = extra["_sampled"] = random.random() < rate
+        return sampled
+
+    return keep
+
+
 def setup_logging(debug: bool = False) -> None:
-    """Configure logging for the application."""
-    # Remove default logger
+    """
+    Configure logging for the application.
+    Called by entry points rather than on import, so importing a module
+    never touches the filesystem or replaces another program's handlers.
+
+    With LOG_ASYNC, sinks write from background threads and rotated files
+    are compressed by a separate process. LOG_JSON writes JSON lines
+    without colors, for production.
+    """
+    LOG_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    level = "DEBUG" if debug else settings.LOG_LEVEL
+    log_format = json_format if settings.LOG_JSON else TEXT_FORMAT
+    render = render_json if settings.LOG_JSON else render_text
+    # Colors for a developer's terminal, which is written to directly
+    colorize = not settings.LOG_JSON and sys.stdout.isatty()
+    sampler = debug_sampler(settings.LOG_DEBUG_SAMPLE_RATE) if settings.LOG_DEBUG_SAMPLE_RATE < 1 else None
+    retention = timedelta(days=settings.LOG_RETENTION_DAYS)
+
+    # Remove default logger, and the sinks of an earlier call
     logger.remove()
 
     # Configure loguru
-    logger.add(
-        sys.stdout,
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-        level="DEBUG" if debug else "INFO",
-        colorize=True,
-    )
-    
+    if settings.LOG_ASYNC and not colorize:
+        logger.add(BackgroundStreamSink(sys.stdout, render), format=deferred_format, level=level, filter=sampler)
+    else:
+        logger.add(sys.stdout, format=log_format, level=level, colorize=colorize, filter=sampler)
+
     # Add file logging
-    logger.add(
-        LOG_FILE_PATH,
-        rotation="10 MB",
-        retention="1 week",
-        compression="zip",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-        level="INFO",
-    )
+    if settings.LOG_ASYNC:
+        logger.add(
+            BackgroundFileSink(LOG_FILE_PATH, render, settings.LOG_ROTATION_BYTES, retention),
+            format=deferred_format,
+            level=settings.LOG_LEVEL,
+            filter=sampler,
+        )
+    else:
+        logger.add(
+            LOG_FILE_PATH,
+            rotation=settings.LOG_ROTATION_BYTES,
+            retention=retention,
+            compression="zip",
+            format=log_format,
+            level=settings.LOG_LEVEL,
+            filter=sampler,
+        )
 
-    # Intercept standard library logging
-    logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
+    # Intercept standard library logging. Records below the level never
+    # reach InterceptHandler, which walks the stack for each one it gets.
+    logging.basicConfig(handlers=[InterceptHandler()], level=logger.level(level).no, force=True)
 
 def get_logger(name: str) -> Any:
     """Get a logger instance."""
     return logger.bind(name=name)
-
-# Initialize logging
-setup_logging()
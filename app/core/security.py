@@ -1,14 +1,12 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Any
+from typing import Callable, Optional, Any
 from jose import JWTError, jwt
-from dotenv import load_dotenv
-import os
 from fastapi.security import OAuth2PasswordBearer
 import bcrypt
 from app.core.config import settings
 
-load_dotenv()
-
 # Security configuration
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
@@ -22,11 +20,80 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         hashed_password.encode('utf-8')
     )
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     """Generate password hash."""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Check if a hash was made with a different cost than BCRYPT_ROUNDS."""
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.BCRYPT_ROUNDS
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the password hashing pool has too many pending jobs"""
+    pass
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded worker pool so hashing never blocks the event loop.
+    Jobs beyond `max_pending` (running + queued) are rejected with
+    `PasswordHasherBusyError` instead of piling up behind the pool.
+    """
+    def __init__(self, executor_type: str, workers: int, max_pending: int):
+        self.executor_type = executor_type
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        # Only touched from the event loop thread, so a plain counter is enough
+        if self._pending >= self.max_pending:
+            raise PasswordHasherBusyError("Password hashing pool is saturated")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against a hash off the event loop."""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Generate a password hash off the event loop."""
+        return await self._run(get_password_hash, password, settings.BCRYPT_ROUNDS)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
 def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
@@ -1,7 +1,8 @@
 from app.crud.user import user
-from app.crud.category import create_category
+from app.crud.category import create_category, get_category_by_name
 
 __all__ = [
     "user",
-    "create_category"
+    "create_category",
+    "get_category_by_name"
 ]
@@ -1,6 +1,8 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
-from fastapi.encoders import jsonable_encoder
+from functools import cached_property
+from typing import Any, Dict, FrozenSet, Generic, List, Optional, Type, TypeVar, Union
 from pydantic import BaseModel
+from sqlalchemy import delete, func, insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.db import Base  # Updated import
 from app.core.logging import get_logger
@@ -11,6 +13,36 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Writes use RETURNING so the row comes back with the statement itself,
+# instead of a commit followed by a refresh SELECT.
+def _insert_returning(model: Type[ModelType], data: Dict[str, Any]):
+    return insert(model).values(**data).returning(model)
+
+def _update_returning(model: Type[ModelType], id: Any, data: Dict[str, Any]):
+    return (
+        update(model)
+        .where(model.id == id)
+        .values(**data)
+        .returning(model)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+
+def _update_values(
+    columns: FrozenSet[str],
+    obj_in: Union[BaseModel, Dict[str, Any]]
+) -> Dict[str, Any]:
+    """The fields of `obj_in` that are model columns; unset schema fields are left out."""
+    update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+    return {field: value for field, value in update_data.items() if field in columns}
+
+def _delete_returning(model: Type[ModelType], id: Any):
+    return (
+        delete(model)
+        .where(model.id == id)
+        .returning(model)
+        .execution_options(synchronize_session=False)
+    )
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -21,6 +53,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
+    @cached_property
+    def _columns(self) -> FrozenSet[str]:
+        # Resolved on first use, once every model is mapped
+        return frozenset(inspect(self.model).column_attrs.keys())
+
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         """Get a record by ID."""
         return db.query(self.model).filter(self.model.id == id).first()
@@ -33,12 +70,10 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """Create a new record."""
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)
+        obj_in_data = obj_in.model_dump()
         try:
-            db.add(db_obj)
+            db_obj = db.scalars(_insert_returning(self.model, obj_in_data)).one()
             db.commit()
-            db.refresh(db_obj)
         except Exception as e:
             db.rollback()
             logger.error(f"Error creating {self.model.__name__}: {str(e)}")
@@ -53,30 +88,22 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
         """Update a record."""
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        values = _update_values(self._columns, obj_in)
+        if not values:
+            return db_obj
         try:
-            db.add(db_obj)
+            db_obj = db.scalars(_update_returning(self.model, db_obj.id, values)).one()
             db.commit()
-            db.refresh(db_obj)
         except Exception as e:
             db.rollback()
             logger.error(f"Error updating {self.model.__name__}: {str(e)}")
             raise
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
+    def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
         """Delete a record."""
-        obj = db.query(self.model).get(id)
         try:
-            db.delete(obj)
+            obj = db.scalars(_delete_returning(self.model, id)).first()
             db.commit()
         except Exception as e:
             db.rollback()
@@ -99,3 +126,93 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return db.query(self.model).filter(
             getattr(self.model, attr_name) == attr_value
         ).first()
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        Async CRUD object with the same default methods as `CRUDBase`,
+        working against an `AsyncSession`.
+        **Parameters**
+        * `model`: A SQLAlchemy model class
+        """
+        self.model = model
+
+    @cached_property
+    def _columns(self) -> FrozenSet[str]:
+        # Resolved on first use, once every model is mapped
+        return frozenset(inspect(self.model).column_attrs.keys())
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """Get a record by ID."""
+        result = await db.execute(select(self.model).where(self.model.id == id))
+        return result.scalars().first()
+
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        """Get multiple records with pagination."""
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """Create a new record."""
+        obj_in_data = obj_in.model_dump()
+        try:
+            db_obj = (await db.scalars(_insert_returning(self.model, obj_in_data))).one()
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error creating {self.model.__name__}: {str(e)}")
+            raise
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """Update a record."""
+        values = _update_values(self._columns, obj_in)
+        if not values:
+            return db_obj
+        try:
+            db_obj = (await db.scalars(_update_returning(self.model, db_obj.id, values))).one()
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error updating {self.model.__name__}: {str(e)}")
+            raise
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        """Delete a record."""
+        try:
+            obj = (await db.scalars(_delete_returning(self.model, id))).first()
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error deleting {self.model.__name__}: {str(e)}")
+            raise
+        return obj
+
+    async def exists(self, db: AsyncSession, id: Any) -> bool:
+        """Check if a record exists."""
+        result = await db.execute(select(self.model.id).where(self.model.id == id))
+        return result.first() is not None
+
+    async def count(self, db: AsyncSession) -> int:
+        """Get total count of records."""
+        result = await db.execute(select(func.count()).select_from(self.model))
+        return result.scalar_one()
+
+    async def get_by_attribute(
+        self, db: AsyncSession, attr_name: str, attr_value: Any
+    ) -> Optional[ModelType]:
+        """Get a record by any attribute."""
+        result = await db.execute(
+            select(self.model).where(getattr(self.model, attr_name) == attr_value)
+        )
+        return result.scalars().first()
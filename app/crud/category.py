@@ -1,93 +1,198 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Set
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.base import utcnow
 from app.models.category import Category
+from app.models.task import Task
 from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.services.activity import CATEGORY, CREATED, DELETED, TASK, UPDATED, activity_log
+from app.services.cache import CATEGORIES, TASKS, response_cache
+from app.services.events import event_broker
+from app.services.stats import move_category_to_none
+from app.services.sync import next_change_seq, tombstone_values
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
-def create_category(db: Session, category: CategoryCreate, user_id: int) -> Category:
+# Fields kept in the activity log
+ACTIVITY_FIELDS = ("name", "color", "description")
+
+async def create_category(db: AsyncSession, category: CategoryCreate, user_id: int) -> Category:
     """Create a new category."""
-    db_category = Category(
-        **category.dict(),
-        owner_id=user_id
+    stmt = (
+        insert(Category)
+        .values(**category.model_dump(), owner_id=user_id, change_seq=next_change_seq(user_id))
+        .returning(Category)
     )
-    db.add(db_category)
     try:
-        db.commit()
-        db.refresh(db_category)
+        db_category = (await db.scalars(stmt)).one()
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating category: {str(e)}")
         raise
+    await response_cache.invalidate(user_id, CATEGORIES)
+    await activity_log.created(CATEGORY, user_id, [db_category], ACTIVITY_FIELDS)
+    event_broker.publish(user_id, CATEGORY, CREATED, [db_category.id])
     return db_category
 
-def get_category(db: Session, category_id: int, user_id: int) -> Optional[Category]:
+async def get_category(db: AsyncSession, category_id: int, user_id: int) -> Optional[Category]:
     """Get a category by ID and owner."""
-    return db.query(Category).filter(
-        Category.id == category_id,
-        Category.owner_id == user_id
-    ).first()
+    result = await db.execute(
+        select(Category).where(
+            Category.id == category_id,
+            Category.owner_id == user_id,
+            Category.deleted_at.is_(None)
+        )
+    )
+    return result.scalars().first()
 
-def get_categories(
-    db: Session,
+async def get_categories(
+    db: AsyncSession,
     user_id: int,
     skip: int = 0,
     limit: int = 100
 ) -> List[Category]:
     """Get list of categories for a user."""
-    return db.query(Category)\
-        .filter(Category.owner_id == user_id)\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    result = await db.execute(
+        select(Category)
+        .where(Category.owner_id == user_id, Category.deleted_at.is_(None))
+        .order_by(Category.name)
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
 
-def update_category(
-    db: Session,
+async def update_category(
+    db: AsyncSession,
     category_id: int,
     category: CategoryUpdate,
     user_id: int
 ) -> Optional[Category]:
-    """Update category details."""
-    db_category = get_category(db, category_id, user_id)
-    if not db_category:
-        return None
-    
-    update_data = category.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_category, field, value)
-    
+    """Update category details with a single UPDATE ... RETURNING."""
+    update_data = category.model_dump(exclude_unset=True) or {"updated_at": utcnow()}
+    stmt = (
+        update(Category)
+        .where(Category.id == category_id, Category.owner_id == user_id, Category.deleted_at.is_(None))
+        .values(**update_data, change_seq=next_change_seq(user_id))
+        .returning(Category)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    previous = None
+    if activity_log.enabled:
+        # Old values for the activity log, returned by the same UPDATE
+        columns = Category.__table__.c
+        previous = (
+            select(columns.id, *[columns[name] for name in ACTIVITY_FIELDS])
+            .where(columns.id == category_id, columns.owner_id == user_id, columns.deleted_at.is_(None))
+            .with_for_update()
+            .subquery("previous")
+        )
+        stmt = stmt.where(Category.id == previous.c.id).returning(*previous.c)
+
     try:
-        db.commit()
-        db.refresh(db_category)
+        row = (await db.execute(stmt)).first()
+        db_category = row[0] if row else None
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating category: {str(e)}")
         raise
+    if db_category is not None:
+        await response_cache.invalidate(user_id, CATEGORIES)
+        if previous is not None:
+            await activity_log.updated(CATEGORY, user_id, [(row, db_category)], ACTIVITY_FIELDS)
+        event_broker.publish(user_id, CATEGORY, UPDATED, [db_category.id])
     return db_category
 
-def delete_category(db: Session, category_id: int, user_id: int) -> bool:
-    """Delete a category."""
-    db_category = get_category(db, category_id, user_id)
-    if not db_category:
-        return False
-    
+async def delete_category(db: AsyncSession, category_id: int, user_id: int) -> bool:
+    """
+    Delete a category, leaving a tombstone for sync clients.
+    Its tasks are left uncategorized and count as changed.
+    """
+    stmt = (
+        update(Category)
+        .where(Category.id == category_id, Category.owner_id == user_id, Category.deleted_at.is_(None))
+        .values(**tombstone_values(user_id))
+        .returning(Category.id, *[Category.__table__.c[name] for name in ACTIVITY_FIELDS])
+        .execution_options(synchronize_session=False)
+    )
     try:
-        db.delete(db_category)
-        db.commit()
+        deleted = (await db.execute(stmt)).first()
+        if deleted is not None:
+            # The tombstone keeps the row, so the FK no longer clears category_id
+            uncategorized = (await db.scalars(
+                update(Task)
+                .where(Task.owner_id == user_id, Task.category_id == category_id, Task.deleted_at.is_(None))
+                .values(category_id=None, updated_at=utcnow(), change_seq=next_change_seq(user_id))
+                .returning(Task.id)
+                .execution_options(synchronize_session=False)
+            )).all()
+            await move_category_to_none(db, user_id, category_id)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting category: {str(e)}")
         raise
-    return True
+    if deleted is not None:
+        # Deleting a category also uncategorizes its tasks
+        await response_cache.invalidate(user_id, CATEGORIES, TASKS)
+        await activity_log.deleted(CATEGORY, user_id, [deleted], ACTIVITY_FIELDS)
+        event_broker.publish(user_id, CATEGORY, DELETED, [deleted.id])
+        if uncategorized:
+            # Logged like any other task update, as {field: [old, new]}
+            for task_id in uncategorized:
+                await activity_log.record(user_id, TASK, task_id, UPDATED, {"category_id": [category_id, None]})
+            event_broker.publish(user_id, TASK, UPDATED, uncategorized)
+    return deleted is not None
 
-def get_category_by_name(
-    db: Session,
+async def get_category_by_name(
+    db: AsyncSession,
     name: str,
     user_id: int
 ) -> Optional[Category]:
-    """Get a category by name and owner."""
-    return db.query(Category).filter(
-        Category.name == name,
-        Category.owner_id == user_id
-    ).first()
+    """Get a category by name and owner (uses the owner/name unique index)."""
+    result = await db.execute(
+        select(Category).where(
+            Category.name == name,
+            Category.owner_id == user_id,
+            Category.deleted_at.is_(None)
+        )
+    )
+    return result.scalars().first()
+
+def category_owned_by(category_id: int, user_id: int):
+    """
+    EXISTS clause checking a category belongs to a user, for use inside writes.
+    The row is share locked so it cannot be deleted before the write commits.
+    """
+    return select(Category.id).where(
+        Category.id == category_id,
+        Category.owner_id == user_id,
+        Category.deleted_at.is_(None)
+    ).with_for_update(read=True).exists()
+
+async def get_owned_category_ids(
+    db: AsyncSession,
+    category_ids: Iterable[int],
+    user_id: int
+) -> Set[int]:
+    """
+    Return the subset of `category_ids` owned by the user.
+    The rows are share locked so they cannot be deleted before the
+    surrounding transaction writes tasks that reference them. (A delete is
+    an UPDATE of deleted_at, which KEY SHARE would not block.)
+    """
+    category_ids = set(category_ids)
+    if not category_ids:
+        return set()
+    result = await db.execute(
+        select(Category.id)
+        .where(
+            Category.id.in_(category_ids),
+            Category.owner_id == user_id,
+            Category.deleted_at.is_(None)
+        )
+        .with_for_update(read=True)
+    )
+    return set(result.scalars().all())
@@ -1,105 +1,526 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from datetime import datetime
-from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskUpdate
+from datetime import timezone
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text, any_, bindparam, case, cast, column, func, insert, literal, literal_column, or_, select, text, tuple_, update, values
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.category import category_owned_by, get_owned_category_ids
+from app.models.base import utcnow
+from app.models.change_counter import ChangeCounter
+from app.models.task import SEARCH_CONFIG, Task
+from app.schemas.task import TaskBulkStatus, TaskBulkUpdateItem, TaskCreate, TaskSortField, TaskUpdate
+from app.services.activity import CREATED, DELETED, TASK, UPDATED, activity_log
+from app.services.cache import TASKS, response_cache
+from app.services.events import MAX_IDS_PER_EVENT, event_broker
+from app.services.stats import STATS_COLUMNS, rebuild_task_stats, record_task_changes
+from app.services.sync import next_change_seq, tombstone_values
+from app.core.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
-def create_task(db: Session, task: TaskCreate, user_id: int) -> Task:
-    """Create a new task."""
-    db_task = Task(
-        **task.dict(),
-        owner_id=user_id,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
+# Fields whose change moves a task between stats counters
+STATS_FIELDS = frozenset(STATS_COLUMNS)
+# Fields kept in the activity log; includes every stats column
+ACTIVITY_FIELDS = ("title", "description", "priority", "status", "due_date", "category_id", "completed", "completed_at")
+
+# Session-private staging table for imports, dropped when the transaction ends
+IMPORT_COLUMNS = ("title", "description", "priority", "status", "due_date", "category_id")
+_import_staging = Table(
+    "task_import",
+    MetaData(),
+    Column("title", String(255), nullable=False),
+    Column("description", Text),
+    Column("priority", String(20), nullable=False),
+    Column("status", String(20), nullable=False),
+    Column("due_date", DateTime),
+    Column("category_id", Integer),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+def _returning_task(stmt):
+    """Return the updated row with the statement instead of a refresh SELECT."""
+    return stmt.returning(Task).execution_options(
+        synchronize_session=False, populate_existing=True
+    )
+
+def _previous_state(*criteria):
+    """
+    Locked snapshot of the tracked columns of the rows an UPDATE changes.
+    Joined into the UPDATE and returned with it, so the stats delta and the
+    activity log diff need no extra SELECT.
+    """
+    return (
+        select(Task.__table__.c.id, *_tracked_columns())
+        .where(Task.deleted_at.is_(None), *criteria)
+        .with_for_update()
+        .subquery("previous")
+    )
+
+def _tracked_columns():
+    return [Task.__table__.c[name] for name in ACTIVITY_FIELDS]
+
+def _needs_previous(fields) -> bool:
+    return activity_log.enabled or not STATS_FIELDS.isdisjoint(fields)
+
+async def create_task(db: AsyncSession, task: TaskCreate, user_id: int) -> Optional[Task]:
+    """
+    Create a new task.
+    The category ownership check runs inside the INSERT, so the task is only
+    written (and returned) if `category_id` is one of the user's categories.
+    """
+    values = {**task.model_dump(), "owner_id": user_id}
+    columns = Task.__table__.c
+    source = select(
+        *[literal(value, columns[name].type) for name, value in values.items()],
+        next_change_seq(user_id)
     )
-    db.add(db_task)
+    if task.category_id is not None:
+        source = source.where(category_owned_by(task.category_id, user_id))
+    stmt = insert(Task).from_select([*values, "change_seq"], source).returning(Task)
     try:
-        db.commit()
-        db.refresh(db_task)
+        db_task = (await db.scalars(stmt)).first()
+        if db_task is not None:
+            await record_task_changes(db, user_id, after=[db_task])
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating task: {str(e)}")
         raise
+    if db_task is not None:
+        await response_cache.invalidate(user_id, TASKS)
+        await activity_log.created(TASK, user_id, [db_task], ACTIVITY_FIELDS)
+        event_broker.publish(user_id, TASK, CREATED, [db_task.id])
     return db_task
 
-def get_task(db: Session, task_id: int, user_id: int) -> Optional[Task]:
+async def get_task(db: AsyncSession, task_id: int, user_id: int) -> Optional[Task]:
     """Get a task by ID and owner."""
-    return db.query(Task).filter(
-        Task.id == task_id,
-        Task.owner_id == user_id
-    ).first()
+    result = await db.execute(
+        select(Task).where(
+            Task.id == task_id,
+            Task.owner_id == user_id,
+            Task.deleted_at.is_(None)
+        )
+    )
+    return result.scalars().first()
 
-def get_tasks(
-    db: Session,
+async def get_tasks(
+    db: AsyncSession,
     user_id: int,
-    skip: int = 0,
     limit: int = 100,
     category_id: Optional[int] = None,
-    completed: Optional[bool] = None
+    completed: Optional[bool] = None,
+    order_by: TaskSortField = TaskSortField.ID,
+    after: Optional[Sequence[Any]] = None
 ) -> List[Task]:
-    """Get list of tasks with optional filters."""
-    query = db.query(Task).filter(Task.owner_id == user_id)
+    """
+    Get list of tasks with optional filters, using keyset pagination.
+    `after` is the sort key of the last task of the previous page:
+    `(id,)` when ordering by id, `(due_date, id)` when ordering by due date.
+    """
+    query = select(Task).where(Task.owner_id == user_id, Task.deleted_at.is_(None))
     
     if category_id is not None:
-        query = query.filter(Task.category_id == category_id)
+        query = query.where(Task.category_id == category_id)
     if completed is not None:
-        query = query.filter(Task.completed == completed)
+        query = query.where(Task.completed == completed)
+
+    if order_by == TaskSortField.DUE_DATE:
+        if after is not None:
+            due_date, task_id = after
+            if due_date is None:
+                # Tasks without a due date sort last, by id
+                query = query.where(Task.due_date.is_(None), Task.id > task_id)
+            else:
+                query = query.where(or_(
+                    tuple_(Task.due_date, Task.id) > tuple_(due_date, task_id),
+                    Task.due_date.is_(None)
+                ))
+        query = query.order_by(Task.due_date.asc().nulls_last(), Task.id.asc())
+    else:
+        if after is not None:
+            query = query.where(Task.id > after[0])
+        query = query.order_by(Task.id.asc())
         
-    return query.offset(skip).limit(limit).all()
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
 
-def update_task(db: Session, task_id: int, task: TaskUpdate, user_id: int) -> Optional[Task]:
-    """Update task details."""
-    db_task = get_task(db, task_id, user_id)
-    if not db_task:
-        return None
-    
-    update_data = task.dict(exclude_unset=True)
-    update_data["updated_at"] = datetime.utcnow()
-    
-    for field, value in update_data.items():
-        setattr(db_task, field, value)
+async def search_tasks(
+    db: AsyncSession,
+    user_id: int,
+    q: str,
+    limit: int = 50,
+    after: Optional[Sequence[Any]] = None
+) -> List[Tuple[Task, float]]:
+    """
+    Search a user's tasks by title and description, best match first.
+    Full-text matches come from the search vector; trigram word similarity
+    on the title also matches prefixes and typos. Both conditions lead with
+    owner_id so they use the per-owner GIN indexes.
+    `after` is the `(rank, id)` of the last hit of the previous page.
+    """
+    tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), q)
+    # Normalization 32 scales ts_rank_cd into [0, 1) like word_similarity
+    rank = func.greatest(
+        func.ts_rank_cd(Task.search_vector, tsquery, 32),
+        func.word_similarity(q, Task.title)
+    )
+    query = select(Task, rank.label("rank")).where(
+        Task.owner_id == user_id,
+        Task.deleted_at.is_(None),
+        or_(Task.search_vector.op("@@")(tsquery), literal(q).op("<%")(Task.title))
+    )
+    if after is not None:
+        query = query.where(tuple_(rank, Task.id) < tuple_(*after))
+    result = await db.execute(query.order_by(rank.desc(), Task.id.desc()).limit(limit))
+    return [(task, task_rank) for task, task_rank in result.all()]
+
+async def update_task(db: AsyncSession, task_id: int, task: TaskUpdate, user_id: int) -> Optional[Task]:
+    """
+    Update task details with a single UPDATE ... RETURNING.
+    Returns None if the task is not the user's, or if a new `category_id`
+    is not one of the user's categories.
+    """
+    update_data = task.model_dump(exclude_unset=True)
+    stmt = (
+        update(Task)
+        .where(Task.id == task_id, Task.owner_id == user_id, Task.deleted_at.is_(None))
+        .values(change_seq=next_change_seq(user_id))
+    )
+    if task.category_id is not None:
+        stmt = stmt.where(category_owned_by(task.category_id, user_id))
+    if update_data:
+        stmt = stmt.values(**update_data)
+    else:
+        stmt = stmt.values(updated_at=utcnow())
+    stmt = _returning_task(stmt)
+    # Without the activity log, edits that leave the stats columns alone skip the bookkeeping
+    previous = None
+    if _needs_previous(update_data):
+        previous = _previous_state(Task.id == task_id, Task.owner_id == user_id)
+        stmt = stmt.where(Task.id == previous.c.id).returning(*previous.c)
     
     try:
-        db.commit()
-        db.refresh(db_task)
+        row = (await db.execute(stmt)).first()
+        db_task = row[0] if row else None
+        if row and previous is not None:
+            await record_task_changes(db, user_id, before=[row], after=[db_task])
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating task: {str(e)}")
         raise
+    if db_task is not None:
+        await response_cache.invalidate(user_id, TASKS)
+        if previous is not None:
+            await activity_log.updated(TASK, user_id, [(row, db_task)], ACTIVITY_FIELDS)
+        event_broker.publish(user_id, TASK, UPDATED, [db_task.id])
     return db_task
 
-def delete_task(db: Session, task_id: int, user_id: int) -> bool:
-    """Delete a task."""
-    db_task = get_task(db, task_id, user_id)
-    if not db_task:
-        return False
-    
+async def delete_task(db: AsyncSession, task_id: int, user_id: int) -> bool:
+    """Delete a task, leaving a tombstone for sync clients."""
+    stmt = (
+        update(Task)
+        .where(Task.id == task_id, Task.owner_id == user_id, Task.deleted_at.is_(None))
+        .values(**tombstone_values(user_id))
+        .returning(Task.id, *_tracked_columns())
+        .execution_options(synchronize_session=False)
+    )
     try:
-        db.delete(db_task)
-        db.commit()
+        deleted = (await db.execute(stmt)).first()
+        if deleted is not None:
+            await record_task_changes(db, user_id, before=[deleted])
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting task: {str(e)}")
         raise
-    return True
+    if deleted is not None:
+        await response_cache.invalidate(user_id, TASKS)
+        await activity_log.deleted(TASK, user_id, [deleted], ACTIVITY_FIELDS)
+        event_broker.publish(user_id, TASK, DELETED, [deleted.id])
+    return deleted is not None
 
-def toggle_task_completion(db: Session, task_id: int, user_id: int) -> Optional[Task]:
-    """Toggle task completion status."""
-    db_task = get_task(db, task_id, user_id)
-    if not db_task:
-        return None
-    
-    db_task.completed = not db_task.completed
-    db_task.updated_at = datetime.utcnow()
-    
+async def toggle_task_completion(db: AsyncSession, task_id: int, user_id: int) -> Optional[Task]:
+    """Toggle task completion status in one UPDATE ... SET completed = NOT completed."""
+    previous = _previous_state(Task.id == task_id, Task.owner_id == user_id)
+    # IS NOT TRUE also flips rows where completed was never set
+    now_completed = Task.completed.is_not(True)
+    stmt = (
+        update(Task)
+        .where(Task.id == previous.c.id)
+        .values(
+            completed=now_completed,
+            completed_at=case((now_completed, utcnow()), else_=None),
+            change_seq=next_change_seq(user_id)
+        )
+    )
     try:
-        db.commit()
-        db.refresh(db_task)
+        row = (await db.execute(_returning_task(stmt).returning(*previous.c))).first()
+        db_task = row[0] if row else None
+        if row:
+            await record_task_changes(db, user_id, before=[row], after=[db_task])
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error toggling task completion: {str(e)}")
         raise
+    if db_task is not None:
+        await response_cache.invalidate(user_id, TASKS)
+        await activity_log.updated(TASK, user_id, [(row, db_task)], ACTIVITY_FIELDS)
+        event_broker.publish(user_id, TASK, UPDATED, [db_task.id])
     return db_task
+
+BulkResult = Tuple[TaskBulkStatus, Optional[Task]]
+
+async def bulk_create_tasks(
+    db: AsyncSession,
+    tasks: Sequence[TaskCreate],
+    user_id: int
+) -> List[BulkResult]:
+    """
+    Create several tasks with one multi-row INSERT ... RETURNING.
+    Results are aligned with `tasks`; items pointing at a category the
+    user does not own are skipped.
+    """
+    owned = await get_owned_category_ids(
+        db, (t.category_id for t in tasks if t.category_id is not None), user_id
+    )
+    results: List[BulkResult] = [(TaskBulkStatus.CATEGORY_NOT_FOUND, None)] * len(tasks)
+    rows, positions = [], []
+    for index, task in enumerate(tasks):
+        if task.category_id is not None and task.category_id not in owned:
+            continue
+        rows.append({**task.model_dump(), "owner_id": user_id})
+        positions.append(index)
+
+    created: Sequence[Task] = []
+    try:
+        if rows:
+            # One statement, so every row gets the same change_seq
+            stmt = (
+                insert(Task)
+                .values(change_seq=next_change_seq(user_id))
+                .returning(Task, sort_by_parameter_order=True)
+            )
+            created = (await db.scalars(stmt, rows)).all()
+            for index, db_task in zip(positions, created):
+                results[index] = (TaskBulkStatus.CREATED, db_task)
+            await record_task_changes(db, user_id, after=created)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error bulk creating tasks: {str(e)}")
+        raise
+    if rows:
+        await response_cache.invalidate(user_id, TASKS)
+        await activity_log.created(TASK, user_id, created, ACTIVITY_FIELDS)
+        event_broker.publish(user_id, TASK, CREATED, [db_task.id for db_task in created])
+    return results
+
+async def _update_from_values(
+    db: AsyncSession,
+    items: Sequence[TaskBulkUpdateItem],
+    fields: Sequence[str],
+    user_id: int
+) -> List[Tuple[Any, Task]]:
+    """
+    UPDATE tasks SET ... FROM (VALUES ...) for items changing the same fields.
+    Returns (previous row, task) pairs; the previous row is None when no
+    bookkeeping needs it. Stats counters are updated in the same transaction.
+    """
+    columns = Task.__table__.c
+    source = values(
+        column("id", Integer),
+        *[column(field, columns[field].type) for field in fields],
+        name="v"
+    ).data([(item.id, *[getattr(item, field) for field in fields]) for item in items])
+    stmt = (
+        update(Task)
+        .where(Task.id == source.c.id, Task.owner_id == user_id, Task.deleted_at.is_(None))
+        # Cast back to the column type: an all-NULL VALUES column is typed as text
+        .values(
+            updated_at=utcnow(),
+            change_seq=next_change_seq(user_id),
+            **{field: cast(source.c[field], columns[field].type) for field in fields}
+        )
+    )
+    stmt = _returning_task(stmt)
+    if not _needs_previous(fields):
+        return [(None, db_task) for db_task in (await db.scalars(stmt)).all()]
+
+    previous = _previous_state(Task.id.in_([item.id for item in items]), Task.owner_id == user_id)
+    stmt = stmt.where(Task.id == previous.c.id).returning(*previous.c)
+    rows = (await db.execute(stmt)).all()
+    await record_task_changes(db, user_id, before=rows, after=[row[0] for row in rows])
+    return [(row, row[0]) for row in rows]
+
+async def bulk_update_tasks(
+    db: AsyncSession,
+    items: Sequence[TaskBulkUpdateItem],
+    user_id: int
+) -> List[BulkResult]:
+    """
+    Update several tasks in one transaction.
+    Items are grouped by the set of fields they change and each group is
+    one UPDATE ... FROM (VALUES ...) RETURNING statement.
+    """
+    owned = await get_owned_category_ids(
+        db, (i.category_id for i in items if i.category_id is not None), user_id
+    )
+    results: List[Optional[BulkResult]] = [None] * len(items)
+    groups: Dict[Tuple[str, ...], List[TaskBulkUpdateItem]] = {}
+    for index, item in enumerate(items):
+        if item.category_id is not None and item.category_id not in owned:
+            results[index] = (TaskBulkStatus.CATEGORY_NOT_FOUND, None)
+            continue
+        fields = tuple(sorted(item.model_dump(exclude_unset=True, exclude={"id"})))
+        groups.setdefault(fields, []).append(item)
+
+    updated: Dict[int, Task] = {}
+    changes: List[Tuple[Any, Task]] = []
+    try:
+        for fields, group in groups.items():
+            for before, db_task in await _update_from_values(db, group, fields, user_id):
+                updated[db_task.id] = db_task
+                if before is not None:
+                    changes.append((before, db_task))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error bulk updating tasks: {str(e)}")
+        raise
+    if updated:
+        await response_cache.invalidate(user_id, TASKS)
+        await activity_log.updated(TASK, user_id, changes, ACTIVITY_FIELDS)
+        event_broker.publish(user_id, TASK, UPDATED, list(updated))
+
+    for index, item in enumerate(items):
+        if results[index] is None:
+            db_task = updated.get(item.id)
+            status = TaskBulkStatus.UPDATED if db_task else TaskBulkStatus.NOT_FOUND
+            results[index] = (status, db_task)
+    return results
+
+async def bulk_delete_tasks(db: AsyncSession, task_ids: Sequence[int], user_id: int) -> Set[int]:
+    """Tombstone several tasks with one UPDATE ... WHERE id = ANY(...); returns deleted ids."""
+    stmt = (
+        update(Task)
+        .where(
+            Task.owner_id == user_id,
+            Task.id == any_(bindparam("task_ids", list(task_ids), type_=ARRAY(Integer))),
+            Task.deleted_at.is_(None)
+        )
+        .values(**tombstone_values(user_id))
+        .returning(Task.id, *_tracked_columns())
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        rows = (await db.execute(stmt)).all()
+        await record_task_changes(db, user_id, before=rows)
+        deleted = {row.id for row in rows}
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error bulk deleting tasks: {str(e)}")
+        raise
+    if deleted:
+        await response_cache.invalidate(user_id, TASKS)
+        await activity_log.deleted(TASK, user_id, rows, ACTIVITY_FIELDS)
+        event_broker.publish(user_id, TASK, DELETED, [row.id for row in rows])
+    return deleted
+
+async def stream_tasks(db: AsyncSession, user_id: int, batch_size: int) -> AsyncIterator[Sequence[Task]]:
+    """
+    Yield all of a user's tasks in id order, `batch_size` rows at a time,
+    from a server-side cursor: memory stays flat however many tasks there are.
+    The rows of one batch are released once the next one is fetched.
+    """
+    result = await db.stream_scalars(
+        select(Task)
+        .where(Task.owner_id == user_id, Task.deleted_at.is_(None))
+        .order_by(Task.id)
+        .execution_options(yield_per=batch_size)
+    )
+    try:
+        async for batch in result.partitions():
+            yield batch
+    finally:
+        await result.close()
+
+def _import_record(task: TaskCreate) -> Tuple[Any, ...]:
+    due_date = task.due_date
+    if due_date is not None and due_date.tzinfo is not None:
+        due_date = due_date.astimezone(timezone.utc).replace(tzinfo=None)
+    return (task.title, task.description, task.priority.value, task.status.value, due_date, task.category_id)
+
+async def import_tasks(
+    db: AsyncSession,
+    chunks: AsyncIterable[Sequence[TaskCreate]],
+    user_id: int
+) -> int:
+    """
+    Create a user's tasks from chunks of validated rows; returns how many.
+
+    Each chunk is sent with COPY into a temporary staging table, then one
+    INSERT ... SELECT moves them all into tasks, so a million rows take a
+    few statements and only one chunk is in memory at a time. Rows
+    pointing at a category the user does not own are skipped; check
+    categories while producing the chunks to report them.
+
+    Everything commits together. Imported tasks share one change_seq, the
+    stats counters are rebuilt for the user, and change events are sent
+    for the new ids; the activity log does not record imported tasks.
+    """
+    staging = _import_staging.c
+    try:
+        connection = await db.connection()
+        await db.execute(text(f"SET LOCAL statement_timeout = {settings.TASK_IMPORT_STATEMENT_TIMEOUT_MS}"))
+        await connection.run_sync(_import_staging.create)
+        # COPY goes through the asyncpg connection, in the session's transaction
+        copier = (await connection.get_raw_connection()).driver_connection
+        staged = 0
+        async for chunk in chunks:
+            if chunk:
+                await copier.copy_records_to_table(
+                    _import_staging.name,
+                    records=[_import_record(task) for task in chunk],
+                    columns=IMPORT_COLUMNS
+                )
+                staged += len(chunk)
+        if not staged:
+            await db.rollback()
+            return 0
+        source = select(
+            *[staging[name] for name in IMPORT_COLUMNS],
+            literal(user_id, Integer),
+            next_change_seq(user_id)
+        ).where(or_(
+            staging.category_id.is_(None),
+            category_owned_by(staging.category_id, user_id)
+        ))
+        result = await db.execute(
+            insert(Task).from_select([*IMPORT_COLUMNS, "owner_id", "change_seq"], source)
+        )
+        imported = result.rowcount
+        if imported:
+            seq = await db.scalar(select(ChangeCounter.seq).where(ChangeCounter.owner_id == user_id))
+            await rebuild_task_stats(db, [user_id])
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error importing tasks: {str(e)}")
+        raise
+    if imported:
+        await response_cache.invalidate(user_id, TASKS)
+        if event_broker.enabled:
+            # The ids were never loaded; read them back an event's worth at a time
+            ids = await db.stream_scalars(
+                select(Task.id)
+                .where(Task.owner_id == user_id, Task.change_seq == seq)
+                .execution_options(yield_per=MAX_IDS_PER_EVENT)
+            )
+            async for batch in ids.partitions():
+                event_broker.publish(user_id, TASK, CREATED, batch)
+        logger.info(f"Imported {imported} tasks for user {user_id}")
+    return imported
@@ -1,59 +1,123 @@
-from typing import Optional, List
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import insert, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
 from jose import jwt
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.security import PasswordHasherBusyError, needs_rehash, password_hasher
+from app.models.category import Category
+from app.models.task import Task
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.logging import get_logger
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase
 
 logger = get_logger(__name__)
 
-class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
-    def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        return db.query(User).filter(User.email == email).first()
+# Collections ?include= can embed, with the order items are capped in
+USER_COLLECTIONS: Dict[str, Tuple[type, tuple]] = {
+    "tasks": (Task, (Task.id,)),
+    "categories": (Category, (Category.name, Category.id)),
+}
 
-    def get_by_username(self, db: Session, *, username: str) -> Optional[User]:
-        return db.query(User).filter(User.username == username).first()
+class CRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
 
-    def authenticate(self, db: Session, *, username: str, password: str) -> Optional[User]:
-        user = self.get_by_username(db, username=username)
+    async def get_by_username(self, db: AsyncSession, *, username: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.username == username))
+        return result.scalars().first()
+
+    async def authenticate(self, db: AsyncSession, *, username: str, password: str) -> Optional[User]:
+        user = await self.get_by_username(db, username=username)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await password_hasher.verify(password, user.hashed_password):
             return None
+        if needs_rehash(user.hashed_password):
+            await self._rehash_password(db, user, password)
         return user
 
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
+    async def _rehash_password(self, db: AsyncSession, user: User, password: str) -> None:
+        """Upgrade a hash made with an old cost factor; login must not fail on it."""
+        try:
+            hashed_password = await password_hasher.hash(password)
+            await db.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(hashed_password=hashed_password)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        except PasswordHasherBusyError:
+            logger.warning(f"Skipped password rehash for user {user.id}: hashing pool busy")
+        except Exception as e:
+            await db.rollback()
+            await db.refresh(user)
+            logger.error(f"Error rehashing password for user {user.id}: {str(e)}")
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
         """Create a new user with hashed password."""
         # Check for existing user first
-        if self.get_by_email(db, email=obj_in.email):
+        if await self.get_by_email(db, email=obj_in.email):
             raise ValueError("Email already registered")
             
-        db_obj = User(
+        stmt = insert(User).values(
             email=obj_in.email,
             username=obj_in.username,
             full_name=obj_in.full_name,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=await password_hasher.hash(obj_in.password),
             is_active=True  # Changed from disabled=False
-        )
+        ).returning(User)
         
         try:
-            db.add(db_obj)
-            db.commit()
-            db.refresh(db_obj)
+            db_obj = (await db.scalars(stmt)).one()
+            await db.commit()
             return db_obj
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Error creating user: {str(e)}")
             raise
 
+    async def load_collections(
+        self,
+        db: AsyncSession,
+        users: Sequence[User],
+        include: Collection[str],
+        limit: int
+    ) -> None:
+        """
+        Populate the `include`d collections on `users`, at most `limit` items each.
+        Like selectinload this is one query per collection for all users, but
+        a LATERAL subquery caps each user's items using the owner indexes.
+        """
+        if not users:
+            return
+        owners = select(User.id).where(User.id.in_([u.id for u in users])).subquery()
+        for name in include:
+            model, order_by = USER_COLLECTIONS[name]
+            items = (
+                select(model)
+                .where(model.owner_id == owners.c.id, model.deleted_at.is_(None))
+                .order_by(*order_by)
+                .limit(limit)
+                .lateral()
+            )
+            rows = await db.scalars(select(aliased(model, items)).select_from(owners).join(items, true()))
+            by_owner: Dict[int, List] = defaultdict(list)
+            for row in rows:
+                by_owner[row.owner_id].append(row)
+            for db_user in users:
+                set_committed_value(db_user, name, by_owner.get(db_user.id, []))
+
     def is_active(self, user: User) -> bool:
         """Check if user is active."""
         return user.is_active  # Changed from not user.disabled
 
-    def get_user_by_token(self, db: Session, token: str) -> Optional[User]:
+    async def get_user_by_token(self, db: AsyncSession, token: str) -> Optional[User]:
         """Get user by JWT token."""
         try:
             payload = jwt.decode(
@@ -64,7 +128,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             username: str = payload.get("sub")
             if username is None:
                 return None
-            return self.get_by_username(db, username=username)
+            return await self.get_by_username(db, username=username)
         except jwt.JWTError:
             return None
 
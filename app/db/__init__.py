@@ -1,4 +1,12 @@
+from typing import Any
 from app.db.base import Base
-from app.db.session import SessionLocal, engine
+from app.db.session import AsyncSessionLocal, async_engine
 
-__all__ = ["Base", "SessionLocal", "engine"]
+__all__ = ["Base", "SessionLocal", "engine", "AsyncSessionLocal", "async_engine"]
+
+def __getattr__(name: str) -> Any:
+    # The sync engine is created on first use
+    if name in ("engine", "SessionLocal"):
+        from app.db import session
+        return getattr(session, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
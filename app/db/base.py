@@ -5,5 +5,8 @@ from app.models.base import Base
 from app.models.user import User  # noqa
 from app.models.task import Task  # noqa
 from app.models.category import Category  # noqa
+from app.models.task_stat import TaskStat  # noqa
+from app.models.activity import Activity  # noqa
+from app.models.change_counter import ChangeCounter  # noqa
 
-__all__ = ["Base", "User", "Category", "Task"]
+__all__ = ["Base", "User", "Category", "Task", "TaskStat", "Activity", "ChangeCounter"]
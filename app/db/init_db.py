@@ -1,11 +1,12 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.crud import user, create_category
+from app.crud import user, create_category, get_category_by_name
 from app.schemas.user import UserCreate
 from app.schemas.category import CategoryCreate
-from app.core.logging import get_logger
+from app.core.logging import get_logger, setup_logging
 from app.db.base import Base
-from app.db.session import engine
+from app.db.migrations import acquire_lock, adopt_unversioned, release_lock, stamp_head, upgrade
+from app.db.session import async_engine
 from app.models.user import User  # Add this import
 
 logger = get_logger(__name__)
@@ -24,26 +25,46 @@ INITIAL_CATEGORIES = [
     {"name": "Shopping", "description": "Shopping list"},
 ]
 
-def init_db(db: Session) -> None:
-    """Initialize database with required tables and initial data."""
-    try:
-        # Create all tables
-        Base.metadata.create_all(bind=engine)
-        logger.info("Created database tables")
+async def initialize(seed: bool = True) -> None:
+    """
+    Create the database if needed, migrate it to the head revision and seed it.
+    An advisory lock lets one process at a time do this, so deploy steps or
+    replicas racing each other wait, then find nothing left to do. A schema
+    created by create_all before migrations existed is stamped at the
+    baseline revision first, then upgraded.
+    """
+    from scripts.create_db import create_database
+
+    create_database()
+    async with async_engine.connect() as conn:
+        await acquire_lock(conn)
+        try:
+            await adopt_unversioned(conn)
+            await upgrade(conn)
+            logger.info("Database schema is up to date")
+            if seed:
+                from app.db.session import AsyncSessionLocal
+
+                async with AsyncSessionLocal() as db:
+                    await init_db(db)
+        finally:
+            await release_lock(conn)
 
-        # Check if we should seed the database
-        user = create_first_superuser(db)
+async def init_db(db: AsyncSession) -> None:
+    """Seed the initial superuser and categories, if missing."""
+    try:
+        user = await create_first_superuser(db)
         if user:
-            create_initial_categories(db, user.id)
+            await create_initial_categories(db, user.id)
             logger.info("Database seeded successfully")
     except Exception as e:
         logger.error(f"Error initializing database: {str(e)}")
         raise
 
-def create_first_superuser(db: Session):
+async def create_first_superuser(db: AsyncSession):
     """Create the first superuser if it doesn't exist."""
     try:
-        superuser = user.get_by_email(db, email=FIRST_SUPERUSER["email"])
+        superuser = await user.get_by_email(db, email=FIRST_SUPERUSER["email"])
         if not superuser:
             user_in = UserCreate(
                 email=FIRST_SUPERUSER["email"],
@@ -51,7 +72,7 @@ def create_first_superuser(db: Session):
                 username=FIRST_SUPERUSER["username"],
                 full_name=FIRST_SUPERUSER["full_name"]
             )
-            superuser = user.create(db, obj_in=user_in)
+            superuser = await user.create(db, obj_in=user_in)
             logger.info(f"Created first superuser: {superuser.email}")
             return superuser
         return None
@@ -59,12 +80,14 @@ def create_first_superuser(db: Session):
         logger.error(f"Error creating superuser: {str(e)}")
         raise
 
-def create_initial_categories(db: Session, user_id: int):
+async def create_initial_categories(db: AsyncSession, user_id: int):
     """Create initial categories if they don't exist."""
     try:
         for category_data in INITIAL_CATEGORIES:
+            if await get_category_by_name(db, category_data["name"], user_id):
+                continue
             category_in = CategoryCreate(**category_data)
-            category = create_category(db, category_in, user_id)
+            category = await create_category(db, category_in, user_id)
             logger.info(f"Created initial category: {category.name}")
     except Exception as e:
         logger.error(f"Error creating initial categories: {str(e)}")
@@ -72,24 +95,33 @@ def create_initial_categories(db: Session, user_id: int):
 
 def reset_db() -> None:
     """Reset database (for development purposes only)."""
+    from app.db.session import engine
+
     try:
-        Base.metadata.drop_all(bind=engine)
-        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            Base.metadata.drop_all(bind=conn)
+            Base.metadata.create_all(bind=conn)
+            stamp_head(conn)
         logger.warning("Database has been reset")
     except Exception as e:
         logger.error(f"Error resetting database: {str(e)}")
         raise
 
-if __name__ == "__main__":
-    from app.db.session import SessionLocal
-    
-    db = SessionLocal()
+async def main(seed: bool = True) -> None:
     try:
-        logger.info("Creating initial data")
-        init_db(db)
-        logger.info("Initial data created")
+        logger.info("Initializing database")
+        await initialize(seed=seed)
+        logger.info("Database initialized")
     except Exception as e:
-        logger.error(f"Error creating initial data: {str(e)}")
+        logger.error(f"Error initializing database: {str(e)}")
         raise
-    finally:
-        db.close()
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Create, migrate and seed the database")
+    parser.add_argument("--no-seed", action="store_true", help="only create and migrate")
+    args = parser.parse_args()
+    setup_logging()
+    asyncio.run(main(seed=not args.no_seed))
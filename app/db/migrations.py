@@ -0,0 +1,136 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Revision matching the schema create_all made before migrations existed
+BASELINE_REVISION = "0001"
+
+# pg_advisory_lock key held while migrating or seeding ("todo" in ASCII)
+MIGRATION_LOCK_ID = 0x746F646F
+
+
+class SchemaMismatchError(RuntimeError):
+    """Raised when the database is not at the revision this code expects"""
+    pass
+
+
+def alembic_config() -> Any:
+    from alembic.config import Config
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    return config
+
+
+@lru_cache(maxsize=None)
+def head_revision() -> str:
+    """Latest revision in alembic/versions."""
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+async def current_revision(conn: AsyncConnection) -> Optional[str]:
+    """Revision the database is at, None if it was never migrated."""
+    try:
+        return await conn.scalar(text("SELECT version_num FROM alembic_version"))
+    except (ProgrammingError, OperationalError):
+        # No alembic_version table
+        await conn.rollback()
+        return None
+
+
+async def verify_schema(engine: Any) -> None:
+    """
+    Check with one query that the database is at the head revision.
+    Workers call this on startup instead of creating or migrating anything.
+    """
+    async with engine.connect() as conn:
+        current = await current_revision(conn)
+        unversioned = current is None and await is_unversioned(conn)
+    expected = head_revision()
+    if unversioned:
+        raise SchemaMismatchError(
+            f"Database schema predates migrations, expected revision {expected}; "
+            f"run `python -m app.db.init_db` to stamp revision {BASELINE_REVISION} and migrate"
+        )
+    if current != expected:
+        raise SchemaMismatchError(
+            f"Database schema is at revision {current}, expected {expected}; "
+            "run `python -m app.db.init_db` to migrate"
+        )
+    logger.info(f"Database schema is at revision {current}")
+
+
+def _upgrade(sync_conn: Any) -> None:
+    from alembic import command
+
+    config = alembic_config()
+    # env.py migrates on this connection, inside the advisory lock
+    config.attributes["connection"] = sync_conn
+    command.upgrade(config, "head")
+
+
+def _stamp(sync_conn: Any, revision: str) -> None:
+    from alembic import command
+
+    config = alembic_config()
+    config.attributes["connection"] = sync_conn
+    command.stamp(config, revision)
+
+
+def stamp_head(sync_conn: Any) -> None:
+    """Record the head revision without migrating, for schemas made by create_all."""
+    _stamp(sync_conn, "head")
+
+
+def _is_unversioned(sync_conn: Any) -> bool:
+    tables = inspect(sync_conn)
+    return tables.has_table("users") and not tables.has_table("alembic_version")
+
+
+async def is_unversioned(conn: AsyncConnection) -> bool:
+    """Whether the database has tables but no revision, as create_all left it."""
+    return await conn.run_sync(_is_unversioned)
+
+
+async def adopt_unversioned(conn: AsyncConnection) -> bool:
+    """
+    Stamp BASELINE_REVISION on a schema made by create_all before migrations
+    existed, so upgrading runs only the later revisions. Returns whether the
+    database was adopted.
+    """
+    if not await is_unversioned(conn):
+        return False
+    await conn.run_sync(_stamp, BASELINE_REVISION)
+    await conn.commit()
+    logger.warning(f"Adopted an unversioned schema at revision {BASELINE_REVISION}")
+    return True
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    """Migrate to the head revision on `conn` and commit."""
+    await conn.run_sync(_upgrade)
+    await conn.commit()
+
+
+async def acquire_lock(conn: AsyncConnection) -> None:
+    """
+    Wait for the migration lock. It is held by the connection's session,
+    so it survives commits and is released by release_lock or disconnect.
+    """
+    await conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+    await conn.commit()
+
+
+async def release_lock(conn: AsyncConnection) -> None:
+    await conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+    await conn.commit()
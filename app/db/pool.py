@@ -0,0 +1,120 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import settings
+
+# Upper bounds (seconds) of the checkout latency histogram buckets
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolMetrics:
+    """Checkout latency, wait and timeout counters for one connection pool"""
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.checkout_seconds_sum = 0.0
+        self.checkout_seconds_max = 0.0
+        self.bucket_counts: List[int] = [0] * (len(CHECKOUT_BUCKETS) + 1)
+
+    def record_checkout(self, seconds: float, waited: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.waits += waited
+            self.checkout_seconds_sum += seconds
+            if seconds > self.checkout_seconds_max:
+                self.checkout_seconds_max = seconds
+            self.bucket_counts[bisect_left(CHECKOUT_BUCKETS, seconds)] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+
+
+class _InstrumentedPoolMixin:
+    """
+    Times every checkout and counts the ones that found the pool exhausted,
+    i.e. had to wait for a connection to be returned.
+    """
+    metrics: PoolMetrics
+
+    def _do_get(self) -> Any:
+        capacity = self.size() + max(self._max_overflow, 0)
+        waited = self.checkedout() >= capacity
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start, waited)
+        return conn
+
+    def recreate(self) -> Any:
+        # engine.dispose() swaps in a new pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> Dict[str, Any]:
+        capacity = self.size() + max(self._max_overflow, 0)
+        checked_out = self.checkedout()
+        metrics = self.metrics
+        return {
+            "name": metrics.name,
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": checked_out,
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "saturation": checked_out / capacity if capacity else 0.0,
+            "checkouts": metrics.checkouts,
+            "waits": metrics.waits,
+            "timeouts": metrics.timeouts,
+            "checkout_seconds_sum": metrics.checkout_seconds_sum,
+            "checkout_seconds_max": metrics.checkout_seconds_max,
+            "checkout_seconds_buckets": dict(
+                zip([*map(str, CHECKOUT_BUCKETS), "+Inf"], metrics.bucket_counts)
+            ),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options() -> Dict[str, Any]:
+    """Pool keyword arguments shared by the sync and async engines."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def psycopg2_connect_args() -> Dict[str, Any]:
+    if not settings.DB_STATEMENT_TIMEOUT_MS:
+        return {}
+    return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+
+
+def asyncpg_connect_args() -> Dict[str, Any]:
+    if not settings.DB_STATEMENT_TIMEOUT_MS:
+        return {}
+    return {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+
+
+def instrument_pool(pool: Any, name: str) -> None:
+    pool.metrics = PoolMetrics(name)
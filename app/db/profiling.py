@@ -0,0 +1,103 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+
+# Statements are shortened to this many characters in logs and assertion messages
+STATEMENT_PREVIEW_LENGTH = 300
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryStats:
+    """Statements run on behalf of one request, and the time they took"""
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. db;dur=12.3;desc="4 queries"."""
+        noun = "query" if self.queries == 1 else "queries"
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.queries} {noun}"'
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Statement lists of the assert_max_queries blocks active in this context
+_captures: ContextVar[Tuple[List[str], ...]] = ContextVar("query_captures", default=())
+
+
+def start_profile() -> Tuple[QueryStats, Token]:
+    """Attribute statements run in the current context to a new QueryStats."""
+    stats = QueryStats()
+    return stats, _query_stats.set(stats)
+
+
+def end_profile(token: Token) -> None:
+    _query_stats.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _query_stats.get()
+
+
+def preview(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    if len(statement) > STATEMENT_PREVIEW_LENGTH:
+        return statement[:STATEMENT_PREVIEW_LENGTH] + "..."
+    return statement
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    # SQLAlchemy runs async engines' events in a greenlet that shares the
+    # calling task's context, so this sees the request's QueryStats
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context._query_started)
+    for capture in _captures.get():
+        capture.append(statement)
+
+
+def instrument_engine(engine: Any) -> None:
+    """Count and time the statements `engine` runs; takes sync or async engines."""
+    engine = getattr(engine, "sync_engine", engine)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[List[str]]:
+    """
+    Fail with the statements run if the block runs more than `max_queries`
+    on any instrumented engine. Only statements run in the block's context
+    count, so concurrent tasks do not share a budget while nested blocks
+    each see theirs. TestClient copies the caller's context into the
+    requests it sends, e.g.
+
+        with assert_max_queries(3):
+            client.get("/api/v1/tasks/", headers=headers)
+    """
+    statements: List[str] = []
+    token = _captures.set(_captures.get() + (statements,))
+    try:
+        yield statements
+    finally:
+        _captures.reset(token)
+    if len(statements) > max_queries:
+        listing = "\n".join(f"  {number}. {preview(statement)}" for number, statement in enumerate(statements, 1))
+        raise AssertionError(f"Expected at most {max_queries} queries, {len(statements)} were run:\n{listing}")
@@ -0,0 +1,161 @@
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.pool import InstrumentedAsyncQueuePool, asyncpg_connect_args, instrument_pool, pool_options
+from app.db.profiling import instrument_engine
+from app.services.cache import CacheBackend, response_cache
+
+logger = get_logger(__name__)
+
+
+class Replica:
+    """One read replica engine and its health state"""
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(
+            bind=engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+            info={"replica": name},
+        )
+        self.ejected_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+
+def is_replica_session(db: AsyncSession) -> bool:
+    """Whether `db` reads from a replica, which may lag the primary."""
+    return "replica" in db.info
+
+
+class ReplicaSet:
+    """
+    Round-robin over read replicas, skipping replicas ejected after a
+    connection failure until their cool-down has passed.
+    """
+    def __init__(self, replicas: List[Replica], eject_seconds: float):
+        self.replicas = replicas
+        self.eject_seconds = eject_seconds
+        self._cycle = itertools.cycle(replicas) if replicas else None
+
+    def choose(self) -> Optional[Replica]:
+        if self._cycle is None:
+            return None
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if replica.healthy:
+                return replica
+        return None
+
+    def eject(self, replica: Replica) -> None:
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+        logger.warning(f"Ejected read replica {replica.name} for {self.eject_seconds}s")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {**replica.engine.sync_engine.pool.stats(), "healthy": replica.healthy}
+            for replica in self.replicas
+        ]
+
+
+class ReadYourWrites:
+    """
+    Per-user window after a commit during which reads stay on the primary,
+    so a user never reads a replica that has not caught up with their write.
+
+    Commits are recorded in this process at once, and stored in `backend`
+    before the response is sent (see ReadYourWritesMiddleware). With the
+    shared cache backend, a user's next request therefore stays on the
+    primary whichever worker serves it; with the per-process memory backend
+    only on the worker that committed. The local copy, bounded to
+    `max_users` entries, saves a backend read for users writing through
+    this worker.
+    """
+    def __init__(self, backend: CacheBackend, window_seconds: float, max_users: int = 100000):
+        self.backend = backend
+        self.window_seconds = window_seconds
+        self.max_users = max_users
+        self._deadlines: "OrderedDict[int, float]" = OrderedDict()
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"last_write:{user_id}"
+
+    def record_write(self, user_id: int) -> None:
+        if not self.window_seconds:
+            return
+        self._deadlines[user_id] = time.monotonic() + self.window_seconds
+        self._deadlines.move_to_end(user_id)
+        while len(self._deadlines) > self.max_users:
+            self._deadlines.popitem(last=False)
+
+    async def share_write(self, user_id: int) -> None:
+        """Open the user's window on every worker sharing the backend."""
+        if not self.window_seconds:
+            return
+        try:
+            await self.backend.set(self._key(user_id), b"1", self.window_seconds)
+        except Exception as e:
+            # Other workers may read a lagging replica for this user
+            logger.error(f"Error sharing read-your-writes window: {str(e)}")
+
+    def _is_sticky_here(self, user_id: int) -> bool:
+        deadline = self._deadlines.get(user_id)
+        if deadline is None:
+            return False
+        if time.monotonic() >= deadline:
+            del self._deadlines[user_id]
+            return False
+        return True
+
+    async def is_sticky(self, user_id: int) -> bool:
+        if not self.window_seconds:
+            return False
+        if self._is_sticky_here(user_id):
+            return True
+        try:
+            return await self.backend.get(self._key(user_id)) is not None
+        except Exception as e:
+            logger.error(f"Error reading read-your-writes window: {str(e)}")
+            return False
+
+
+def _create_replica(index: int, url: str) -> Replica:
+    name = f"replica-{index}"
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        connect_args=asyncpg_connect_args(),
+        **pool_options()
+    )
+    instrument_pool(engine.sync_engine.pool, name)
+    instrument_engine(engine)
+    return Replica(name, engine)
+
+
+replica_set = ReplicaSet(
+    [_create_replica(i, url) for i, url in enumerate(settings.ASYNC_REPLICA_DATABASE_URLS)],
+    eject_seconds=settings.REPLICA_EJECT_SECONDS,
+)
+read_your_writes = ReadYourWrites(response_cache.backend, settings.READ_YOUR_WRITES_SECONDS)
+
+
+@event.listens_for(Session, "after_commit")
+def _record_user_write(session: Session) -> None:
+    # get_db tags primary sessions with the requesting user and request state
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        read_your_writes.record_write(user_id)
+        state = session.info.get("request_state")
+        if state is not None:
+            state.read_your_writes = user_id
@@ -1,6 +1,62 @@
+from typing import Any, Dict, List
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    asyncpg_connect_args,
+    instrument_pool,
+    pool_options,
+    psycopg2_connect_args,
+)
+from app.db.profiling import instrument_engine
+from app.db.replicas import replica_set
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_sync: Dict[str, Any] = {}
+
+def _create_sync_engine() -> None:
+    engine = create_engine(
+        settings.DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        connect_args=psycopg2_connect_args(),
+        **pool_options()
+    )
+    instrument_pool(engine.pool, "primary_sync")
+    instrument_engine(engine)
+    _sync["engine"] = engine
+    _sync["SessionLocal"] = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def __getattr__(name: str) -> Any:
+    # Sync engine for scripts, DDL and migrations. Built on first use, so
+    # request workers never import psycopg2 or open a second pool.
+    if name in ("engine", "SessionLocal"):
+        if not _sync:
+            _create_sync_engine()
+        return _sync[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Async engine used by the request handlers
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    connect_args=asyncpg_connect_args(),
+    **pool_options()
+)
+instrument_pool(async_engine.sync_engine.pool, "primary")
+# Per-request query counts and DB time, see QueryProfileMiddleware
+instrument_engine(async_engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+def pool_stats() -> List[Dict[str, Any]]:
+    """Current pool gauges and checkout metrics for every engine."""
+    stats = [async_engine.sync_engine.pool.stats()]
+    if _sync:
+        stats.append(_sync["engine"].pool.stats())
+    return [*stats, *replica_set.stats()]
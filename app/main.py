@@ -1,13 +1,24 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
+from app.core.security import PasswordHasherBusyError, password_hasher
 from app.api import router as api_router
+from app.api.dependencies import rate_limiter
+from app.api.middleware import (
+    MetricsMiddleware, QueryProfileMiddleware, RateLimitHeadersMiddleware, ReadYourWritesMiddleware
+)
 from app.core.logging import setup_logging, get_logger
-from app.db.init_db import init_db
-from app.db.session import SessionLocal
+from app.db.migrations import verify_schema
+from app.db.session import async_engine, pool_stats
+from app.services.activity import activity_log
+from app.services.cache import response_cache
+from app.services.events import event_broker
+from app.services.metrics import request_metrics
+from app.services.stats import run_periodic_reconciliation
+from app.services.sync import run_periodic_compaction
 
-# Setup logging
-setup_logging(settings.DEBUG)
 logger = get_logger(__name__)
 
 # Create FastAPI app
@@ -29,35 +40,105 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(RateLimitHeadersMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+
+if settings.DB_PROFILING_ENABLED:
+    app.add_middleware(QueryProfileMiddleware, query_budget=settings.DB_QUERY_BUDGET)
+
+# Added last, so it is the outermost middleware and also times the others
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
 # Include API router
 app.include_router(api_router)
 
-# Initialize database on startup
+# Check the schema on startup; creating, migrating and seeding is app.db.init_db's job
 @app.on_event("startup")
 async def startup_event():
-    from scripts.create_db import create_database
-    
+    # Configured here rather than on import, so importing the app has no side effects
+    setup_logging(settings.DEBUG)
     try:
-        create_database()
+        if settings.DB_STARTUP_MODE == "verify":
+            await verify_schema(async_engine)
+        elif settings.DB_STARTUP_MODE == "init":
+            from app.db.init_db import initialize
+            await initialize()
     except Exception as e:
         logger.error(f"Error during startup: {str(e)}")
         raise
 
-    try:
-        db = SessionLocal()
-        try:
-            init_db(db)
-        finally:
-            db.close()
-    except Exception as e:
-        logger.error(f"Error during startup: {str(e)}")
-        raise
+    activity_log.start()
+    await event_broker.start()
+    if settings.METRICS_ENABLED:
+        request_metrics.start()
+
+    if settings.TASK_STATS_RECONCILE_INTERVAL_SECONDS:
+        app.state.stats_reconciler = asyncio.create_task(
+            run_periodic_reconciliation(settings.TASK_STATS_RECONCILE_INTERVAL_SECONDS)
+        )
+    if settings.SYNC_COMPACT_INTERVAL_SECONDS:
+        app.state.tombstone_compactor = asyncio.create_task(
+            run_periodic_compaction(settings.SYNC_COMPACT_INTERVAL_SECONDS)
+        )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for name in ("stats_reconciler", "tombstone_compactor"):
+        background = getattr(app.state, name, None)
+        if background is not None:
+            background.cancel()
+    await event_broker.stop()
+    if settings.METRICS_ENABLED:
+        await request_metrics.stop()
+    # Write the activity records still queued before the process exits
+    await activity_log.stop(settings.ACTIVITY_LOG_SHUTDOWN_TIMEOUT_SECONDS)
+    password_hasher.shutdown()
+
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
 
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+# Connection pool metrics, for sizing workers against the database
+@app.get("/health/db-pool")
+async def db_pool_metrics():
+    return {"pools": pool_stats()}
+
+# Response cache hit/miss counters
+@app.get("/health/cache")
+async def response_cache_metrics():
+    return response_cache.stats()
+
+# Rate limiter state and rejection count
+@app.get("/health/rate-limit")
+async def rate_limit_metrics():
+    return rate_limiter.stats()
+
+# Activity log queue depth, drops and write failures
+@app.get("/health/activity-log")
+async def activity_log_metrics():
+    return activity_log.stats()
+
+# Connected event subscribers and fan-out counters
+@app.get("/health/events")
+async def event_metrics():
+    return event_broker.stats()
+
+# Request latency histograms, status counts and in-flight requests of all
+# workers, in the Prometheus text format
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     import socket
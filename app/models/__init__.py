@@ -2,5 +2,8 @@ from app.models.base import Base, TimestampedBase
 from app.models.user import User
 from app.models.task import Task
 from app.models.category import Category
+from app.models.task_stat import TaskStat
+from app.models.activity import Activity
+from app.models.change_counter import ChangeCounter
 
-__all__ = ["Base", "TimestampedBase", "User", "Task", "Category"]
\ No newline at end of file
+__all__ = ["Base", "TimestampedBase", "User", "Task", "Category", "TaskStat", "Activity", "ChangeCounter"]
\ No newline at end of file
@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from app.models.base import Base
+
+class Activity(Base):
+    """One change to a task or category, written in batches by the activity log"""
+    __tablename__ = "activity_log"
+    __table_args__ = (
+        # Serves the change history of one task or category, oldest first
+        Index("ix_activity_log_owner_id_entity_entity_id_id", "owner_id", "entity", "entity_id", "id"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # "task" or "category"; no FK, so history outlives the row
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    # "created", "updated" or "deleted"
+    action = Column(String(20), nullable=False)
+    # Created: new values. Updated: {field: [old, new]} for changed fields. Deleted: old values.
+    changes = Column(JSONB, nullable=False)
+    # When the change was made, not when the batch was written
+    created_at = Column(DateTime, nullable=False)
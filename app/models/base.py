@@ -1,7 +1,22 @@
 from sqlalchemy import Column, DateTime
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import DeclarativeBase, Mapped
+from sqlalchemy.sql.functions import FunctionElement
 from datetime import datetime
 
+class utcnow(FunctionElement):
+    """Current UTC time evaluated by the database"""
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utcnow, "postgresql")
+def _pg_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
 class Base(DeclarativeBase):
     """Base class for all models"""
     pass
@@ -9,6 +24,8 @@ class Base(DeclarativeBase):
 class TimestampedBase(Base):
     """Base class for all models with timestamp fields"""
     __abstract__ = True
+    # Fetch server-generated timestamps with RETURNING on INSERT and UPDATE
+    __mapper_args__ = {"eager_defaults": True}
 
-    created_at: Mapped[datetime] = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at: Mapped[datetime] = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
\ No newline at end of file
+    created_at: Mapped[datetime] = Column(DateTime, server_default=utcnow(), nullable=False)
+    updated_at: Mapped[datetime] = Column(DateTime, server_default=utcnow(), onupdate=utcnow(), nullable=False)
\ No newline at end of file
@@ -1,17 +1,36 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, ForeignKey, text
 from sqlalchemy.orm import relationship
 from app.models.base import TimestampedBase
 
 class Category(TimestampedBase):
     __tablename__ = "categories"
+    __table_args__ = (
+        # Serves per-owner listing, lookup by name and the ownership check on task writes.
+        # Tombstones are left out so a deleted category's name can be reused.
+        Index(
+            "uq_categories_owner_id_name", "owner_id", "name",
+            unique=True,
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL")
+        ),
+        # Delta sync: rows changed after a client's last sync token
+        Index("ix_categories_owner_id_change_seq", "owner_id", "change_seq"),
+        # Tombstone compaction; only tombstones are indexed
+        Index("ix_categories_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), nullable=False)
+    color = Column(String(7), nullable=False, default="#000000", server_default="#000000")
     description = Column(String(255))
+    # Per-owner change sequence, bumped by every write including deletion
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Tombstone: deleted categories are kept for sync clients until compaction
+    deleted_at = Column(DateTime, nullable=True)
     
     # Foreign Keys
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Relationships
     owner = relationship("User", back_populates="categories")
-    tasks = relationship("Task", back_populates="category")
\ No newline at end of file
+    tasks = relationship("Task", back_populates="category", passive_deletes=True)
\ No newline at end of file
@@ -0,0 +1,12 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer
+from app.models.base import Base
+
+class ChangeCounter(Base):
+    """Per-user change sequence for delta sync, and how far tombstones have been compacted"""
+    __tablename__ = "change_counters"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Last change_seq handed out; the row lock orders a user's writes by commit
+    seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Highest change_seq of a compacted tombstone; older sync tokens must resync
+    compacted_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
@@ -1,20 +1,62 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Column, Computed, DDL, Integer, String, Boolean, ForeignKey, DateTime, Text, Index, event, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from app.models.base import TimestampedBase
 
+# Text search configuration used by the search vector and search queries
+SEARCH_CONFIG = "english"
+SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(description, '')), 'B')"
+)
+
 class Task(TimestampedBase):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset pagination per owner, ordered by id or by due date
+        Index("ix_tasks_owner_id_id", "owner_id", "id"),
+        Index("ix_tasks_owner_id_due_date_id", "owner_id", "due_date", "id"),
+        # Filtered listings (completed / category) keep id order from the index
+        Index("ix_tasks_owner_id_completed_category_id_id", "owner_id", "completed", "category_id", "id"),
+        # Delta sync: rows changed after a client's last sync token
+        Index("ix_tasks_owner_id_change_seq", "owner_id", "change_seq"),
+        # Tombstone compaction; only tombstones are indexed
+        Index("ix_tasks_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+        # Per-owner search: full text, and trigram matching for prefixes and typos.
+        # owner_id in a GIN index needs btree_gin.
+        Index("ix_tasks_owner_id_search_vector", "owner_id", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_tasks_owner_id_title_trgm", "owner_id", "title",
+            postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
+    priority = Column(String(20), nullable=False, default="medium", server_default="medium")
+    status = Column(String(20), nullable=False, default="todo", server_default="todo")
     completed = Column(Boolean, default=False)
     due_date = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    # Per-owner change sequence, bumped by every write including deletion
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Tombstone: deleted tasks are kept for sync clients until compaction
+    deleted_at = Column(DateTime, nullable=True)
+    # Only read by search queries, never loaded with the task
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True)), raiseload=True)
     
     # Foreign Keys
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
     
     # Relationships
     owner = relationship("User", back_populates="tasks")
-    category = relationship("Category", back_populates="tasks")
\ No newline at end of file
+    category = relationship("Category", back_populates="tasks")
+
+for extension in ("pg_trgm", "btree_gin"):
+    event.listen(
+        Task.__table__,
+        "before_create",
+        DDL(f"CREATE EXTENSION IF NOT EXISTS {extension}").execute_if(dialect="postgresql")
+    )
\ No newline at end of file
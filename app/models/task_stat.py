@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from app.models.base import Base
+
+class TaskStat(Base):
+    """Per-user task counter, kept current by task writes and rebuilt by reconciliation"""
+    __tablename__ = "task_stats"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # e.g. ("status", "todo"), ("category", "12"), ("completed_week", "2026-10-12")
+    dimension = Column(String(20), primary_key=True)
+    key = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
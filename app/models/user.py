@@ -12,7 +12,8 @@ class User(TimestampedBase):
     full_name = Column(String(100))
     hashed_password = Column(String(100), nullable=False)
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
 
-    # Relationships
-    tasks = relationship("Task", back_populates="owner", cascade="all, delete-orphan")
-    categories = relationship("Category", back_populates="owner", cascade="all, delete-orphan")
\ No newline at end of file
+    # Relationships, never lazy loaded: use ?include= loading or an explicit query
+    tasks = relationship("Task", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
+    categories = relationship("Category", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
\ No newline at end of file
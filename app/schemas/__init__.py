@@ -10,7 +10,8 @@ from .user import (
     UserBase,
     UserCreate,
     UserUpdate,
-    User
+    User,
+    UserDetail
 )
 
 from .task import (
@@ -18,6 +19,16 @@ from .task import (
     TaskCreate,
     TaskUpdate,
     Task,
+    TaskPage,
+    TaskStats,
+    TaskSortField,
+    TaskBulkStatus,
+    TaskBulkCreate,
+    TaskBulkUpdateItem,
+    TaskBulkUpdate,
+    TaskBulkDelete,
+    TaskBulkItemResult,
+    TaskBulkResponse,
     TaskStatus,
     TaskPriority
 )
@@ -29,6 +40,8 @@ from .category import (
     Category
 )
 
+from .sync import SyncResponse
+
 __all__ = [
     # Auth schemas
     "Token",
@@ -42,12 +55,23 @@ __all__ = [
     "UserCreate",
     "UserUpdate",
     "User",
+    "UserDetail",
     
     # Task schemas
     "TaskBase",
     "TaskCreate",
     "TaskUpdate",
     "Task",
+    "TaskPage",
+    "TaskStats",
+    "TaskSortField",
+    "TaskBulkStatus",
+    "TaskBulkCreate",
+    "TaskBulkUpdateItem",
+    "TaskBulkUpdate",
+    "TaskBulkDelete",
+    "TaskBulkItemResult",
+    "TaskBulkResponse",
     "TaskStatus",
     "TaskPriority",
     
@@ -55,5 +79,8 @@ __all__ = [
     "CategoryBase",
     "CategoryCreate",
     "CategoryUpdate",
-    "Category"
+    "Category",
+
+    # Sync schemas
+    "SyncResponse"
 ]
\ No newline at end of file
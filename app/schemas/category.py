@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 from datetime import datetime
 from typing import Optional
 
@@ -25,7 +25,7 @@ class CategoryUpdate(BaseModel):
 class Category(CategoryBase):
     """Schema for category response"""
     id: int
-    user_id: int
+    user_id: int = Field(..., validation_alias=AliasChoices("user_id", "owner_id"))
     created_at: datetime
     updated_at: Optional[datetime] = None
 
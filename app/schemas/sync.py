@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List
+from app.schemas.category import Category
+from app.schemas.task import Task
+
+
+class SyncResponse(BaseModel):
+    """Schema for the changes since a sync token"""
+    tasks: List[Task] = []
+    categories: List[Category] = []
+    deleted_tasks: List[int] = []
+    deleted_categories: List[int] = []
+    next_token: str
+    has_more: bool = False
+    # Set when the token was too old: discard local data and apply these changes from scratch
+    reset: bool = False
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from enum import Enum
 
 
@@ -18,6 +18,12 @@ class TaskStatus(str, Enum):
     COMPLETED = "completed"
 
 
+class TaskSortField(str, Enum):
+    """Enum for task list ordering"""
+    ID = "id"
+    DUE_DATE = "due_date"
+
+
 class TaskBase(BaseModel):
     """Base schema for task"""
     title: str = Field(..., min_length=1, max_length=100)
@@ -46,7 +52,8 @@ class TaskUpdate(BaseModel):
 class Task(TaskBase):
     """Schema for task response"""
     id: int
-    user_id: int
+    user_id: int = Field(..., validation_alias=AliasChoices("user_id", "owner_id"))
+    completed: bool = False
     created_at: datetime
     updated_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
@@ -64,8 +71,88 @@ class Task(TaskBase):
                 "due_date": "2024-03-20T17:00:00",
                 "category_id": 1,
                 "user_id": 1,
+                "completed": False,
                 "created_at": "2024-03-18T10:00:00",
                 "updated_at": "2024-03-18T11:30:00",
                 "completed_at": None
             }
-        }
\ No newline at end of file
+        }
+
+
+class TaskPage(BaseModel):
+    """Schema for a page of tasks"""
+    items: List[Task]
+    next_cursor: Optional[str] = None
+
+
+class TaskStats(BaseModel):
+    """Schema for a user's task statistics"""
+    total: int = 0
+    completed: int = 0
+    overdue: int = 0
+    completed_this_week: int = 0
+    by_status: Dict[str, int] = {}
+    by_priority: Dict[str, int] = {}
+    # Keyed by category id, "none" for uncategorized tasks
+    by_category: Dict[str, int] = {}
+
+
+class TaskBulkStatus(str, Enum):
+    """Enum for the outcome of one item in a bulk request"""
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    NOT_FOUND = "not_found"
+    CATEGORY_NOT_FOUND = "category_not_found"
+
+
+class TaskBulkCreate(BaseModel):
+    """Schema for creating several tasks at once"""
+    items: List[TaskCreate] = Field(..., min_length=1)
+
+
+class TaskBulkUpdateItem(TaskUpdate):
+    """Schema for one task update in a bulk request"""
+    id: int
+
+
+class TaskBulkUpdate(BaseModel):
+    """Schema for updating several tasks at once"""
+    items: List[TaskBulkUpdateItem] = Field(..., min_length=1)
+
+
+class TaskBulkDelete(BaseModel):
+    """Schema for deleting several tasks at once"""
+    ids: List[int] = Field(..., min_length=1)
+
+
+class TaskBulkItemResult(BaseModel):
+    """Schema for the result of one item in a bulk request"""
+    index: int
+    id: Optional[int] = None
+    status: TaskBulkStatus
+    task: Optional[Task] = None
+
+
+class TaskBulkResponse(BaseModel):
+    """Schema for a bulk request response"""
+    results: List[TaskBulkItemResult]
+
+class TaskFileFormat(str, Enum):
+    """Enum for task export and import file formats"""
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class TaskImportError(BaseModel):
+    """Schema for a rejected row of an imported file"""
+    line: int
+    detail: str
+
+
+class TaskImportResult(BaseModel):
+    """Schema for a task import response"""
+    imported: int
+    failed: int
+    # The first TASK_IMPORT_MAX_ERRORS rejected rows
+    errors: List[TaskImportError]
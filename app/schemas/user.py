@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+from sqlalchemy import inspect
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Optional, List
 from .task import Task
 from .category import Category
 
@@ -56,11 +57,46 @@ class User(UserBase):
     """Schema for user response"""
     id: int
     is_active: bool = True
-    tasks: List[Task] = []
-    categories: List[Category] = []
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+    class Config:
+        """Pydantic config"""
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "id": 1,
+                "username": "john_doe",
+                "email": "john@example.com",
+                "full_name": "John Doe",
+                "is_active": True,
+                "created_at": "2024-03-18T10:00:00",
+                "updated_at": "2024-03-18T10:30:00"
+            }
+        }
+
+
+class UserDetail(User):
+    """
+    Schema for user response with the collections requested by ?include=.
+    Only collections already loaded on the model are read, so the others
+    are left unset and omitted with response_model_exclude_unset.
+    """
+    tasks: Optional[List[Task]] = None
+    categories: Optional[List[Category]] = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def loaded_attributes_only(cls, data: Any) -> Any:
+        state = inspect(data, raiseerr=False)
+        if state is None:
+            return data
+        return {
+            name: getattr(data, name)
+            for name in cls.model_fields
+            if name not in state.unloaded and hasattr(data, name)
+        }
+
     class Config:
         """Pydantic config"""
         from_attributes = True
@@ -93,11 +129,9 @@ class UserInDB(User):
                 "full_name": "John Doe",
                 "is_active": True,
                 "hashed_password": "hashedpassword123",
-                "tasks": [],
-                "categories": [],
                 "created_at": "2024-03-18T10:00:00",
                 "updated_at": "2024-03-18T10:30:00"
             }
         }
 
-__all__ = ["UserBase", "UserCreate", "UserUpdate", "User", "UserInDB"]
\ No newline at end of file
+__all__ = ["UserBase", "UserCreate", "UserUpdate", "User", "UserDetail", "UserInDB"]
\ No newline at end of file
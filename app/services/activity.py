@@ -0,0 +1,255 @@
+import asyncio
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models.activity import Activity
+from app.models.user import User
+
+logger = get_logger(__name__)
+
+# Entities
+TASK = "task"
+CATEGORY = "category"
+
+# Actions
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def snapshot(row: Any, fields: Sequence[str]) -> Dict[str, Any]:
+    """Values of `fields` on `row`, as JSON-compatible data."""
+    return {field: _jsonable(getattr(row, field)) for field in fields}
+
+
+def diff(before: Any, after: Any, fields: Sequence[str]) -> Dict[str, List[Any]]:
+    """{field: [old, new]} for the `fields` that differ between two rows."""
+    changes = {}
+    for field in fields:
+        old, new = _jsonable(getattr(before, field)), _jsonable(getattr(after, field))
+        if old != new:
+            changes[field] = [old, new]
+    return changes
+
+
+class ActivityLog:
+    """
+    Change history for tasks and categories, kept off the request path.
+
+    CRUD functions record committed changes into a bounded in-memory queue.
+    A background task writes them as multi-row INSERT batches once a batch
+    holds `batch_size` records or `flush_interval` seconds after its first
+    record, whichever comes first.
+
+    When the queue is full, overflow "drop" discards the record and "block"
+    waits up to `block_timeout` seconds for space before discarding it.
+    `stop()` writes whatever is still queued, so only a crash loses records.
+    Records of a user deleted while they were queued are left out of their
+    batch, as the delete removed that user's history anyway.
+    """
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        overflow: str = "drop",
+        block_timeout: float = 0.1,
+        enabled: bool = True,
+        session_factory: Optional[Callable[[], Any]] = None
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.enabled = enabled
+        self._session_factory = session_factory
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_size)
+        self._task: Optional[asyncio.Task] = None
+        # Batch taken off the queue but not yet written
+        self._pending: List[Dict[str, Any]] = []
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.failed = 0
+        self.orphaned = 0
+
+    async def record(
+        self,
+        owner_id: int,
+        entity: str,
+        entity_id: int,
+        action: str,
+        changes: Dict[str, Any]
+    ) -> None:
+        """Queue one change; never raises, and only waits with the "block" overflow."""
+        if not self.enabled:
+            return
+        row = {
+            "owner_id": owner_id,
+            "entity": entity,
+            "entity_id": entity_id,
+            "action": action,
+            "changes": changes,
+            "created_at": _utcnow(),
+        }
+        try:
+            self._queue.put_nowait(row)
+            return
+        except asyncio.QueueFull:
+            pass
+        if self.overflow == "block":
+            self.blocked += 1
+            try:
+                await asyncio.wait_for(self._queue.put(row), self.block_timeout)
+                return
+            except asyncio.TimeoutError:
+                pass
+        self.dropped += 1
+        if self.dropped == 1 or self.dropped % 1000 == 0:
+            logger.warning(f"Activity log queue full, {self.dropped} records dropped so far")
+
+    async def created(self, entity: str, owner_id: int, rows: Iterable[Any], fields: Sequence[str]) -> None:
+        for row in rows:
+            await self.record(owner_id, entity, row.id, CREATED, snapshot(row, fields))
+
+    async def updated(
+        self,
+        entity: str,
+        owner_id: int,
+        changes: Iterable[Tuple[Any, Any]],
+        fields: Sequence[str]
+    ) -> None:
+        """Record (before, after) row pairs; pairs with no changed field are skipped."""
+        for before, after in changes:
+            changed = diff(before, after, fields)
+            if changed:
+                await self.record(owner_id, entity, after.id, UPDATED, changed)
+
+    async def deleted(self, entity: str, owner_id: int, rows: Iterable[Any], fields: Sequence[str]) -> None:
+        for row in rows:
+            await self.record(owner_id, entity, row.id, DELETED, snapshot(row, fields))
+
+    def start(self) -> None:
+        """Start the background writer on the running event loop."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float) -> None:
+        """Stop the background writer and write every queued record within `timeout` seconds."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        remaining, self._pending = self._pending, []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        if not remaining:
+            return
+        try:
+            await asyncio.wait_for(self._write_all(remaining), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Timed out writing the activity log on shutdown")
+        logger.info(f"Flushed activity log on shutdown: {self.written} records written in total")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._pending.append(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+            while len(self._pending) < self.batch_size:
+                if not self._queue.empty():
+                    self._pending.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._write(self._pending)
+            self._pending = []
+
+    async def _write_all(self, rows: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(rows), self.batch_size):
+            await self._write(rows[start:start + self.batch_size])
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if self._session_factory is None:
+            from app.db.session import AsyncSessionLocal
+            self._session_factory = AsyncSessionLocal
+        try:
+            async with self._session_factory() as db:
+                try:
+                    # One multi-row INSERT ... VALUES per batch
+                    await db.execute(insert(Activity), batch)
+                    await db.commit()
+                except IntegrityError:
+                    # An owner was deleted; write the other owners' records
+                    await db.rollback()
+                    owners = set(await db.scalars(
+                        select(User.id).where(User.id.in_({row["owner_id"] for row in batch}))
+                    ))
+                    kept = [row for row in batch if row["owner_id"] in owners]
+                    if len(kept) == len(batch):
+                        raise
+                    self.orphaned += len(batch) - len(kept)
+                    batch = kept
+                    if not batch:
+                        return
+                    await db.execute(insert(Activity), batch)
+                    await db.commit()
+        except Exception as e:
+            # Dropped rather than retried, so a broken database cannot grow memory
+            self.failed += len(batch)
+            logger.error(f"Error writing {len(batch)} activity log records: {str(e)}")
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "overflow": self.overflow,
+            "queued": self._queue.qsize() + len(self._pending),
+            "max_size": self.max_size,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "failed": self.failed,
+            "orphaned": self.orphaned,
+        }
+
+
+activity_log = ActivityLog(
+    max_size=settings.ACTIVITY_LOG_QUEUE_SIZE,
+    batch_size=settings.ACTIVITY_LOG_BATCH_SIZE,
+    flush_interval=settings.ACTIVITY_LOG_FLUSH_SECONDS,
+    overflow=settings.ACTIVITY_LOG_OVERFLOW,
+    block_timeout=settings.ACTIVITY_LOG_BLOCK_TIMEOUT_SECONDS,
+    enabled=settings.ACTIVITY_LOG_ENABLED,
+)
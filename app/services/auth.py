@@ -0,0 +1,230 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from jose import JWTError, jwt
+from app.core.config import settings
+from app.core.security import verify_token
+from app.core.logging import get_logger
+from app.crud.user import user as crud_user
+from app.models.user import User
+from app.services.cache import CacheBackend, response_cache
+
+logger = get_logger(__name__)
+
+# Cached in place of a version for users that no longer exist
+DELETED = -1
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated identity carried by an access token"""
+    id: int
+    username: str
+    is_active: bool
+    token_version: int
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> Optional["Principal"]:
+        """Build a principal from token claims, None for tokens without them."""
+        try:
+            return cls(
+                id=int(payload["uid"]),
+                username=payload["sub"],
+                is_active=bool(payload["act"]),
+                token_version=int(payload["ver"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            is_active=bool(user.is_active),
+            token_version=user.token_version or 0,
+        )
+
+
+def build_token_claims(user: User) -> Dict[str, Any]:
+    """Claims that let requests authorize without loading the user."""
+    return {
+        "sub": user.username,
+        "uid": user.id,
+        "act": bool(user.is_active),
+        "ver": user.token_version or 0,
+    }
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of verified principals keyed by token hash.
+    Entries live for at most `ttl` seconds and never past the token's `exp`.
+    Saves verifying the signature; revocation is checked by TokenVersions.
+    """
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Principal, float]]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[str]] = {}
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Principal]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        principal, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return principal
+
+    def put(self, token: str, principal: Principal, exp: Optional[float] = None) -> None:
+        ttl = float(self.ttl)
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+        if ttl <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (principal, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        self._keys_by_user.setdefault(principal.id, set()).add(key)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop all cached principals for a user."""
+        for key in self._keys_by_user.pop(user_id, set()):
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_user.clear()
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[0].id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[0].id]
+
+
+class TokenVersions:
+    """
+    Current token version of each user, whose source of truth is
+    users.token_version: a token is only accepted while its `ver` claim
+    matches. Disabling a user, deleting one or changing a username bumps
+    the version, so tokens issued before are rejected by every worker.
+
+    Versions are cached in the response cache backend for `ttl` seconds
+    and read from the database on a miss. Writers store the new version
+    after committing it; with the shared backend every worker sees it
+    at once, with the per-process memory backend other workers within
+    `ttl` seconds.
+    """
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"token_version:{user_id}"
+
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[int]:
+        """The user's token version, None for a deleted user."""
+        try:
+            cached = await self.backend.get(self._key(user_id))
+        except Exception as e:
+            logger.error(f"Error reading token version: {str(e)}")
+            cached = None
+        if cached is not None:
+            version = int(cached)
+        else:
+            version = await db.scalar(select(User.token_version).where(User.id == user_id))
+            version = DELETED if version is None else version
+            await self.set(user_id, version)
+        return None if version == DELETED else version
+
+    async def set(self, user_id: int, version: int) -> None:
+        """Publish a committed version, or DELETED once the user is gone."""
+        try:
+            await self.backend.set(self._key(user_id), str(version).encode(), self.ttl)
+        except Exception as e:
+            # Workers fall back to the database once their entry expires
+            logger.error(f"Error writing token version: {str(e)}")
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+token_versions = TokenVersions(response_cache.backend, ttl=settings.TOKEN_VERSION_CACHE_TTL_SECONDS)
+
+
+async def get_principal(db: AsyncSession, token: str) -> Optional[Principal]:
+    """
+    Resolve a token to a principal, from the cache or the token claims.
+    Only tokens issued without principal claims fall back to a user lookup.
+    Tokens older than the user's current token version are rejected.
+    """
+    principal = principal_cache.get(token)
+    if principal is None:
+        payload = verify_token(token)
+        if payload is None:
+            return None
+        principal = Principal.from_claims(payload)
+        if principal is None:
+            username = payload.get("sub")
+            db_user = await crud_user.get_by_username(db, username=username) if username else None
+            if db_user is None:
+                return None
+            principal = Principal.from_user(db_user)
+        principal_cache.put(token, principal, payload.get("exp"))
+    if principal.token_version != await token_versions.get(db, principal.id):
+        return None
+    return principal
+
+
+def peek_user_id(token: Optional[str]) -> Optional[int]:
+    """
+    User id carried by a token, without verifying it.
+    Only for routing decisions such as replica stickiness, never for auth.
+    """
+    if not token:
+        return None
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal.id
+    try:
+        uid = jwt.get_unverified_claims(token).get("uid")
+        return int(uid) if uid is not None else None
+    except (JWTError, TypeError, ValueError):
+        return None
+
+
+def verified_user_id(token: Optional[str]) -> Optional[int]:
+    """
+    User id of a validly signed token, from the cache or the token claims.
+    Does not check revocation or the database; use get_principal for auth.
+    """
+    if not token:
+        return None
+    principal = principal_cache.get(token)
+    if principal is None:
+        payload = verify_token(token)
+        principal = Principal.from_claims(payload) if payload else None
+    return principal.id if principal else None
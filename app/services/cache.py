@@ -0,0 +1,277 @@
+import hashlib
+import itertools
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Cache scopes, each invalidated independently per user
+TASKS = "tasks"
+CATEGORIES = "categories"
+
+
+class CacheBackend(ABC):
+    """Storage for cached response bodies and per-user generation counters"""
+    name = "base"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def get_generation(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def bump_generation(self, key: str) -> int:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU bounded by the total size of keys and values.
+    Generations are bounded too: a user whose counter was evicted gets a
+    fresh value from a process-wide sequence, never one used before.
+    """
+    name = "memory"
+
+    def __init__(self, max_bytes: int, max_generations: int = 100000):
+        self.max_bytes = max_bytes
+        self.max_generations = max_generations
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._size = 0
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._sequence = itertools.count(1)
+
+    @staticmethod
+    def _entry_size(key: str, value: bytes) -> int:
+        return len(key) + len(value)
+
+    def _pop(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._size -= self._entry_size(key, value)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._pop(key)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._size += size
+        while self._size > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+
+    async def get_generation(self, key: str) -> int:
+        generation = self._generations.get(key)
+        if generation is None:
+            generation = next(self._sequence)
+            self._generations[key] = generation
+            while len(self._generations) > self.max_generations:
+                self._generations.popitem(last=False)
+        self._generations.move_to_end(key)
+        return generation
+
+    async def bump_generation(self, key: str) -> int:
+        self._generations.pop(key, None)
+        return await self.get_generation(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class LocalSharedStore:
+    """
+    In-process stand-in for the subset of the redis.asyncio client the
+    shared backend uses, for development and single-host setups.
+    """
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._live(key)
+
+    async def set(self, key: str, value: Any, ex: Optional[float] = None) -> None:
+        self._data[key] = (value, time.monotonic() + ex if ex else None)
+
+    async def incr(self, key: str) -> int:
+        return self._add(key, 1)
+
+    async def decr(self, key: str) -> int:
+        return self._add(key, -1)
+
+    def _add(self, key: str, amount: int) -> int:
+        value = int(self._live(key) or 0) + amount
+        # Like Redis, INCR and DECR keep the TTL of a live key
+        entry = self._data.get(key)
+        self._data[key] = (value, entry[1] if entry is not None else None)
+        return value
+
+    async def expire(self, key: str, seconds: float) -> None:
+        if self._live(key) is not None:
+            self._data[key] = (self._data[key][0], time.monotonic() + seconds)
+
+
+def create_shared_client(url: str) -> Any:
+    """Client for a shared Redis-compatible server, or the local stand-in for local://."""
+    if url.startswith("local://"):
+        return LocalSharedStore()
+    try:
+        from redis import asyncio as redis
+    except ImportError:
+        raise RuntimeError("Shared backends require the redis package")
+    return redis.from_url(url)
+
+
+class SharedCacheBackend(CacheBackend):
+    """Cache stored in a Redis-compatible server shared by all workers"""
+    name = "shared"
+
+    def __init__(self, client: Any, prefix: str = "todo:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+    async def get_generation(self, key: str) -> int:
+        return int(await self.client.get(self.prefix + "gen:" + key) or 0)
+
+    async def bump_generation(self, key: str) -> int:
+        return await self.client.incr(self.prefix + "gen:" + key)
+
+
+class ResponseCache:
+    """
+    Per-user cache of serialized list responses.
+    Keys embed the user's generation for the scope, so bumping it on every
+    write makes older entries unreachable; they age out of the backend.
+    The generation is read before the query runs, so a response built on
+    the primary from data a concurrent write replaced is stored under the
+    old generation. That does not hold for a replica, which may not have
+    the write yet when the new generation is read, so responses are only
+    stored when built on the primary (see app.api.cache.cached_body).
+    """
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def _generation_key(scope: str, user_id: int) -> str:
+        return f"{scope}:{user_id}"
+
+    async def key(self, scope: str, user_id: int, params: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a user's request, None if the cache is unavailable."""
+        if not self.enabled:
+            return None
+        try:
+            generation = await self.backend.get_generation(self._generation_key(scope, user_id))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error reading cache generation: {str(e)}")
+            return None
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return f"{scope}:{user_id}:{generation}:{digest}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error reading response cache: {str(e)}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        try:
+            await self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error writing response cache: {str(e)}")
+
+    async def invalidate(self, user_id: int, *scopes: str) -> None:
+        """Drop a user's cached responses for the given scopes."""
+        if not self.enabled:
+            return
+        for scope in scopes:
+            try:
+                await self.backend.bump_generation(self._generation_key(scope, user_id))
+            except Exception as e:
+                # Entries still expire after the TTL
+                self.errors += 1
+                logger.error(f"Error invalidating response cache: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            **self.backend.stats(),
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _create_backend() -> CacheBackend:
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_BYTES)
+    return SharedCacheBackend(create_shared_client(settings.RESPONSE_CACHE_URL))
+
+
+response_cache = ResponseCache(
+    _create_backend(),
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
@@ -0,0 +1,347 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# NOTIFY payloads are capped at 8000 bytes; larger id lists are split
+MAX_IDS_PER_EVENT = 500
+
+HEARTBEAT = json.dumps({"type": "heartbeat"}, separators=(",", ":"))
+
+
+class SubscriptionClosed(Exception):
+    """Raised by Subscription.get once the subscription is closed"""
+    pass
+
+
+class Subscription:
+    """
+    One connected client's pending events: a bounded buffer and a wakeup
+    flag, a few hundred bytes per connection. The subscription itself runs
+    no task; the /ws route adds one per connection to notice disconnects.
+
+    A client that falls `max_size` events behind is a slow consumer: it is
+    closed rather than buffered without bound, and resyncs on reconnect.
+    """
+    def __init__(self, user_id: int, max_size: int):
+        self.user_id = user_id
+        self.max_size = max_size
+        self.closed = False
+        self.reason: Optional[str] = None
+        self._messages: Deque[str] = deque()
+        self._ready = asyncio.Event()
+
+    def put(self, message: str) -> bool:
+        """Buffer a serialized event; False if the subscription is or gets closed."""
+        if self.closed:
+            return False
+        if len(self._messages) >= self.max_size:
+            self.close("slow consumer")
+            return False
+        self._messages.append(message)
+        self._ready.set()
+        return True
+
+    def close(self, reason: str) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.reason = reason
+        self._messages.clear()
+        self._ready.set()
+
+    async def get(self, timeout: float) -> Optional[str]:
+        """Next event, or None after `timeout` seconds without one."""
+        if not self._messages and not self.closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.closed:
+            raise SubscriptionClosed(self.reason)
+        message = self._messages.popleft()
+        if not self._messages:
+            self._ready.clear()
+        return message
+
+
+class EventBackend(ABC):
+    """Carries published events to the brokers of every worker"""
+    name = "base"
+
+    @abstractmethod
+    async def start(self, deliver: Callable[[int, str], None]) -> None:
+        """Start passing received (user_id, message) events to `deliver`."""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        ...
+
+    @abstractmethod
+    def publish(self, user_id: int, message: str) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class MemoryEventBackend(EventBackend):
+    """Delivers within this process only; for a single worker."""
+    name = "memory"
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[int, str], None]] = None
+
+    async def start(self, deliver: Callable[[int, str], None]) -> None:
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+    def publish(self, user_id: int, message: str) -> None:
+        if self._deliver is not None:
+            self._deliver(user_id, message)
+
+
+class PostgresEventBackend(EventBackend):
+    """
+    Fans events out to every worker through Postgres LISTEN/NOTIFY.
+
+    Each worker holds two dedicated connections outside the request pool:
+    one LISTENs on `channel`, the other sends queued events as batches of
+    pg_notify calls, so publishing never waits on the database. A worker
+    receives its own notifications too, which is how local clients get
+    events. Both connections reconnect after errors. Events published
+    while the listener is down are missed; clients catch up through sync.
+    """
+    name = "postgres"
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        max_pending: int = 10000,
+        batch_size: int = 100,
+        reconnect_interval: float = 1.0
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.reconnect_interval = reconnect_interval
+        self._deliver: Optional[Callable[[int, str], None]] = None
+        self._outbox: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue(maxsize=max_pending)
+        self._tasks: List[asyncio.Task] = []
+        self.listening = False
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self.errors = 0
+
+    async def _connect(self) -> Any:
+        import asyncpg
+        return await asyncpg.connect(self.dsn)
+
+    async def start(self, deliver: Callable[[int, str], None]) -> None:
+        self._deliver = deliver
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._send())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._deliver = None
+
+    def publish(self, user_id: int, message: str) -> None:
+        try:
+            self._outbox.put_nowait((self.channel, f"{user_id}:{message}"))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Event outbox full, {self.dropped} events dropped so far")
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        user_id, _, message = payload.partition(":")
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            return
+        self.received += 1
+        if self._deliver is not None:
+            self._deliver(user_id, message)
+
+    async def _listen(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await self._connect()
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self.channel, self._on_notification)
+                self.listening = True
+                logger.info(f"Listening for events on channel {self.channel}")
+                await lost.wait()
+                logger.warning("Event listener connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Event listener error: {str(e)}")
+            finally:
+                self.listening = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_interval)
+
+    async def _send(self) -> None:
+        connection = None
+        batch: List[Tuple[str, str]] = []
+        try:
+            while True:
+                if not batch:
+                    batch.append(await self._outbox.get())
+                    while len(batch) < self.batch_size and not self._outbox.empty():
+                        batch.append(self._outbox.get_nowait())
+                try:
+                    if connection is None or connection.is_closed():
+                        connection = await self._connect()
+                    await connection.executemany("SELECT pg_notify($1, $2)", batch)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Error sending {len(batch)} events: {str(e)}")
+                    connection = None
+                    await asyncio.sleep(self.reconnect_interval)
+                    continue
+                self.sent += len(batch)
+                batch = []
+        finally:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "listening": self.listening,
+            "pending": self._outbox.qsize(),
+            "sent": self.sent,
+            "received": self.received,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+class EventBroker:
+    """
+    Pushes task and category change events to each user's connected clients.
+
+    CRUD functions publish after commit; events name what changed, not the
+    new values, and clients fetch those through sync. Subscriptions are
+    kept in a per-user registry, so publishing costs one dict lookup when
+    the user has no clients on this worker, and an event is serialized
+    once however many clients receive it.
+    """
+    def __init__(
+        self,
+        backend: EventBackend,
+        queue_size: int,
+        max_subscriptions: int,
+        enabled: bool = True
+    ):
+        self.backend = backend
+        self.queue_size = queue_size
+        self.max_subscriptions = max_subscriptions
+        self.enabled = enabled
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._count = 0
+        self.published = 0
+        self.delivered = 0
+        self.slow_consumers = 0
+
+    def subscribe(self, user_id: int) -> Optional[Subscription]:
+        """Register a client; None when this worker is at capacity."""
+        if self._count >= self.max_subscriptions:
+            return None
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        self._count -= 1
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+        subscription.close("unsubscribed")
+
+    def publish(self, user_id: int, entity: str, action: str, ids: Iterable[int]) -> None:
+        """Announce that rows of `entity` with `ids` were `action`ed; never blocks."""
+        if not self.enabled:
+            return
+        ids = list(ids)
+        for start in range(0, len(ids), MAX_IDS_PER_EVENT):
+            message = json.dumps(
+                {"type": f"{entity}.{action}", "ids": ids[start:start + MAX_IDS_PER_EVENT]},
+                separators=(",", ":")
+            )
+            self.published += 1
+            self.backend.publish(user_id, message)
+
+    def _deliver(self, user_id: int, message: str) -> None:
+        subscriptions = self._subscriptions.get(user_id)
+        if not subscriptions:
+            return
+        for subscription in list(subscriptions):
+            if subscription.put(message):
+                self.delivered += 1
+            else:
+                self.slow_consumers += 1
+                self.unsubscribe(subscription)
+
+    async def start(self) -> None:
+        if self.enabled:
+            await self.backend.start(self._deliver)
+
+    async def stop(self) -> None:
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                subscription.close("shutdown")
+        if self.enabled:
+            await self.backend.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.backend.stats(),
+            "enabled": self.enabled,
+            "subscriptions": self._count,
+            "users": len(self._subscriptions),
+            "published": self.published,
+            "delivered": self.delivered,
+            "slow_consumers": self.slow_consumers,
+        }
+
+
+def _create_backend() -> EventBackend:
+    if settings.EVENTS_BACKEND == "memory":
+        return MemoryEventBackend()
+    return PostgresEventBackend(settings.DATABASE_URL, settings.EVENTS_CHANNEL)
+
+
+event_broker = EventBroker(
+    _create_backend(),
+    queue_size=settings.EVENTS_QUEUE_SIZE,
+    max_subscriptions=settings.EVENTS_MAX_SUBSCRIPTIONS,
+    enabled=settings.EVENTS_ENABLED,
+)
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Latency histogram buckets in seconds; 0.2 matches the p95 target
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route label of requests no route matched, so unknown URLs add no series
+UNMATCHED = "unmatched"
+
+RouteKey = Tuple[str, str]
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class RequestMetrics:
+    """
+    Per-route request latency histograms, status counts and in-flight gauge
+    for one worker.
+
+    Everything is updated from the event loop thread, so plain dict and
+    list increments need no locks. Histograms keep per-bucket counts;
+    cumulative counts are only computed when rendering.
+
+    With several workers, each one writes a snapshot to `multiprocess_dir`
+    every `flush_interval` seconds, and /metrics sums the snapshots of all
+    workers. Counters of exited workers are kept so totals never go down;
+    their in-flight gauges are dropped.
+    """
+    def __init__(self, multiprocess_dir: Optional[str] = None, flush_interval: float = 5.0):
+        self.multiprocess_dir = Path(multiprocess_dir) if multiprocess_dir else None
+        self.flush_interval = flush_interval
+        self.pid = os.getpid()
+        # (method, route) -> [count per bucket..., count above the last bucket]
+        self._buckets: Dict[RouteKey, List[int]] = {}
+        self._sums: Dict[RouteKey, float] = {}
+        self._statuses: Dict[Tuple[str, str, int], int] = {}
+        self.in_flight = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route)
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            buckets = self._buckets[key] = [0] * (len(BUCKETS) + 1)
+            self._sums[key] = 0.0
+        buckets[bisect_left(BUCKETS, seconds)] += 1
+        self._sums[key] += seconds
+        status_key = (method, route, status)
+        self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "pid": self.pid,
+            "histograms": [[method, route, buckets, self._sums[(method, route)]]
+                           for (method, route), buckets in self._buckets.items()],
+            "statuses": [[method, route, status, count]
+                         for (method, route, status), count in self._statuses.items()],
+            "in_flight": self.in_flight,
+        }
+
+    # Multi-worker aggregation
+
+    def _snapshot_path(self, pid: int) -> Path:
+        return self.multiprocess_dir / f"{pid}.json"
+
+    def write_snapshot(self) -> None:
+        if self.multiprocess_dir is None:
+            return
+        self.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+        path = self._snapshot_path(self.pid)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot(), separators=(",", ":")))
+        # Readers never see a partly written file
+        os.replace(tmp, path)
+
+    def _other_snapshots(self) -> Iterable[Dict[str, Any]]:
+        if self.multiprocess_dir is None or not self.multiprocess_dir.is_dir():
+            return
+        for path in self.multiprocess_dir.glob("*.json"):
+            if path.stem == str(self.pid):
+                continue
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if not _is_alive(snapshot.get("pid", 0)):
+                snapshot["in_flight"] = 0
+            yield snapshot
+
+    def collect(self) -> Dict[str, Any]:
+        """This worker's live metrics plus the latest snapshots of the others."""
+        buckets: Dict[RouteKey, List[int]] = {}
+        sums: Dict[RouteKey, float] = {}
+        statuses: Dict[Tuple[str, str, int], int] = {}
+        in_flight, workers = 0, 0
+        for snapshot in [self.snapshot(), *self._other_snapshots()]:
+            workers += 1
+            in_flight += snapshot["in_flight"]
+            for method, route, counts, total in snapshot["histograms"]:
+                key = (method, route)
+                merged = buckets.setdefault(key, [0] * len(counts))
+                for index, count in enumerate(counts):
+                    merged[index] += count
+                sums[key] = sums.get(key, 0.0) + total
+            for method, route, status, count in snapshot["statuses"]:
+                statuses[(method, route, status)] = statuses.get((method, route, status), 0) + count
+        return {"buckets": buckets, "sums": sums, "statuses": statuses, "in_flight": in_flight, "workers": workers}
+
+    def render(self) -> str:
+        """All workers' metrics in the Prometheus text exposition format."""
+        data = self.collect()
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), counts in sorted(data["buckets"].items()):
+            labels = f'method="{_label(method)}",route="{_label(route)}"'
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, float("inf")), counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{_format_float(bound)}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {data['sums'][(method, route)]}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+        lines += [
+            "# HELP http_requests_total Requests by route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(data["statuses"].items()):
+            lines.append(
+                f'http_requests_total{{method="{_label(method)}",route="{_label(route)}",status="{status}"}} {count}'
+            )
+        lines += [
+            "# HELP http_requests_in_flight Requests being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {data['in_flight']}",
+            "# HELP http_metrics_workers Workers whose metrics are included.",
+            "# TYPE http_metrics_workers gauge",
+            f"http_metrics_workers {data['workers']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def start(self) -> None:
+        """Start writing snapshots for the other workers, in multi-worker mode."""
+        # Workers are forked after import; take the pid of the serving process
+        self.pid = os.getpid()
+        if self.multiprocess_dir is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.multiprocess_dir is not None:
+            # Final counts stay in the totals after this worker exits
+            self.in_flight = 0
+            self.write_snapshot()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logger.error(f"Error writing metrics snapshot: {str(e)}")
+            await asyncio.sleep(self.flush_interval)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+request_metrics = RequestMetrics(
+    multiprocess_dir=settings.METRICS_MULTIPROCESS_DIR or None,
+    flush_interval=settings.METRICS_FLUSH_SECONDS,
+)
@@ -0,0 +1,140 @@
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.cache import create_shared_client
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of one rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def _sliding_window(
+    limit: int,
+    window: float,
+    elapsed: float,
+    previous: int,
+    current: int
+) -> RateLimitResult:
+    """
+    Sliding-window counter: the previous window's count is weighted by how
+    much of it still overlaps the last `window` seconds. `current` already
+    includes the request being checked.
+    """
+    estimate = previous * (window - elapsed) / window + current
+    reset_after = window - elapsed
+    if estimate <= limit:
+        return RateLimitResult(True, limit, int(limit - estimate), reset_after)
+    if previous and current <= limit:
+        # Wait until enough of the previous window has slid out
+        retry_after = window * (1 - (limit - current) / previous) - elapsed
+    else:
+        retry_after = reset_after
+    return RateLimitResult(False, limit, 0, reset_after, retry_after)
+
+
+class MemoryRateLimitBackend:
+    """
+    In-process sliding-window counters, O(1) per check. Like every backend,
+    it counts allowed requests only, so a client retrying while limited
+    gets through again as the window slides.
+    Checks never await, so they are atomic on the event loop without a lock.
+    Keys idle for two windows hold no state and are evicted, and the number
+    of tracked keys is capped at `max_keys`.
+    """
+    name = "memory"
+
+    def __init__(self, window: float, max_keys: int):
+        self.window = window
+        self.max_keys = max_keys
+        # key -> [window start, previous window count, current window count]
+        self._counters: "OrderedDict[str, List[Any]]" = OrderedDict()
+
+    async def hit(self, key: str, limit: int) -> RateLimitResult:
+        now = time.monotonic()
+        start = now - now % self.window
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = [start, 0, 0]
+        elif counter[0] != start:
+            adjacent = start - counter[0] <= self.window * 1.5
+            counter[:] = [start, counter[2] if adjacent else 0, 0]
+        self._counters.move_to_end(key)
+
+        result = _sliding_window(limit, self.window, now - start, counter[1], counter[2] + 1)
+        if result.allowed:
+            counter[2] += 1
+        self._evict(start)
+        return result
+
+    def _evict(self, start: float) -> None:
+        while self._counters:
+            oldest_key = next(iter(self._counters))
+            idle = self._counters[oldest_key][0] < start - self.window
+            if not idle and len(self._counters) <= self.max_keys:
+                break
+            del self._counters[oldest_key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "keys": len(self._counters)}
+
+
+class SharedRateLimitBackend:
+    """
+    Sliding-window counters in a Redis-compatible server shared by all
+    workers. Each check increments the current window's counter and
+    decrements it again if the request is rejected, so only allowed
+    requests are counted, as with the memory backend.
+    """
+    name = "shared"
+
+    def __init__(self, client: Any, window: float, prefix: str = "todo:ratelimit:"):
+        self.client = client
+        self.window = window
+        self.prefix = prefix
+
+    async def hit(self, key: str, limit: int) -> RateLimitResult:
+        now = time.time()
+        index = int(now // self.window)
+        current_key = f"{self.prefix}{key}:{index}"
+        current = await self.client.incr(current_key)
+        if current == 1:
+            await self.client.expire(current_key, math.ceil(self.window * 2))
+        previous = int(await self.client.get(f"{self.prefix}{key}:{index - 1}") or 0)
+        result = _sliding_window(limit, self.window, now - index * self.window, previous, current)
+        if not result.allowed:
+            await self.client.decr(current_key)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+def create_rate_limit_backend() -> Any:
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryRateLimitBackend(settings.RATE_LIMIT_WINDOW_SECONDS, settings.RATE_LIMIT_MAX_KEYS)
+    return SharedRateLimitBackend(
+        create_shared_client(settings.RATE_LIMIT_URL),
+        settings.RATE_LIMIT_WINDOW_SECONDS
+    )
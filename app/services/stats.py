@@ -0,0 +1,271 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import String, case, cast, delete, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.logging import get_logger, setup_logging
+from app.models.base import utcnow
+from app.models.task import Task
+from app.models.task_stat import TaskStat
+from app.models.user import User
+
+logger = get_logger(__name__)
+
+# Counter dimensions
+TOTAL = "total"
+STATUS = "status"
+PRIORITY = "priority"
+CATEGORY = "category"
+COMPLETED = "completed"
+COMPLETED_WEEK = "completed_week"
+
+ALL = "all"
+NO_CATEGORY = "none"
+
+# Task columns the counters are derived from
+STATS_COLUMNS = ("status", "priority", "category_id", "completed", "completed_at")
+
+StatKey = Tuple[str, str]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def week_start(value: datetime) -> datetime:
+    """Midnight on the Monday of `value`'s week, as Postgres date_trunc('week')."""
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day - timedelta(days=day.weekday())
+
+
+def _value(value: Any) -> str:
+    return str(getattr(value, "value", value))
+
+
+def task_stat_keys(task: Any, current_week: str) -> List[StatKey]:
+    """Counters one task contributes to; `task` has the STATS_COLUMNS attributes."""
+    keys = [
+        (TOTAL, ALL),
+        (STATUS, _value(task.status)),
+        (PRIORITY, _value(task.priority)),
+        (CATEGORY, str(task.category_id) if task.category_id is not None else NO_CATEGORY),
+        (COMPLETED, "true" if task.completed else "false"),
+    ]
+    # Only the current week is read, so older weeks are not maintained
+    if task.completed and task.completed_at is not None:
+        week = week_start(task.completed_at).date().isoformat()
+        if week == current_week:
+            keys.append((COMPLETED_WEEK, week))
+    return keys
+
+
+def task_stat_deltas(before: Iterable[Any], after: Iterable[Any], current_week: str) -> Dict[StatKey, int]:
+    """Non-zero counter changes from replacing task states `before` with `after`."""
+    delta: Counter = Counter()
+    for task in after:
+        delta.update(task_stat_keys(task, current_week))
+    for task in before:
+        delta.subtract(task_stat_keys(task, current_week))
+    return {key: count for key, count in delta.items() if count}
+
+
+async def record_task_changes(
+    db: AsyncSession,
+    user_id: int,
+    before: Iterable[Any] = (),
+    after: Iterable[Any] = ()
+) -> None:
+    """
+    Apply the counter deltas between task states `before` and `after` a write,
+    in the caller's transaction. Commit together with the write.
+    """
+    rows = [
+        {"owner_id": user_id, "dimension": dimension, "key": key, "count": count}
+        for (dimension, key), count in task_stat_deltas(before, after, current_week()).items()
+    ]
+    if not rows:
+        return
+    stmt = insert(TaskStat).values(rows)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[TaskStat.owner_id, TaskStat.dimension, TaskStat.key],
+        set_={"count": TaskStat.count + stmt.excluded.count}
+    ))
+
+
+async def move_category_to_none(db: AsyncSession, user_id: int, category_id: int) -> None:
+    """Move a deleted category's count to uncategorized, as its tasks were."""
+    count = await db.scalar(
+        delete(TaskStat)
+        .where(
+            TaskStat.owner_id == user_id,
+            TaskStat.dimension == CATEGORY,
+            TaskStat.key == str(category_id)
+        )
+        .returning(TaskStat.count)
+        .execution_options(synchronize_session=False)
+    )
+    if count:
+        stmt = insert(TaskStat).values(owner_id=user_id, dimension=CATEGORY, key=NO_CATEGORY, count=count)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[TaskStat.owner_id, TaskStat.dimension, TaskStat.key],
+            set_={"count": TaskStat.count + stmt.excluded.count}
+        ))
+
+
+def current_week() -> str:
+    """Start date of the current week, the key of the completed-this-week counter."""
+    return week_start(_utcnow()).date().isoformat()
+
+
+def _overdue(user_id: int):
+    return (
+        select(func.count())
+        .select_from(Task)
+        .where(
+            Task.owner_id == user_id,
+            Task.deleted_at.is_(None),
+            Task.due_date < utcnow(),
+            Task.completed.is_not(True)
+        )
+        .scalar_subquery()
+    )
+
+
+async def count_overdue(db: AsyncSession, user_id: int) -> int:
+    """Open tasks past their due date, read from the (owner_id, due_date) index."""
+    return await db.scalar(select(_overdue(user_id)))
+
+
+async def get_task_stats(db: AsyncSession, user_id: int) -> Dict[str, Any]:
+    """
+    Task statistics for a user in one round trip.
+    Everything comes from the counter table except the overdue count, which
+    depends on the clock; it is read from the (owner_id, due_date) index.
+    """
+    overdue = _overdue(user_id)
+    stmt = union_all(
+        select(TaskStat.dimension, TaskStat.key, TaskStat.count).where(TaskStat.owner_id == user_id),
+        select(literal("overdue", String), literal(ALL, String), overdue)
+    )
+    week = current_week()
+    stats: Dict[str, Any] = {
+        "total": 0,
+        "completed": 0,
+        "overdue": 0,
+        "completed_this_week": 0,
+        "by_status": {},
+        "by_priority": {},
+        "by_category": {},
+    }
+    for dimension, key, count in (await db.execute(stmt)).all():
+        if not count:
+            continue
+        if dimension == TOTAL:
+            stats["total"] = count
+        elif dimension == "overdue":
+            stats["overdue"] = count
+        elif dimension == COMPLETED and key == "true":
+            stats["completed"] = count
+        elif dimension == COMPLETED_WEEK and key == week:
+            stats["completed_this_week"] = count
+        elif dimension in (STATUS, PRIORITY, CATEGORY):
+            stats[f"by_{dimension}"][key] = count
+    return stats
+
+
+def _rebuild_source(user_ids: Sequence[int], current_week: datetime):
+    """SELECT producing every counter row for `user_ids` from the tasks table."""
+    def grouped(dimension: str, key, *criteria):
+        return (
+            select(Task.owner_id, literal(dimension, String), key, func.count())
+            .where(Task.owner_id.in_(user_ids), Task.deleted_at.is_(None), *criteria)
+            .group_by(Task.owner_id, key)
+        )
+
+    def per_owner(dimension: str, key: str, *criteria):
+        # Constant keys stay out of GROUP BY, which rejects non-integer constants
+        return (
+            select(Task.owner_id, literal(dimension, String), literal(key, String), func.count())
+            .where(Task.owner_id.in_(user_ids), Task.deleted_at.is_(None), *criteria)
+            .group_by(Task.owner_id)
+        )
+
+    return union_all(
+        per_owner(TOTAL, ALL),
+        grouped(STATUS, Task.status),
+        grouped(PRIORITY, Task.priority),
+        grouped(CATEGORY, func.coalesce(cast(Task.category_id, String), NO_CATEGORY)),
+        grouped(COMPLETED, case((Task.completed.is_(True), "true"), else_="false")),
+        per_owner(
+            COMPLETED_WEEK,
+            current_week.date().isoformat(),
+            Task.completed.is_(True),
+            Task.completed_at >= current_week
+        ),
+    )
+
+
+async def rebuild_task_stats(db: AsyncSession, user_ids: Sequence[int]) -> None:
+    """Recompute the counters of `user_ids` from scratch, in the caller's transaction."""
+    await db.execute(
+        delete(TaskStat)
+        .where(TaskStat.owner_id.in_(user_ids))
+        .execution_options(synchronize_session=False)
+    )
+    stmt = insert(TaskStat).from_select(
+        ["owner_id", "dimension", "key", "count"],
+        _rebuild_source(user_ids, week_start(_utcnow()))
+    )
+    # A write racing the rebuild may have re-created a row; the rebuilt count wins
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[TaskStat.owner_id, TaskStat.dimension, TaskStat.key],
+        set_={"count": stmt.excluded.count}
+    ))
+
+
+async def reconcile_task_stats(batch_size: Optional[int] = None) -> int:
+    """
+    Rebuild every user's counters, `batch_size` users per transaction so
+    locks on the counter table stay short. Returns the number of users.
+    Fixes drift from writes that raced an earlier rebuild.
+    """
+    from app.db.session import AsyncSessionLocal
+
+    batch_size = batch_size or settings.TASK_STATS_RECONCILE_BATCH_SIZE
+    last_id, reconciled = 0, 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            user_ids = list((await db.scalars(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+            )).all())
+            if not user_ids:
+                break
+            try:
+                await rebuild_task_stats(db, user_ids)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Error reconciling task stats: {str(e)}")
+                raise
+        last_id = user_ids[-1]
+        reconciled += len(user_ids)
+    logger.info(f"Reconciled task stats for {reconciled} users")
+    return reconciled
+
+
+async def run_periodic_reconciliation(interval: float) -> None:
+    """Reconcile task stats every `interval` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reconcile_task_stats()
+        except Exception as e:
+            logger.error(f"Task stats reconciliation failed: {str(e)}")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(reconcile_task_stats())
@@ -0,0 +1,205 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.logging import get_logger, setup_logging
+from app.models.base import utcnow
+from app.models.category import Category
+from app.models.change_counter import ChangeCounter
+from app.models.task import Task
+
+logger = get_logger(__name__)
+
+# Keyset position in one table's change feed: (change_seq, id)
+Position = Tuple[int, int]
+START: Position = (0, 0)
+
+
+def next_change_seq(user_id: int):
+    """
+    Scalar subquery handing out the user's next change sequence number,
+    for the change_seq column of a write.
+
+    The counter row stays locked until the write commits, so a user's
+    writes get their numbers in commit order and a sync that has seen
+    number N can never later find a smaller one committed.
+    """
+    stmt = insert(ChangeCounter).values(owner_id=user_id, seq=1)
+    bump = (
+        stmt.on_conflict_do_update(
+            index_elements=[ChangeCounter.owner_id],
+            set_={"seq": ChangeCounter.seq + 1}
+        )
+        .returning(ChangeCounter.seq)
+        .cte("next_change_seq")
+    )
+    return select(bump.c.seq).scalar_subquery()
+
+
+def tombstone_values(user_id: int) -> Dict[str, Any]:
+    """SET values turning a row into a tombstone."""
+    return {"deleted_at": utcnow(), "change_seq": next_change_seq(user_id)}
+
+
+async def _changed(
+    db: AsyncSession,
+    model: Any,
+    user_id: int,
+    after: Position,
+    limit: int
+) -> List[Any]:
+    seq, last_id = after
+    result = await db.scalars(
+        select(model)
+        .where(
+            model.owner_id == user_id,
+            # The plain bound lets the (owner_id, change_seq) index do the range scan
+            model.change_seq >= seq,
+            tuple_(model.change_seq, model.id) > tuple_(seq, last_id)
+        )
+        .order_by(model.change_seq, model.id)
+        .limit(limit)
+    )
+    return list(result.all())
+
+
+def _next_position(rows: List[Any], after: Position, current: int, limit: int) -> Position:
+    """Position after a page of `rows`, fetched with one extra row to detect more."""
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        return (last.change_seq, last.id)
+    if rows:
+        after = (rows[-1].change_seq, rows[-1].id)
+    # Caught up: the next change to this table is numbered above `current`
+    return max(after, (current, 0))
+
+
+async def get_changes(
+    db: AsyncSession,
+    user_id: int,
+    since: Optional[Tuple[Position, Position]],
+    limit: int
+) -> Dict[str, Any]:
+    """
+    Tasks and categories changed after the (tasks, categories) positions in
+    `since`, at most `limit` of each, oldest change first; everything when
+    `since` is None. Tombstones are included as deletions.
+
+    If tombstones newer than `since` have been compacted, the client cannot
+    be brought up to date incrementally: `reset` is set and the changes
+    start over from the beginning.
+
+    A table whose changes all fit in the page moves up to the user's
+    current sequence number, so a table that rarely changes, e.g.
+    categories, keeps up with compaction instead of forcing resets.
+    """
+    tasks_after, categories_after = since or (START, START)
+    # Read before the tables: every change numbered up to `current` is committed by then
+    counter = (await db.execute(
+        select(ChangeCounter.seq, ChangeCounter.compacted_seq).where(ChangeCounter.owner_id == user_id)
+    )).first()
+    current, compacted_seq = counter or (0, 0)
+    reset = since is not None and min(tasks_after[0], categories_after[0]) < compacted_seq
+    if reset:
+        tasks_after = categories_after = START
+
+    tasks = await _changed(db, Task, user_id, tasks_after, limit + 1)
+    categories = await _changed(db, Category, user_id, categories_after, limit + 1)
+    has_more = len(tasks) > limit or len(categories) > limit
+    tasks_after = _next_position(tasks, tasks_after, current, limit)
+    categories_after = _next_position(categories, categories_after, current, limit)
+    tasks, categories = tasks[:limit], categories[:limit]
+    return {
+        "tasks": tasks,
+        "categories": categories,
+        "tasks_after": tasks_after,
+        "categories_after": categories_after,
+        "has_more": has_more,
+        "reset": reset,
+    }
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def _compact_batch(db: AsyncSession, model: Any, cutoff: datetime, batch_size: int) -> int:
+    """Purge one batch of old tombstones and record the highest purged sequence per owner."""
+    batch = (
+        select(model.id)
+        .where(model.deleted_at < cutoff)
+        .order_by(model.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    rows = (await db.execute(
+        delete(model)
+        .where(model.id.in_(batch.scalar_subquery()))
+        .returning(model.owner_id, model.change_seq)
+        .execution_options(synchronize_session=False)
+    )).all()
+    if not rows:
+        return 0
+    compacted: Dict[int, int] = defaultdict(int)
+    for owner_id, change_seq in rows:
+        compacted[owner_id] = max(compacted[owner_id], change_seq)
+    stmt = insert(ChangeCounter).values([
+        {"owner_id": owner_id, "compacted_seq": change_seq}
+        for owner_id, change_seq in sorted(compacted.items())
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[ChangeCounter.owner_id],
+        set_={"compacted_seq": func.greatest(ChangeCounter.compacted_seq, stmt.excluded.compacted_seq)}
+    ))
+    return len(rows)
+
+
+async def compact_tombstones(
+    retention: Optional[timedelta] = None,
+    batch_size: Optional[int] = None
+) -> int:
+    """
+    Permanently delete tombstones older than `retention`, `batch_size` rows
+    per transaction. Clients whose sync token predates a purged tombstone
+    are told to resync from scratch. Returns the number of rows purged.
+    """
+    from app.db.session import AsyncSessionLocal
+
+    retention = retention or timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    batch_size = batch_size or settings.SYNC_COMPACT_BATCH_SIZE
+    cutoff = _utcnow() - retention
+    purged = 0
+    for model in (Task, Category):
+        while True:
+            async with AsyncSessionLocal() as db:
+                try:
+                    count = await _compact_batch(db, model, cutoff, batch_size)
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"Error compacting {model.__tablename__} tombstones: {str(e)}")
+                    raise
+            purged += count
+            if count < batch_size:
+                break
+    logger.info(f"Compacted {purged} tombstones older than {retention}")
+    return purged
+
+
+async def run_periodic_compaction(interval: float) -> None:
+    """Compact tombstones every `interval` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await compact_tombstones()
+        except Exception as e:
+            logger.error(f"Tombstone compaction failed: {str(e)}")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(compact_tombstones())
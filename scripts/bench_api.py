@@ -0,0 +1,402 @@
+"""
+Load test of the API endpoints with machine-readable results.
+
+Seeds the configured Postgres database with bench users, categories and
+tasks (--seed), then runs --clients concurrent clients for --duration
+seconds. Each client logs in as its own bench user through /auth/token
+and then loops over a weighted mix of task listing, category listing,
+toggling and updating tasks, and logging in again. Latencies are recorded per endpoint
+template, excluding the first --warmup seconds.
+
+Runs the app in-process by default, with rate limiting off and its
+startup and shutdown handlers run around the test; client and app then
+share one event loop, so client overhead counts towards latency. Pass
+--url to load a running server instead, e.g. uvicorn with several
+workers and RATE_LIMIT_ENABLED=false.
+
+Writes p50/p95/p99 latency and requests per second per endpoint as JSON
+to --output, and a summary table to stderr. With --baseline, each
+endpoint is compared with an earlier result file, and the exit status
+is 1 if any p95 rose or any throughput fell by more than --tolerance.
+
+The schema relies on Postgres (full text search, upserts), so SQLite is
+not supported; point DATABASE_NAME at a scratch database, e.g. todo_bench.
+Re-seeding replaces only the bench_* users and their data.
+
+Usage: python -m scripts.bench_api --seed [--users 50] [--tasks-per-user 200]
+       [--categories-per-user 5] [--clients 20] [--duration 30] [--url URL]
+       [--output bench_api.json] [--baseline baseline.json] [--tolerance 0.1]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+USERNAME_PREFIX = "bench_user_"
+PASSWORD = "Bench123!"
+PRIORITIES = ("low", "medium", "high")
+STATUSES = ("todo", "in_progress", "completed")
+
+# Operations of the client loop and their default weights
+WEIGHTS = {
+    "list_tasks": 45,
+    "list_categories": 15,
+    "toggle_task": 20,
+    "update_task": 20,
+    # Hashes a password, so a little goes a long way
+    "login": 2,
+}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def seed(users: int, tasks_per_user: int, categories_per_user: int, rng: random.Random) -> None:
+    """Create, migrate and fill the database; replaces earlier bench users."""
+    from sqlalchemy import delete, insert
+    from app.core.security import get_password_hash
+    from app.db.init_db import initialize
+    from app.db.session import AsyncSessionLocal
+    from app.models import Category, ChangeCounter, Task, User
+    from app.services.stats import rebuild_task_stats
+
+    await initialize(seed=False)
+    # Every bench user shares one password, so it is hashed once
+    hashed_password = get_password_hash(PASSWORD)
+    now = _utcnow()
+    started = time.perf_counter()
+
+    async with AsyncSessionLocal() as db:
+        # Cascades to their tasks, categories, counters and activity
+        await db.execute(delete(User).where(User.username.like(f"{USERNAME_PREFIX}%")))
+        user_ids = list(await db.scalars(
+            insert(User).returning(User.id),
+            [
+                {
+                    "username": f"{USERNAME_PREFIX}{n}",
+                    "email": f"{USERNAME_PREFIX}{n}@bench.example.com",
+                    "full_name": f"Bench User {n}",
+                    "hashed_password": hashed_password,
+                    "is_active": True,
+                }
+                for n in range(users)
+            ]
+        ))
+
+        categories: Dict[int, List[int]] = {user_id: [] for user_id in user_ids}
+        if categories_per_user:
+            rows = await db.execute(
+                insert(Category).returning(Category.id, Category.owner_id),
+                [
+                    {
+                        "name": f"Category {n}",
+                        "color": f"#{rng.randrange(0x1000000):06x}",
+                        "owner_id": user_id,
+                        "change_seq": n + 1,
+                    }
+                    for user_id in user_ids
+                    for n in range(categories_per_user)
+                ]
+            )
+            for category_id, owner_id in rows:
+                categories[owner_id].append(category_id)
+
+        for user_id in user_ids:
+            tasks = []
+            for n in range(tasks_per_user):
+                status = rng.choice(STATUSES)
+                tasks.append({
+                    "title": f"Task {n}",
+                    "description": f"Bench task {n} of user {user_id}",
+                    "priority": rng.choice(PRIORITIES),
+                    "status": status,
+                    "completed": status == "completed",
+                    "completed_at": now - timedelta(days=rng.randrange(30)) if status == "completed" else None,
+                    "due_date": now + timedelta(days=rng.randrange(-10, 60)) if rng.random() < 0.7 else None,
+                    "category_id": rng.choice(categories[user_id]) if categories[user_id] and rng.random() < 0.8 else None,
+                    "owner_id": user_id,
+                    "change_seq": categories_per_user + n + 1,
+                })
+            if tasks:
+                await db.execute(insert(Task), tasks)
+
+        await db.execute(insert(ChangeCounter), [
+            {"owner_id": user_id, "seq": categories_per_user + tasks_per_user}
+            for user_id in user_ids
+        ])
+        await rebuild_task_stats(db, user_ids)
+        await db.commit()
+
+    print(
+        f"Seeded {users} users x {tasks_per_user} tasks x {categories_per_user} categories "
+        f"in {time.perf_counter() - started:.1f} s",
+        file=sys.stderr
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: Any) -> AsyncIterator[None]:
+    """Run the app's startup and shutdown handlers through the ASGI lifespan protocol."""
+    events: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    replies: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    task = asyncio.create_task(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, events.get, replies.put)
+    )
+    await events.put({"type": "lifespan.startup"})
+    reply = await replies.get()
+    if reply["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"App startup failed: {reply.get('message')}")
+    try:
+        yield
+    finally:
+        await events.put({"type": "lifespan.shutdown"})
+        await replies.get()
+        await task
+
+
+class Recorder:
+    """Latencies and status codes per endpoint, after the warmup"""
+    def __init__(self, warmup_until: float):
+        self.warmup_until = warmup_until
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    async def request(self, http: Any, label: str, method: str, url: str, **kwargs: Any) -> Optional[Any]:
+        started = time.perf_counter()
+        try:
+            response = await http.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except Exception:
+            response, status = None, "error"
+        finished = time.perf_counter()
+        if started >= self.warmup_until:
+            self.latencies.setdefault(label, []).append((finished - started) * 1000)
+            statuses = self.statuses.setdefault(label, {})
+            statuses[status] = statuses.get(status, 0) + 1
+        return response
+
+
+async def run_client(
+    http: Any,
+    recorder: Recorder,
+    username: str,
+    deadline: float,
+    rng: random.Random,
+    weights: Dict[str, int]
+) -> None:
+    api = "/api/v1"
+    headers: Dict[str, str] = {}
+
+    async def login() -> None:
+        response = await recorder.request(
+            http, "POST /api/v1/auth/token", "POST", f"{api}/auth/token",
+            data={"username": username, "password": PASSWORD}
+        )
+        if response is None or response.status_code != 200:
+            raise RuntimeError(f"Could not log in as {username}; run with --seed first")
+        headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    await login()
+
+    response = await recorder.request(
+        http, "GET /api/v1/tasks/", "GET", f"{api}/tasks/", params={"limit": 200}, headers=headers
+    )
+    task_ids = [task["id"] for task in response.json()["items"]] if response is not None and response.is_success else []
+
+    operations, operation_weights = list(weights), list(weights.values())
+    while time.perf_counter() < deadline:
+        operation = rng.choices(operations, weights=operation_weights)[0]
+        if operation == "login":
+            await login()
+        elif operation == "list_tasks":
+            await recorder.request(http, "GET /api/v1/tasks/", "GET", f"{api}/tasks/", params={"limit": 50}, headers=headers)
+        elif operation == "list_categories":
+            await recorder.request(http, "GET /api/v1/categories/", "GET", f"{api}/categories/", headers=headers)
+        elif not task_ids:
+            continue
+        elif operation == "toggle_task":
+            await recorder.request(
+                http, "PATCH /api/v1/tasks/{task_id}/toggle", "PATCH",
+                f"{api}/tasks/{rng.choice(task_ids)}/toggle", headers=headers
+            )
+        elif operation == "update_task":
+            task_id = rng.choice(task_ids)
+            await recorder.request(
+                http, "PUT /api/v1/tasks/{task_id}", "PUT", f"{api}/tasks/{task_id}", headers=headers,
+                json={"title": f"Task {task_id} rev {rng.randrange(1000000)}", "priority": rng.choice(PRIORITIES)}
+            )
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], seconds: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / seconds, 2),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+        "max_ms": round(ordered[-1], 3),
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """Relative p95 and throughput change per endpoint found in both results."""
+    comparison = {}
+    for label, current in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(label)
+        if not before:
+            continue
+        p95_change = current["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps_change = current["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        comparison[label] = {
+            "p95_change": round(p95_change, 4),
+            "rps_change": round(rps_change, 4),
+            "regressed": p95_change > tolerance or rps_change < -tolerance,
+        }
+    return comparison
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+async def load(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    rng = random.Random(args.random_seed)
+    if args.seed:
+        await seed(args.users, args.tasks_per_user, args.categories_per_user, rng)
+
+    @asynccontextmanager
+    async def client() -> AsyncIterator[Any]:
+        timeout = httpx.Timeout(30.0)
+        if args.url:
+            limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+            async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout) as http:
+                yield http
+            return
+        from app.main import app
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout) as http:
+                yield http
+
+    weights = dict(WEIGHTS)
+    async with client() as http:
+        started = time.perf_counter()
+        recorder = Recorder(started + args.warmup)
+        deadline = started + args.warmup + args.duration
+        await asyncio.gather(*(
+            run_client(
+                http, recorder, f"{USERNAME_PREFIX}{n % args.users}", deadline,
+                random.Random(rng.random()), weights
+            )
+            for n in range(args.clients)
+        ))
+        # Requests in flight at the deadline finish after it
+        measured = time.perf_counter() - recorder.warmup_until
+
+    endpoints = {
+        label: summarize(latencies, recorder.statuses[label], measured)
+        for label, latencies in sorted(recorder.latencies.items())
+    }
+    all_statuses: Dict[str, int] = {}
+    for statuses in recorder.statuses.values():
+        for status, count in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    all_latencies = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    return {
+        "meta": {
+            "started_at": _utcnow().isoformat(timespec="seconds") + "Z",
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "target": args.url or "in-process",
+            "clients": args.clients,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "users": args.users,
+            "tasks_per_user": args.tasks_per_user,
+            "categories_per_user": args.categories_per_user,
+            "weights": weights,
+        },
+        "endpoints": endpoints,
+        "total": summarize(all_latencies, all_statuses, measured) if all_latencies else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", action="store_true", help="seed bench users before the run")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tasks-per-user", type=int, default=200)
+    parser.add_argument("--categories-per-user", type=int, default=5)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds excluded from the results")
+    parser.add_argument("--url", help="base URL of a running server; default runs the app in-process")
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_api.json", help="JSON results file")
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative p95 rise or RPS drop")
+    args = parser.parse_args()
+
+    if not args.url:
+        # Set before the app reads its settings; one user's clients would hit their limit at once
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    results = asyncio.run(load(args))
+    regressed: List[Tuple[str, Dict[str, Any]]] = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        results["baseline"] = {"file": args.baseline, "commit": baseline.get("meta", {}).get("commit"), "tolerance": args.tolerance}
+        results["comparison"] = compare(results, baseline, args.tolerance)
+        regressed = [(label, change) for label, change in results["comparison"].items() if change["regressed"]]
+
+    Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+    print(f"{'endpoint':<40} {'requests':>9} {'errors':>7} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}", file=sys.stderr)
+    for label, stats in results["endpoints"].items():
+        print(
+            f"{label:<40} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>9.1f} "
+            f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}",
+            file=sys.stderr
+        )
+    for label, change in regressed:
+        print(
+            f"REGRESSION {label}: p95 {change['p95_change']:+.1%}, rps {change['rps_change']:+.1%}",
+            file=sys.stderr
+        )
+    if regressed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
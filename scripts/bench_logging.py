@@ -0,0 +1,121 @@
+"""
+Per-call overhead of logging on the request path.
+
+Runs each logging configuration in a fresh interpreter through
+setup_logging, logging to a temporary directory with a small rotation
+size so the runs include rotations and compressions, and stdout sent to
+/dev/null. Reports the time the calling thread spends per call:
+- info: a loguru logger.info call
+- stdlib: a standard library logging call routed through InterceptHandler
+- debug sampled: logger.debug with LOG_DEBUG_SAMPLE_RATE=0.01
+- debug off: a standard library debug call below the configured level
+
+Calls are spaced --interval-us apart by sleeping, as a worker mostly
+waits on the database between log calls; background sink threads do
+their formatting and writing in those gaps. With --interval-us 0 they
+compete with the caller for the GIL instead. The max column shows
+stalls, e.g. a synchronous sink rotating and compressing a file inline.
+
+Usage: python -m scripts.bench_logging [--calls 5000] [--interval-us 200] [--rotation-bytes 1000000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CONFIGURATIONS = [
+    ("sync text", {"LOG_ASYNC": "false", "LOG_JSON": "false"}),
+    ("sync json", {"LOG_ASYNC": "false", "LOG_JSON": "true"}),
+    ("async text", {"LOG_ASYNC": "true", "LOG_JSON": "false"}),
+    ("async json", {"LOG_ASYNC": "true", "LOG_JSON": "true"}),
+]
+
+# Times each call of a few logging statements, writing percentiles as JSON to argv[1]
+CALLS = r"""
+import json, logging, sys, time
+from app.core.logging import get_logger, setup_logging
+
+calls, interval = int(sys.argv[2]), int(sys.argv[4]) / 1e6
+setup_logging(debug=sys.argv[3] == "debug")
+log = get_logger("bench")
+stdlib = logging.getLogger("bench.stdlib")
+
+def measure(call):
+    samples = []
+    for i in range(calls):
+        started = time.perf_counter_ns()
+        call(i)
+        samples.append(time.perf_counter_ns() - started)
+        if interval:
+            time.sleep(interval)
+    samples.sort()
+    return {
+        "mean": sum(samples) / calls / 1000,
+        "p50": samples[calls // 2] / 1000,
+        "p99": samples[int(calls * 0.99)] / 1000,
+        "max": samples[-1] / 1000,
+    }
+
+if sys.argv[3] == "debug":
+    results = {"debug sampled": measure(lambda i: log.debug("Loaded task {} for user {}", i, 42))}
+else:
+    results = {
+        "info": measure(lambda i: log.info("Created task {} for user {}", i, 42)),
+        "stdlib": measure(lambda i: stdlib.info("Created task %s for user %s", i, 42)),
+        "debug off": measure(lambda i: stdlib.debug("Loaded task %s for user %s", i, 42)),
+    }
+with open(sys.argv[1], "w") as f:
+    json.dump(results, f)
+"""
+
+
+def run(overrides: Dict[str, str], mode: str, args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        env.setdefault("SECRET_KEY", "bench-logging")
+        env.update(overrides)
+        env.update({
+            "LOG_FILE": str(Path(directory) / "bench.log"),
+            "LOG_ROTATION_BYTES": str(args.rotation_bytes),
+            "LOG_DEBUG_SAMPLE_RATE": "0.01",
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")])),
+        })
+        results = Path(directory) / "results.json"
+        subprocess.run(
+            [sys.executable, "-c", CALLS, str(results), str(args.calls), mode, str(args.interval_us)],
+            cwd=directory, env=env, stdout=subprocess.DEVNULL, check=True
+        )
+        return json.loads(results.read_text())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--interval-us", type=int, default=200, help="sleep between calls")
+    parser.add_argument("--rotation-bytes", type=int, default=1000000)
+    args = parser.parse_args()
+
+    rows: List[str] = []
+    for name, overrides in CONFIGURATIONS:
+        results = run(overrides, "info", args)
+        results.update(run(overrides, "debug", args))
+        for call in ("info", "stdlib", "debug sampled", "debug off"):
+            stats = results[call]
+            rows.append(
+                f"{name:<11} {call:<14} {stats['mean']:8.2f} {stats['p50']:8.2f} "
+                f"{stats['p99']:8.2f} {stats['max']:10.1f}"
+            )
+
+    print(f"per-call time in microseconds over {args.calls} calls, {args.interval_us} us apart")
+    print(f"{'config':<11} {'call':<14} {'mean':>8} {'p50':>8} {'p99':>8} {'max':>10}")
+    print("\n".join(rows))
+
+
+if __name__ == "__main__":
+    main()
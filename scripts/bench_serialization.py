@@ -0,0 +1,82 @@
+"""
+Micro-benchmark of list response serialization.
+
+Compares, for a page of ORM task rows:
+- response_model: what FastAPI does for a returned list (validate, jsonable_encoder, json.dumps)
+- model_dump_json: validating into TaskPage and dumping it
+- ListSerializer: the fast path used by the list endpoints
+
+Usage: python -m scripts.bench_serialization [--rows 1000] [--repeat 50]
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.api.serialization import ListSerializer
+from app.models.task import Task as TaskModel
+from app.schemas.task import Task, TaskPage
+
+
+def make_rows(count: int) -> List[TaskModel]:
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    return [
+        TaskModel(
+            id=i,
+            title=f"Task {i}",
+            description="Write comprehensive documentation for API endpoints",
+            priority=("low", "medium", "high")[i % 3],
+            status=("todo", "in_progress", "completed")[i % 3],
+            completed=i % 3 == 2,
+            due_date=now + timedelta(days=i % 30) if i % 2 else None,
+            completed_at=now if i % 3 == 2 else None,
+            owner_id=1,
+            category_id=i % 5 or None,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def run(rows: int, repeat: int) -> Dict[str, float]:
+    tasks = make_rows(rows)
+    validated = TypeAdapter(List[Task])
+    serializer = ListSerializer(Task)
+
+    cases: Dict[str, Callable[[], bytes]] = {
+        "response_model": lambda: json.dumps(jsonable_encoder(
+            {"items": validated.validate_python(tasks, from_attributes=True), "next_cursor": None}
+        )).encode(),
+        "model_dump_json": lambda: TaskPage(items=tasks, next_cursor=None).model_dump_json().encode(),
+        "ListSerializer": lambda: serializer.dump_page(tasks, None),
+    }
+    # Every path must produce the same document
+    expected = json.loads(cases["model_dump_json"]())
+    for name, case in cases.items():
+        assert json.loads(case()) == expected, f"{name} output differs"
+
+    results = {}
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=repeat, repeat=5)) / repeat
+        results[name] = best * 1000
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    baseline = results["response_model"]
+    print(f"{args.rows} rows, best of 5 x {args.repeat}")
+    for name, ms in results.items():
+        print(f"{name:>16}: {ms:8.3f} ms/page  {args.rows / ms * 1000:>10.0f} rows/s  {baseline / ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Cold-start benchmark for a worker.
+
+Measures, each in a fresh interpreter:
+- import time of app.main from `python -X importtime`, with the modules
+  contributing the most self time
+- time to first request: interpreter start, importing the app, running
+  the startup handlers and serving GET /health through ASGI
+
+Startup runs with DB_STARTUP_MODE=skip, so no database is needed; the
+schema check it skips is one query. The import time budget itself is
+enforced by tests/test_startup.py; this script shows where time goes.
+
+Usage: python -m scripts.bench_startup [--runs 5] [--top 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Serves one request through the app's ASGI interface, printing timings as JSON
+FIRST_REQUEST = r"""
+import asyncio, json, time
+started = time.perf_counter()
+
+async def main():
+    from app.main import app
+    imported = time.perf_counter()
+
+    lifespan_events = asyncio.Queue()
+    await lifespan_events.put({"type": "lifespan.startup"})
+    ready = asyncio.Event()
+
+    async def lifespan_send(message):
+        if message["type"] == "lifespan.startup.failed":
+            raise RuntimeError(message.get("message"))
+        if message["type"] == "lifespan.startup.complete":
+            ready.set()
+
+    lifespan = asyncio.create_task(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, lifespan_events.get, lifespan_send)
+    )
+    await ready.wait()
+    startup_done = time.perf_counter()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/health", "raw_path": b"/health",
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80), "state": {},
+    }
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+
+    await app(scope, receive, send)
+    responded = time.perf_counter()
+
+    await lifespan_events.put({"type": "lifespan.shutdown"})
+    await lifespan
+    print(json.dumps({
+        "status": response.get("status"),
+        "import_ms": (imported - started) * 1000,
+        "startup_ms": (startup_done - imported) * 1000,
+        "request_ms": (responded - startup_done) * 1000,
+    }))
+
+asyncio.run(main())
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "bench-startup")
+    env["DB_STARTUP_MODE"] = "skip"
+    env["EVENTS_BACKEND"] = "memory"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """Total import time of app.main and (module, self ms) pairs from -X importtime output."""
+    total, modules = 0.0, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append((name, int(self_us) / 1000))
+        if name == "app.main":
+            total = int(cumulative_us) / 1000
+    return total, modules
+
+
+def measure_imports(runs: int) -> Tuple[List[float], Dict[str, float]]:
+    totals, self_times = [], {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            cwd=ROOT, env=_env(), capture_output=True, text=True, check=True
+        )
+        total, modules = parse_importtime(result.stderr)
+        totals.append(total)
+        for name, ms in modules:
+            self_times.setdefault(name, []).append(ms)
+    return totals, {name: statistics.median(times) for name, times in self_times.items()}
+
+
+def measure_first_request(runs: int) -> List[Dict[str, float]]:
+    samples = []
+    for _ in range(runs):
+        spawned = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_REQUEST],
+            cwd=ROOT, env=_env(), capture_output=True, text=True, check=True
+        )
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        if sample["status"] != 200:
+            raise RuntimeError(f"GET /health returned {sample['status']}")
+        sample["total_ms"] = (time.perf_counter() - spawned) * 1000
+        samples.append(sample)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    totals, self_times = measure_imports(args.runs)
+    median_import = statistics.median(totals)
+    print(f"import app.main: median {median_import:.0f} ms, min {min(totals):.0f} ms over {args.runs} runs")
+    app_self = sum(ms for name, ms in self_times.items() if name == "app" or name.startswith("app."))
+    print(f"  of which app.* modules themselves: {app_self:.0f} ms")
+    print(f"  top {args.top} modules by self time:")
+    for name, ms in sorted(self_times.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"    {ms:8.1f} ms  {name}")
+
+    samples = measure_first_request(args.runs)
+    print(f"time to first request over {args.runs} runs (median):")
+    for key in ("import_ms", "startup_ms", "request_ms", "total_ms"):
+        print(f"  {key[:-3]:>8}: {statistics.median(s[key] for s in samples):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import psycopg2
+import psycopg2.errors
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from app.core.config import settings
 import logging
@@ -22,8 +23,12 @@ def create_database() -> None:
             cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (settings.POSTGRES_DB,))
             if not cur.fetchone():
                 # Create database if it doesn't exist
-                cur.execute(f'CREATE DATABASE "{settings.POSTGRES_DB}"')
-                logger.info(f"Created database {settings.POSTGRES_DB}")
+                try:
+                    cur.execute(f'CREATE DATABASE "{settings.POSTGRES_DB}"')
+                    logger.info(f"Created database {settings.POSTGRES_DB}")
+                except psycopg2.errors.DuplicateDatabase:
+                    # Another process created it since the check
+                    logger.info(f"Database {settings.POSTGRES_DB} already exists")
             else:
                 logger.info(f"Database {settings.POSTGRES_DB} already exists")
                 
@@ -35,4 +40,7 @@ def create_database() -> None:
             conn.close()
 
 if __name__ == "__main__":
+    from app.core.logging import setup_logging
+
+    setup_logging()
     create_database()
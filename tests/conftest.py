@@ -0,0 +1,35 @@
+import os
+
+# Settings are read on import; the tests never sign tokens with it
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+import pytest
+from app.services import cache, rate_limit
+
+
+class Clock:
+    """Stands in for the time module: monotonic() and time() share one clock."""
+    def __init__(self, now: float):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A Clock driving every module that times windows, TTLs and expiries."""
+    # At the start of a window for window lengths dividing an hour
+    clock = Clock(3600.0 * 100)
+    for module in (cache, rate_limit):
+        monkeypatch.setattr(module, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "shared"])
+def backend_name(request):
+    """Each backend kind, for tests that must behave the same on both."""
+    return request.param
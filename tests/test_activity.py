@@ -0,0 +1,91 @@
+import asyncio
+from sqlalchemy.exc import IntegrityError
+from app.services.activity import CREATED, TASK, ActivityLog
+
+
+class Database:
+    """Stands in for the activity_log table and its FK to users"""
+    def __init__(self, users):
+        self.users = set(users)
+        self.rows = []
+        self.fail = False
+
+    def session(self):
+        return Session(self)
+
+
+class Session:
+    def __init__(self, database):
+        self.database = database
+        self.pending = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def execute(self, statement, rows):
+        if self.database.fail or any(row["owner_id"] not in self.database.users for row in rows):
+            raise IntegrityError("INSERT INTO activity_log", {}, Exception("violates foreign key constraint"))
+        self.pending.extend(rows)
+
+    async def scalars(self, statement):
+        return sorted(self.database.users)
+
+    async def commit(self):
+        self.database.rows.extend(self.pending)
+        self.pending = []
+
+    async def rollback(self):
+        self.pending = []
+
+
+def _write(database, owners):
+    log = ActivityLog(max_size=100, batch_size=100, flush_interval=1.0, session_factory=database.session)
+
+    async def scenario():
+        for task_id, owner_id in enumerate(owners, 1):
+            await log.record(owner_id, TASK, task_id, CREATED, {"title": "Task"})
+        await log.stop(timeout=1.0)
+
+    asyncio.run(scenario())
+    return log
+
+
+def test_batch_is_written():
+    database = Database(users=[1, 2])
+
+    log = _write(database, [1, 2, 1])
+
+    assert [row["owner_id"] for row in database.rows] == [1, 2, 1]
+    assert (log.written, log.batches, log.failed, log.orphaned) == (3, 1, 0, 0)
+
+
+def test_deleted_owner_does_not_lose_other_owners_records():
+    # User 2 was deleted while their records were queued
+    database = Database(users=[1, 3])
+
+    log = _write(database, [1, 2, 3, 2])
+
+    assert [row["entity_id"] for row in database.rows] == [1, 3]
+    assert (log.written, log.failed, log.orphaned) == (2, 0, 2)
+
+
+def test_batch_of_deleted_owners_writes_nothing():
+    database = Database(users=[])
+
+    log = _write(database, [1, 1])
+
+    assert database.rows == []
+    assert (log.written, log.batches, log.failed, log.orphaned) == (0, 0, 0, 2)
+
+
+def test_other_integrity_errors_fail_the_batch():
+    database = Database(users=[1])
+    database.fail = True
+
+    log = _write(database, [1, 1])
+
+    assert database.rows == []
+    assert (log.written, log.failed, log.orphaned) == (0, 2, 0)
@@ -0,0 +1,225 @@
+import asyncio
+import pytest
+from app.api import cache as api_cache
+from app.services.cache import (
+    CATEGORIES,
+    TASKS,
+    CacheBackend,
+    LocalSharedStore,
+    MemoryCacheBackend,
+    ResponseCache,
+    SharedCacheBackend,
+)
+
+
+@pytest.fixture
+def response_cache(backend_name):
+    if backend_name == "memory":
+        backend = MemoryCacheBackend(max_bytes=1024 * 1024)
+    else:
+        backend = SharedCacheBackend(LocalSharedStore())
+    return ResponseCache(backend, ttl=60)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def _store(response_cache, scope, user_id, params, body):
+    key = await response_cache.key(scope, user_id, params)
+    await response_cache.set(key, body)
+    return key
+
+
+def test_incomplete_backend_fails_on_creation():
+    class NoGenerations(CacheBackend):
+        async def get(self, key):
+            return None
+
+        async def set(self, key, value, ttl):
+            pass
+
+    with pytest.raises(TypeError, match="bump_generation"):
+        NoGenerations()
+
+
+def test_hit_after_set(response_cache):
+    async def scenario():
+        await _store(response_cache, TASKS, 1, {"limit": 50}, b"page")
+        key = await response_cache.key(TASKS, 1, {"limit": 50})
+        return await response_cache.get(key)
+
+    assert run(scenario()) == b"page"
+    assert (response_cache.hits, response_cache.misses) == (1, 0)
+
+
+def test_params_order_does_not_matter(response_cache):
+    async def scenario():
+        first = await response_cache.key(TASKS, 1, {"limit": 50, "cursor": None})
+        second = await response_cache.key(TASKS, 1, {"cursor": None, "limit": 50})
+        other = await response_cache.key(TASKS, 1, {"limit": 20, "cursor": None})
+        return first, second, other
+
+    first, second, other = run(scenario())
+    assert first == second
+    assert first != other
+
+
+def test_invalidate_bumps_generation(response_cache):
+    async def scenario():
+        old_key = await _store(response_cache, TASKS, 1, {}, b"stale")
+        await response_cache.invalidate(1, TASKS)
+        new_key = await response_cache.key(TASKS, 1, {})
+        return old_key, new_key, await response_cache.get(new_key)
+
+    old_key, new_key, body = run(scenario())
+    assert old_key != new_key
+    assert body is None
+
+
+def test_invalidate_only_touches_its_user_and_scope(response_cache):
+    async def scenario():
+        await _store(response_cache, TASKS, 1, {}, b"tasks 1")
+        await _store(response_cache, CATEGORIES, 1, {}, b"categories 1")
+        await _store(response_cache, TASKS, 2, {}, b"tasks 2")
+        await response_cache.invalidate(1, TASKS)
+        return [
+            await response_cache.get(await response_cache.key(scope, user_id, {}))
+            for scope, user_id in ((TASKS, 1), (CATEGORIES, 1), (TASKS, 2))
+        ]
+
+    assert run(scenario()) == [None, b"categories 1", b"tasks 2"]
+
+
+def test_invalidate_several_scopes(response_cache):
+    async def scenario():
+        await _store(response_cache, TASKS, 1, {}, b"tasks")
+        await _store(response_cache, CATEGORIES, 1, {}, b"categories")
+        await response_cache.invalidate(1, CATEGORIES, TASKS)
+        return [
+            await response_cache.get(await response_cache.key(scope, 1, {}))
+            for scope in (TASKS, CATEGORIES)
+        ]
+
+    assert run(scenario()) == [None, None]
+
+
+def test_disabled_cache_has_no_keys():
+    response_cache = ResponseCache(MemoryCacheBackend(1024), ttl=60, enabled=False)
+    assert run(response_cache.key(TASKS, 1, {})) is None
+
+
+def test_backend_errors_fail_open():
+    class BrokenBackend(MemoryCacheBackend):
+        async def get_generation(self, key):
+            raise ConnectionError("down")
+
+        async def bump_generation(self, key):
+            raise ConnectionError("down")
+
+    response_cache = ResponseCache(BrokenBackend(1024), ttl=60)
+    assert run(response_cache.key(TASKS, 1, {})) is None
+    run(response_cache.invalidate(1, TASKS))
+    assert response_cache.errors == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    backend = MemoryCacheBackend(max_bytes=1024)
+    run(backend.set("key", b"value", ttl=10))
+    clock.now += 9
+    assert run(backend.get("key")) == b"value"
+    clock.now += 1
+    assert run(backend.get("key")) is None
+    assert backend.stats()["bytes"] == 0
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_bytes=25)
+
+    async def scenario():
+        await backend.set("a", b"x" * 9, ttl=60)
+        await backend.set("b", b"x" * 9, ttl=60)
+        await backend.get("a")
+        await backend.set("c", b"x" * 9, ttl=60)
+        return [await backend.get(key) is not None for key in ("a", "b", "c")]
+
+    assert run(scenario()) == [True, False, True]
+    assert backend.stats()["bytes"] <= 25
+
+
+def test_memory_backend_skips_values_over_budget():
+    backend = MemoryCacheBackend(max_bytes=10)
+    run(backend.set("key", b"x" * 20, ttl=60))
+    assert run(backend.get("key")) is None
+
+
+def test_evicted_generation_is_never_reused():
+    backend = MemoryCacheBackend(max_bytes=1024, max_generations=2)
+
+    async def scenario():
+        first = await backend.get_generation("tasks:1")
+        await backend.get_generation("tasks:2")
+        await backend.get_generation("tasks:3")
+        return first, await backend.get_generation("tasks:1")
+
+    first, after_eviction = run(scenario())
+    assert after_eviction != first
+
+
+class Session:
+    def __init__(self, **info):
+        self.info = info
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+def test_cached_body_builds_once(monkeypatch):
+    monkeypatch.setattr(api_cache, "response_cache", ResponseCache(MemoryCacheBackend(1024), ttl=60))
+    db = Session()
+    builds = []
+
+    async def build(session):
+        builds.append(session)
+        return b"body"
+
+    async def scenario():
+        first = await api_cache.cached_body(TASKS, 1, {}, db, build)
+        second = await api_cache.cached_body(TASKS, 1, {}, db, build)
+        return first, second
+
+    assert run(scenario()) == ((b"body", False), (b"body", True))
+    assert builds == [db]
+
+
+def test_cached_body_stores_only_bodies_built_on_the_primary(monkeypatch):
+    monkeypatch.setattr(api_cache, "response_cache", ResponseCache(MemoryCacheBackend(1024), ttl=60))
+    primary = Session()
+    monkeypatch.setattr(api_cache, "AsyncSessionLocal", lambda: primary)
+    replica = Session(replica="replica-0")
+    builds = []
+
+    async def build(session):
+        builds.append(session)
+        return b"body"
+
+    assert run(api_cache.cached_body(TASKS, 1, {}, replica, build)) == (b"body", False)
+    assert builds == [primary]
+
+
+def test_cached_body_reads_the_replica_when_not_caching(monkeypatch):
+    monkeypatch.setattr(
+        api_cache, "response_cache", ResponseCache(MemoryCacheBackend(1024), ttl=60, enabled=False)
+    )
+    replica = Session(replica="replica-0")
+    builds = []
+
+    async def build(session):
+        builds.append(session)
+        return b"body"
+
+    assert run(api_cache.cached_body(TASKS, 1, {}, replica, build)) == (b"body", False)
+    assert builds == [replica]
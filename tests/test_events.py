@@ -0,0 +1,142 @@
+import asyncio
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app.api.routes import events as events_routes
+from app.services.events import (
+    MAX_IDS_PER_EVENT,
+    EventBackend,
+    EventBroker,
+    MemoryEventBackend,
+    SubscriptionClosed,
+)
+
+
+class RecordingBackend(MemoryEventBackend):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def publish(self, user_id, message):
+        self.messages.append((user_id, json.loads(message)))
+        super().publish(user_id, message)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def started(broker):
+    run(broker.start())
+    return broker
+
+
+def test_incomplete_backend_fails_on_creation():
+    class NoStop(EventBackend):
+        async def start(self, deliver):
+            pass
+
+        def publish(self, user_id, message):
+            pass
+
+    with pytest.raises(TypeError, match="stop"):
+        NoStop()
+
+
+def test_publish_splits_ids():
+    backend = RecordingBackend()
+    broker = EventBroker(backend, queue_size=10, max_subscriptions=10)
+    ids = list(range(MAX_IDS_PER_EVENT * 2 + 1))
+
+    broker.publish(1, "task", "deleted", ids)
+
+    assert [len(message["ids"]) for _, message in backend.messages] == [MAX_IDS_PER_EVENT, MAX_IDS_PER_EVENT, 1]
+    assert [i for _, message in backend.messages for i in message["ids"]] == ids
+    assert {message["type"] for _, message in backend.messages} == {"task.deleted"}
+    assert broker.published == 3
+
+
+def test_disabled_broker_publishes_nothing():
+    backend = RecordingBackend()
+    broker = EventBroker(backend, queue_size=10, max_subscriptions=10, enabled=False)
+
+    broker.publish(1, "task", "created", [1])
+
+    assert backend.messages == []
+
+
+def test_subscribe_is_refused_at_capacity():
+    broker = EventBroker(MemoryEventBackend(), queue_size=10, max_subscriptions=2)
+    first = broker.subscribe(1)
+    assert broker.subscribe(2) is not None
+    assert broker.subscribe(3) is None
+
+    broker.unsubscribe(first)
+
+    assert broker.subscribe(3) is not None
+    assert broker.stats()["subscriptions"] == 2
+
+
+def test_events_fan_out_to_the_users_subscriptions():
+    broker = started(EventBroker(MemoryEventBackend(), queue_size=10, max_subscriptions=10))
+    phone, laptop = broker.subscribe(1), broker.subscribe(1)
+    other = broker.subscribe(2)
+
+    broker.publish(1, "category", "updated", [7])
+
+    expected = '{"type":"category.updated","ids":[7]}'
+    assert run(phone.get(timeout=0.1)) == expected
+    assert run(laptop.get(timeout=0.1)) == expected
+    assert run(other.get(timeout=0.01)) is None
+    assert broker.delivered == 2
+
+
+def test_slow_consumer_is_closed_and_unsubscribed():
+    broker = started(EventBroker(MemoryEventBackend(), queue_size=2, max_subscriptions=10))
+    slow, fast = broker.subscribe(1), broker.subscribe(1)
+
+    for task_id in range(2):
+        broker.publish(1, "task", "updated", [task_id])
+        run(fast.get(timeout=0.1))
+    broker.publish(1, "task", "updated", [2])
+
+    assert slow.closed and slow.reason == "slow consumer"
+    with pytest.raises(SubscriptionClosed):
+        run(slow.get(timeout=0.1))
+    assert not fast.closed
+    stats = broker.stats()
+    assert (stats["subscriptions"], stats["slow_consumers"]) == (1, 1)
+
+
+def test_stop_closes_subscriptions():
+    broker = started(EventBroker(MemoryEventBackend(), queue_size=10, max_subscriptions=10))
+    subscription = broker.subscribe(1)
+
+    run(broker.stop())
+
+    assert subscription.reason == "shutdown"
+    broker.publish(1, "task", "created", [1])
+    assert broker.delivered == 0
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(events_routes.router)
+    return TestClient(app)
+
+
+def test_websocket_without_token_is_refused(client):
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect("/ws"):
+            pass
+    assert refused.value.code == 1008
+
+
+def test_event_stream_without_token_is_unauthorized(client):
+    response = client.get("/events")
+
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.db.migrations import (
+    BASELINE_REVISION, SchemaMismatchError, adopt_unversioned, current_revision, head_revision,
+    stamp_head, verify_schema
+)
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'todo.db'}")
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+async def _create_users(engine):
+    # Stands in for the tables the baseline made with create_all at startup
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+
+
+async def _adopt(engine):
+    async with engine.connect() as conn:
+        adopted = await adopt_unversioned(conn)
+        return adopted, await current_revision(conn)
+
+
+def test_unversioned_schema_is_named_on_startup(engine):
+    asyncio.run(_create_users(engine))
+
+    with pytest.raises(SchemaMismatchError, match=f"predates migrations.*stamp revision {BASELINE_REVISION}"):
+        asyncio.run(verify_schema(engine))
+
+
+def test_unversioned_schema_is_stamped_at_baseline(engine):
+    asyncio.run(_create_users(engine))
+
+    assert asyncio.run(_adopt(engine)) == (True, BASELINE_REVISION)
+    # Adopted once; the upgrade then runs from the baseline
+    assert asyncio.run(_adopt(engine)) == (False, BASELINE_REVISION)
+    with pytest.raises(SchemaMismatchError, match=f"at revision {BASELINE_REVISION}, expected {head_revision()}"):
+        asyncio.run(verify_schema(engine))
+
+
+def test_empty_database_is_not_adopted(engine):
+    assert asyncio.run(_adopt(engine)) == (False, None)
+    with pytest.raises(SchemaMismatchError, match="at revision None"):
+        asyncio.run(verify_schema(engine))
+
+
+def test_head_revision_passes(engine):
+    async def stamp():
+        async with engine.begin() as conn:
+            await conn.run_sync(stamp_head)
+
+    asyncio.run(_create_users(engine))
+    asyncio.run(stamp())
+
+    asyncio.run(verify_schema(engine))
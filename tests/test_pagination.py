@@ -0,0 +1,95 @@
+import base64
+import json
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.routes.tasks import _parse_task_cursor
+from app.schemas.task import TaskSortField
+
+
+def _raw(payload: str) -> str:
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _assert_invalid(cursor: str, sort: str = "id") -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, sort)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid cursor"
+
+
+def test_round_trip():
+    cursor = encode_cursor("id", [42])
+    assert decode_cursor(cursor, "id") == [42]
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor("rank", [0.123456789, 1000000])
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+def test_datetimes_are_encoded_as_iso_strings():
+    cursor = encode_cursor("due_date", [datetime(2024, 3, 20, 17, 0), 7])
+    assert decode_cursor(cursor, "due_date") == ["2024-03-20T17:00:00", 7]
+
+
+def test_unencodable_key_is_rejected():
+    with pytest.raises(TypeError):
+        encode_cursor("id", [object()])
+
+
+def test_cursor_for_another_sort_order_is_rejected():
+    _assert_invalid(encode_cursor("due_date", [None, 1]), "id")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    "abc",
+    _raw("not json"),
+    _raw(json.dumps({"k": [1]})),
+    _raw(json.dumps({"s": "id"})),
+    _raw(json.dumps({"s": "id", "k": 1})),
+    _raw(json.dumps(["id", [1]])),
+    "é",
+])
+def test_malformed_cursor_is_rejected(cursor):
+    _assert_invalid(cursor)
+
+
+def test_tampered_cursor_is_rejected():
+    cursor = encode_cursor("id", [42])
+    tampered = cursor[:-2] + ("A" if cursor[-2] != "A" else "B") + cursor[-1]
+    with pytest.raises(HTTPException):
+        decode_cursor(tampered, "id")
+
+
+def test_task_id_cursor():
+    assert _parse_task_cursor(encode_cursor("id", [5]), TaskSortField.ID) == [5]
+
+
+def test_task_due_date_cursor():
+    due = datetime(2024, 1, 2, 3, 4, 5)
+    cursor = encode_cursor("due_date", [due, 9])
+    assert _parse_task_cursor(cursor, TaskSortField.DUE_DATE) == [due, 9]
+
+
+def test_task_due_date_cursor_with_null_due_date():
+    cursor = encode_cursor("due_date", [None, 9])
+    assert _parse_task_cursor(cursor, TaskSortField.DUE_DATE) == [None, 9]
+
+
+@pytest.mark.parametrize("sort, key", [
+    ("id", ["x"]),
+    ("id", [1, 2]),
+    ("id", []),
+    ("due_date", ["not a date", 1]),
+    ("due_date", [None, "x"]),
+    ("due_date", [None]),
+    ("due_date", [123, 1]),
+])
+def test_task_cursor_with_bad_key_is_rejected(sort, key):
+    with pytest.raises(HTTPException) as exc_info:
+        _parse_task_cursor(encode_cursor(sort, key), TaskSortField(sort))
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.crud.user import user as crud_user
+from app.db.profiling import assert_max_queries, end_profile, instrument_engine, start_profile
+from app.models.user import User
+
+pytest.importorskip("aiosqlite")
+
+USERS = 5
+
+
+async def _with_users(check):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(User.__table__.create)
+        await connection.execute(insert(User), [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x"}
+            for i in range(USERS)
+        ])
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession)() as db:
+            return await check(db)
+    finally:
+        await engine.dispose()
+
+
+def test_listing_stays_within_budget():
+    async def check(db):
+        with assert_max_queries(1) as statements:
+            users = await crud_user.get_multi(db)
+        return users, statements
+
+    users, statements = asyncio.run(_with_users(check))
+    assert len(users) == USERS
+    assert len(statements) == 1
+
+
+def test_n_plus_one_fails():
+    async def check(db):
+        with assert_max_queries(2):
+            for user_id in range(1, USERS + 1):
+                await crud_user.get(db, user_id)
+
+    with pytest.raises(AssertionError, match=f"at most 2 queries, {USERS} were run"):
+        asyncio.run(_with_users(check))
+
+
+def test_nested_blocks_count_separately():
+    async def check(db):
+        with assert_max_queries(3) as outer:
+            await crud_user.get(db, 1)
+            with assert_max_queries(1) as inner:
+                await crud_user.get(db, 2)
+        return outer, inner
+
+    outer, inner = asyncio.run(_with_users(check))
+    assert len(outer) == 2
+    assert len(inner) == 1
+
+
+def test_concurrent_tasks_do_not_share_captures():
+    async def counted(db_factory, lookups):
+        with assert_max_queries(lookups) as statements:
+            async with db_factory() as db:
+                for user_id in range(1, lookups + 1):
+                    await crud_user.get(db, user_id)
+        return len(statements)
+
+    async def check(db):
+        factory = async_sessionmaker(db.bind, class_=AsyncSession)
+        return await asyncio.gather(counted(factory, 1), counted(factory, 3))
+
+    assert asyncio.run(_with_users(check)) == [1, 3]
+
+
+def test_query_stats_for_server_timing():
+    async def check(db):
+        stats, token = start_profile()
+        try:
+            await crud_user.get(db, 1)
+        finally:
+            end_profile(token)
+        return stats
+
+    stats = asyncio.run(_with_users(check))
+    assert stats.queries == 1
+    assert stats.server_timing().endswith('desc="1 query"')
@@ -0,0 +1,140 @@
+import asyncio
+import pytest
+from app.api.dependencies import RateLimiter
+from app.services.cache import LocalSharedStore
+from app.services.rate_limit import MemoryRateLimitBackend, SharedRateLimitBackend, _sliding_window
+
+WINDOW = 60.0
+LIMIT = 3
+
+
+@pytest.fixture
+def backend(backend_name, clock):
+    if backend_name == "memory":
+        return MemoryRateLimitBackend(WINDOW, max_keys=1000)
+    return SharedRateLimitBackend(LocalSharedStore(), WINDOW)
+
+
+def hits(backend, key, count, limit=LIMIT):
+    async def scenario():
+        return [await backend.hit(key, limit) for _ in range(count)]
+    return asyncio.run(scenario())
+
+
+def test_allows_up_to_the_limit(backend):
+    results = hits(backend, "user:1", LIMIT + 1)
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results] == [2, 1, 0, 0]
+
+
+def test_rejection_headers(backend, clock):
+    clock.now += 15
+    rejected = hits(backend, "user:1", LIMIT + 1)[-1]
+    headers = rejected.headers()
+    assert headers["X-RateLimit-Limit"] == str(LIMIT)
+    assert headers["X-RateLimit-Remaining"] == "0"
+    assert headers["X-RateLimit-Reset"] == "45"
+    assert headers["Retry-After"] == "45"
+    assert "Retry-After" not in hits(backend, "user:2", 1)[0].headers()
+
+
+def test_keys_are_limited_separately(backend):
+    hits(backend, "user:1", LIMIT)
+    assert hits(backend, "user:1", 1)[0].allowed is False
+    assert hits(backend, "user:2", 1)[0].allowed is True
+
+
+def test_previous_window_still_counts_while_it_overlaps(backend, clock):
+    hits(backend, "user:1", LIMIT)
+    # Halfway through the next window, half of the previous window's requests count
+    clock.now += WINDOW * 1.5
+    assert [r.allowed for r in hits(backend, "user:1", 2)] == [True, False]
+
+
+def test_next_window_starts_full(backend, clock):
+    hits(backend, "user:1", LIMIT)
+    clock.now += WINDOW
+    assert hits(backend, "user:1", 1)[0].allowed is False
+
+
+def test_limit_resets_once_the_window_has_passed(backend, clock):
+    hits(backend, "user:1", LIMIT + 1)
+    clock.now += WINDOW * 2
+    assert [r.allowed for r in hits(backend, "user:1", LIMIT)] == [True] * LIMIT
+
+
+def test_rejections_are_not_counted(backend, clock):
+    hits(backend, "user:1", LIMIT + 5)
+    clock.now += WINDOW * 1.5
+    # Only the 3 allowed requests carry over, weighted by half
+    assert [r.allowed for r in hits(backend, "user:1", 2)] == [True, False]
+
+
+def test_retrying_while_limited_recovers(backend, clock):
+    hits(backend, "user:1", LIMIT)
+    allowed = []
+    for _ in range(int(WINDOW * 2)):
+        clock.now += 1
+        allowed.append(hits(backend, "user:1", 1)[0].allowed)
+    assert True in allowed
+
+
+def test_memory_backend_caps_and_evicts_keys(clock):
+    backend = MemoryRateLimitBackend(WINDOW, max_keys=2)
+    for key in ("a", "b", "c"):
+        hits(backend, key, 1)
+    assert backend.stats()["keys"] == 2
+    clock.now += WINDOW * 3
+    hits(backend, "d", 1)
+    assert backend.stats()["keys"] == 1
+
+
+def test_retry_after_waits_for_the_previous_window_to_slide_out():
+    # 4 previous + 1 current at a quarter in: 4 * 0.75 + 1 = 4 > 3
+    result = _sliding_window(limit=3, window=60, elapsed=15, previous=4, current=1)
+    assert result.allowed is False
+    # Allowed once 4 * (60 - t) / 60 + 1 <= 3, i.e. at t = 30
+    assert result.retry_after == pytest.approx(15)
+    assert result.reset_after == pytest.approx(45)
+
+
+class RecordingBackend:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    async def hit(self, key, limit):
+        if self.fail:
+            raise ConnectionError("down")
+        self.calls.append((key, limit))
+        return _sliding_window(limit, WINDOW, 0, 0, len(self.calls))
+
+    def stats(self):
+        return {"backend": "recording"}
+
+
+def test_limiter_uses_route_limits_with_default_fallback():
+    backend = RecordingBackend()
+    limiter = RateLimiter(backend, limits={"auth": 2}, default_limit=10)
+    asyncio.run(limiter.check_rate_limit("auth", "ip:1"))
+    asyncio.run(limiter.check_rate_limit("tasks", "user:1"))
+    assert backend.calls == [("auth:ip:1", 2), ("tasks:user:1", 10)]
+
+
+def test_limiter_counts_rejections():
+    limiter = RateLimiter(RecordingBackend(), limits={}, default_limit=1)
+    results = [asyncio.run(limiter.check_rate_limit("tasks", "user:1")) for _ in range(2)]
+    assert [r.allowed for r in results] == [True, False]
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_disabled_limiter_checks_nothing():
+    backend = RecordingBackend()
+    limiter = RateLimiter(backend, limits={}, default_limit=1, enabled=False)
+    assert asyncio.run(limiter.check_rate_limit("tasks", "user:1")) is None
+    assert backend.calls == []
+
+
+def test_limiter_fails_open_when_the_backend_is_down():
+    limiter = RateLimiter(RecordingBackend(fail=True), limits={}, default_limit=1)
+    assert asyncio.run(limiter.check_rate_limit("tasks", "user:1")) is None
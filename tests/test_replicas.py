@@ -0,0 +1,73 @@
+import asyncio
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import middleware
+from app.api.dependencies import get_db
+from app.api.middleware import ReadYourWritesMiddleware
+from app.core.security import create_access_token
+from app.db import replicas
+from app.db.replicas import ReadYourWrites
+from app.services.cache import LocalSharedStore, MemoryCacheBackend, SharedCacheBackend
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_write_is_sticky_on_the_committing_worker():
+    worker = ReadYourWrites(MemoryCacheBackend(1024), window_seconds=5)
+
+    worker.record_write(1)
+
+    assert run(worker.is_sticky(1))
+    assert not run(worker.is_sticky(2))
+
+
+def test_shared_write_is_sticky_on_every_worker():
+    backend = SharedCacheBackend(LocalSharedStore())
+    first, second = ReadYourWrites(backend, window_seconds=5), ReadYourWrites(backend, window_seconds=5)
+
+    first.record_write(1)
+    assert not run(second.is_sticky(1))
+    run(first.share_write(1))
+
+    assert run(second.is_sticky(1))
+    assert not run(second.is_sticky(2))
+
+
+def test_zero_window_disables_stickiness():
+    worker = ReadYourWrites(SharedCacheBackend(LocalSharedStore()), window_seconds=0)
+
+    worker.record_write(1)
+    run(worker.share_write(1))
+
+    assert not run(worker.is_sticky(1))
+
+
+def test_commit_is_shared_before_the_response(monkeypatch):
+    backend = SharedCacheBackend(LocalSharedStore())
+    writer = ReadYourWrites(backend, window_seconds=5)
+    monkeypatch.setattr(replicas, "read_your_writes", writer)
+    monkeypatch.setattr(middleware, "read_your_writes", writer)
+    other_worker = ReadYourWrites(backend, window_seconds=5)
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post("/write")
+    async def write(db: AsyncSession = Depends(get_db)):
+        # No statements run, so the primary is never connected to
+        await db.commit()
+        return {"sticky_elsewhere": await other_worker.is_sticky(7)}
+
+    @app.get("/read")
+    async def read():
+        return {"sticky_elsewhere": await other_worker.is_sticky(7)}
+
+    token = create_access_token({"sub": "user", "uid": 7})
+    with TestClient(app) as client:
+        written = client.post("/write", headers={"Authorization": f"Bearer {token}"})
+        read = client.get("/read")
+
+    assert written.json() == {"sticky_elsewhere": False}
+    assert read.json() == {"sticky_elsewhere": True}
@@ -0,0 +1,84 @@
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+from types import SimpleNamespace
+import pytest
+from pydantic import BaseModel
+from app.api.serialization import ListSerializer, _is_flat
+from app.schemas.category import Category
+from app.schemas.task import Task
+
+pytest.importorskip("orjson")
+
+
+class Tag(BaseModel):
+    name: str
+
+
+class Flat(BaseModel):
+    id: int
+    labels: List[str] = []
+    counts: Dict[str, int] = {}
+    due: Optional[datetime] = None
+
+
+class WithList(BaseModel):
+    id: int
+    tags: List[Tag] = []
+
+
+class WithOptional(BaseModel):
+    id: int
+    tag: Optional[Tag] = None
+
+
+class WithDict(BaseModel):
+    id: int
+    tags: Dict[str, Tag] = {}
+
+
+class WithDeepNesting(BaseModel):
+    id: int
+    tags: Optional[Dict[str, List[Tag]]] = None
+
+
+@pytest.mark.parametrize("schema", [Flat, Task, Category])
+def test_flat_schemas_are_trusted(schema):
+    assert _is_flat(schema)
+    assert ListSerializer(schema).trusted
+
+
+@pytest.mark.parametrize("schema", [WithList, WithOptional, WithDict, WithDeepNesting])
+def test_nested_models_are_validated(schema):
+    assert not _is_flat(schema)
+    assert not ListSerializer(schema).trusted
+
+
+def test_nested_rows_are_dumped_from_attributes():
+    rows = [
+        SimpleNamespace(id=1, tags=[SimpleNamespace(name="home"), SimpleNamespace(name="urgent")]),
+        SimpleNamespace(id=2, tags=[]),
+    ]
+
+    body = ListSerializer(WithList).dump_page(rows, "next")
+
+    assert json.loads(body) == {
+        "items": [{"id": 1, "tags": [{"name": "home"}, {"name": "urgent"}]}, {"id": 2, "tags": []}],
+        "next_cursor": "next",
+    }
+
+
+class FlatRow:
+    """Columns are class attributes, as on an ORM model"""
+    id = labels = counts = due = None
+
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+def test_flat_rows_are_read_without_validation():
+    rows = [FlatRow(id=1, labels=["a"], counts={"a": 1}, due=datetime(2026, 10, 17, 8, 0))]
+
+    body = ListSerializer(Flat).dump(rows)
+
+    assert json.loads(body) == [{"id": 1, "labels": ["a"], "counts": {"a": 1}, "due": "2026-10-17T08:00:00"}]
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Cumulative import time of app.main allowed, in milliseconds; raise it
+# with STARTUP_IMPORT_BUDGET_MS on slow CI machines
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+RUNS = 3
+
+
+def import_time_ms() -> float:
+    """Cumulative time of `import app.main` in a fresh interpreter, from -X importtime."""
+    env = dict(os.environ)
+    env["DB_STARTUP_MODE"] = "skip"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rstrip().endswith("| app.main"):
+            return int(line.split("|")[1]) / 1000
+    raise AssertionError(f"app.main missing from -X importtime output:\n{result.stderr[-2000:]}")
+
+
+def test_import_time_within_budget():
+    # The best of a few runs, so a busy machine does not fail the check
+    best = min(import_time_ms() for _ in range(RUNS))
+    assert best <= IMPORT_BUDGET_MS, (
+        f"import app.main took {best:.0f} ms, over the {IMPORT_BUDGET_MS:.0f} ms budget; "
+        "profile it with python -m scripts.bench_startup"
+    )
+
+
+def test_import_has_no_side_effects(tmp_path):
+    # Importing the app must not create the log directory or touch a database
+    env = dict(os.environ)
+    env["LOG_FILE"] = str(tmp_path / "logs" / "app.log")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    subprocess.run([sys.executable, "-c", "import app.main"], cwd=tmp_path, env=env, check=True)
+    assert not (tmp_path / "logs").exists()
@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from app.schemas.task import TaskPriority, TaskStatus
+from app.services import stats
+from app.services.stats import record_task_changes, task_stat_deltas, week_start
+
+NOW = datetime(2026, 10, 14, 12, 0)
+WEEK = "2026-10-12"
+
+
+def task(status="todo", priority="medium", category_id=None, completed=False, completed_at=None):
+    return SimpleNamespace(
+        status=status, priority=priority, category_id=category_id,
+        completed=completed, completed_at=completed_at
+    )
+
+
+OPEN = task()
+DONE_NOW = task(status="completed", completed=True, completed_at=NOW)
+DONE_LAST_WEEK = task(status="completed", completed=True, completed_at=datetime(2026, 10, 9, 18, 0))
+
+
+@pytest.mark.parametrize("before, after, expected", [
+    pytest.param([], [OPEN], {
+        ("total", "all"): 1, ("status", "todo"): 1, ("priority", "medium"): 1,
+        ("category", "none"): 1, ("completed", "false"): 1,
+    }, id="create"),
+    pytest.param([], [OPEN, task(priority="high", category_id=3)], {
+        ("total", "all"): 2, ("status", "todo"): 2, ("priority", "medium"): 1, ("priority", "high"): 1,
+        ("category", "none"): 1, ("category", "3"): 1, ("completed", "false"): 2,
+    }, id="create many"),
+    pytest.param([OPEN], [task(status="in_progress")], {
+        ("status", "todo"): -1, ("status", "in_progress"): 1,
+    }, id="update status"),
+    pytest.param([OPEN], [task(priority=TaskPriority.LOW)], {
+        ("priority", "medium"): -1, ("priority", "low"): 1,
+    }, id="update priority enum"),
+    pytest.param([task(category_id=3)], [task(category_id=5)], {
+        ("category", "3"): -1, ("category", "5"): 1,
+    }, id="update category"),
+    pytest.param([task(category_id=3)], [OPEN], {
+        ("category", "3"): -1, ("category", "none"): 1,
+    }, id="uncategorize"),
+    pytest.param([OPEN], [task()], {}, id="update untracked field"),
+    pytest.param([OPEN], [DONE_NOW], {
+        ("status", "todo"): -1, ("status", "completed"): 1,
+        ("completed", "false"): -1, ("completed", "true"): 1, ("completed_week", WEEK): 1,
+    }, id="toggle complete"),
+    pytest.param([DONE_NOW], [task(status=TaskStatus.TODO)], {
+        ("status", "completed"): -1, ("status", "todo"): 1,
+        ("completed", "true"): -1, ("completed", "false"): 1, ("completed_week", WEEK): -1,
+    }, id="toggle reopen"),
+    pytest.param([DONE_LAST_WEEK], [OPEN], {
+        ("status", "completed"): -1, ("status", "todo"): 1,
+        ("completed", "true"): -1, ("completed", "false"): 1,
+    }, id="reopen completed last week"),
+    pytest.param([DONE_NOW], [], {
+        ("total", "all"): -1, ("status", "completed"): -1, ("priority", "medium"): -1,
+        ("category", "none"): -1, ("completed", "true"): -1, ("completed_week", WEEK): -1,
+    }, id="delete"),
+])
+def test_deltas(before, after, expected):
+    assert task_stat_deltas(before, after, WEEK) == expected
+
+
+def test_week_starts_on_monday():
+    assert week_start(NOW).date().isoformat() == WEEK
+    assert week_start(datetime(2026, 10, 12, 0, 0)).date().isoformat() == WEEK
+    assert week_start(datetime(2026, 10, 11, 23, 59)).date().isoformat() == "2026-10-05"
+
+
+class Session:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+
+def test_record_writes_one_upsert(monkeypatch):
+    monkeypatch.setattr(stats, "_utcnow", lambda: NOW)
+    db = Session()
+
+    asyncio.run(record_task_changes(db, 1, before=[OPEN], after=[DONE_NOW]))
+
+    assert len(db.statements) == 1
+    params = db.statements[0].compile().params
+    written = {
+        (params[f"dimension_m{i}"], params[f"key_m{i}"]): params[f"count_m{i}"]
+        for i in range(len(params) // 4)
+    }
+    assert written == task_stat_deltas([OPEN], [DONE_NOW], WEEK)
+
+
+def test_record_skips_writes_without_changes(monkeypatch):
+    monkeypatch.setattr(stats, "_utcnow", lambda: NOW)
+    db = Session()
+
+    asyncio.run(record_task_changes(db, 1, before=[OPEN], after=[task()]))
+
+    assert db.statements == []
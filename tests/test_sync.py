@@ -0,0 +1,120 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.models.category import Category
+from app.models.task import Task
+from app.services import sync
+from app.services.sync import START, _next_position, get_changes
+
+
+def _row(change_seq, row_id):
+    return SimpleNamespace(change_seq=change_seq, id=row_id)
+
+
+class Counter:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class Session:
+    """Answers the change counter read; rows come from the patched _changed"""
+    def __init__(self, current=0, compacted_seq=0):
+        self.counter = (current, compacted_seq) if current else None
+
+    async def execute(self, statement):
+        return Counter(self.counter)
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    """(change_seq, id) pairs per model, served like the change feed query"""
+    tables = {Task: [], Category: []}
+    queries = []
+
+    async def changed(db, model, user_id, after, limit):
+        queries.append((model, after))
+        return [_row(*key) for key in sorted(tables[model]) if key > after][:limit]
+
+    monkeypatch.setattr(sync, "_changed", changed)
+    tables["queries"] = queries
+    return tables
+
+
+def _changes(db, since, limit=10):
+    return asyncio.run(get_changes(db, 1, since, limit))
+
+
+def test_caught_up_table_moves_to_the_current_sequence():
+    assert _next_position([], START, current=12, limit=10) == (12, 0)
+    assert _next_position([_row(4, 2), _row(9, 1)], (3, 7), current=12, limit=10) == (12, 0)
+
+
+def test_position_never_moves_back():
+    # A counter read older than the client's position, e.g. from a lagging replica
+    assert _next_position([], (15, 3), current=12, limit=10) == (15, 3)
+
+
+def test_full_page_stops_at_its_last_row():
+    rows = [_row(5, 1), _row(5, 2), _row(8, 1)]
+    # Fetched with one extra row; the third is not part of the page
+    assert _next_position(rows, START, current=12, limit=2) == (5, 2)
+
+
+def test_has_more_when_one_table_is_full(tables):
+    tables[Task] = [(seq, seq) for seq in range(1, 5)]
+    tables[Category] = [(2, 1)]
+
+    changes = _changes(Session(current=5), since=None, limit=3)
+
+    assert changes["has_more"] is True
+    assert [task.id for task in changes["tasks"]] == [1, 2, 3]
+    assert changes["tasks_after"] == (3, 3)
+    # Categories are caught up, so they move past every numbered change
+    assert changes["categories_after"] == (5, 0)
+    assert changes["reset"] is False
+
+
+def test_caught_up_after_the_last_page(tables):
+    tables[Task] = [(1, 1), (2, 2)]
+
+    changes = _changes(Session(current=3), since=((1, 1), (0, 0)))
+
+    assert changes["has_more"] is False
+    assert [task.id for task in changes["tasks"]] == [2]
+    # Change 3 was a tombstone purged since
+    assert (changes["tasks_after"], changes["categories_after"]) == ((3, 0), (3, 0))
+
+
+def test_reset_when_since_is_below_the_compacted_sequence(tables):
+    tables[Task] = [(7, 1)]
+
+    changes = _changes(Session(current=9, compacted_seq=6), since=((8, 0), (5, 0)))
+
+    assert changes["reset"] is True
+    # Both tables start over from the beginning
+    assert tables["queries"] == [(Task, START), (Category, START)]
+    assert [task.id for task in changes["tasks"]] == [1]
+
+
+def test_no_reset_at_or_above_the_compacted_sequence(tables):
+    changes = _changes(Session(current=9, compacted_seq=6), since=((8, 0), (6, 0)))
+
+    assert changes["reset"] is False
+    assert tables["queries"] == [(Task, (8, 0)), (Category, (6, 0))]
+
+
+def test_first_sync_never_resets(tables):
+    changes = _changes(Session(current=9, compacted_seq=6), since=None)
+
+    assert changes["reset"] is False
+    assert (changes["tasks_after"], changes["categories_after"]) == ((9, 0), (9, 0))
+
+
+def test_user_without_changes(tables):
+    changes = _changes(Session(), since=None)
+
+    assert (changes["tasks_after"], changes["categories_after"]) == (START, START)
+    assert (changes["has_more"], changes["reset"]) == (False, False)
@@ -0,0 +1,133 @@
+import asyncio
+import io
+import json
+from datetime import datetime
+from app.api.serialization import ListSerializer
+from app.api.transfer import FileEncoder, FileReader
+from app.models.task import Task as TaskModel
+from app.schemas.task import Task, TaskCreate, TaskFileFormat, TaskPriority, TaskStatus
+
+CSV, NDJSON = TaskFileFormat.CSV, TaskFileFormat.NDJSON
+
+
+def _task(task_id, **values):
+    now = datetime(2026, 10, 1, 9, 30)
+    fields = {
+        "title": f"Task {task_id}", "description": None, "priority": "medium", "status": "todo",
+        "completed": False, "due_date": None, "completed_at": None, "category_id": None,
+        "owner_id": 1, "created_at": now, "updated_at": now,
+    }
+    fields.update(values)
+    return TaskModel(id=task_id, **fields)
+
+
+def _read(data, file_format, chunk_size=100, max_errors=10):
+    reader = FileReader(io.BytesIO(data), file_format, TaskCreate, chunk_size, max_errors)
+
+    async def scenario():
+        return [chunk async for chunk in reader.chunks()]
+
+    return reader, asyncio.run(scenario())
+
+
+def _rows(chunks):
+    return [(line, row) for chunk in chunks for line, row in chunk]
+
+
+def test_csv_export_round_trips_through_the_reader():
+    encoder = FileEncoder(ListSerializer(Task), CSV)
+    tasks = [
+        _task(1, description='Quotes "and", commas', priority="high", due_date=datetime(2026, 11, 2, 17, 0)),
+        _task(2, status="completed", completed=True, category_id=4),
+    ]
+    exported = encoder.header() + encoder.encode(tasks)
+
+    reader, chunks = _read(exported, CSV)
+
+    assert exported.startswith(b"title,description,priority,status,due_date,category_id,id,user_id,")
+    assert reader.failed == 0
+    imported = [row for _, row in _rows(chunks)]
+    assert imported == [
+        TaskCreate(
+            title="Task 1", description='Quotes "and", commas', priority=TaskPriority.HIGH,
+            due_date=datetime(2026, 11, 2, 17, 0)
+        ),
+        TaskCreate(title="Task 2", status=TaskStatus.COMPLETED, category_id=4),
+    ]
+
+
+def test_ndjson_export_round_trips_through_the_reader():
+    encoder = FileEncoder(ListSerializer(Task), NDJSON)
+    exported = encoder.header() + encoder.encode([_task(1, priority="low"), _task(2)])
+
+    _, chunks = _read(exported, NDJSON)
+
+    assert [json.loads(line)["id"] for line in exported.splitlines()] == [1, 2]
+    assert [row.title for _, row in _rows(chunks)] == ["Task 1", "Task 2"]
+    assert _rows(chunks)[0][1].priority == TaskPriority.LOW
+
+
+def test_byte_order_mark_is_skipped():
+    data = "\ufefftitle,priority\nBuy milk,low\n".encode("utf-8")
+
+    reader, chunks = _read(data, CSV)
+
+    assert reader.failed == 0
+    assert [(line, row.title, row.priority) for line, row in _rows(chunks)] == [(2, "Buy milk", TaskPriority.LOW)]
+
+
+def test_empty_csv_cells_are_missing():
+    data = b"title,description,priority,due_date,category_id,unknown\nBuy milk,,,,,ignored\n"
+
+    reader, chunks = _read(data, CSV)
+
+    assert reader.failed == 0
+    assert _rows(chunks) == [(2, TaskCreate(title="Buy milk"))]
+
+
+def test_invalid_rows_are_reported_by_line():
+    data = (
+        b"title,priority\n"
+        b"First,low\n"
+        b",low\n"
+        b"Third,urgent\n"
+        b'"Multi\nline",high\n'
+        b"Sixth,somehow\n"
+    )
+
+    reader, chunks = _read(data, CSV, chunk_size=2)
+
+    assert [(line, row.title) for line, row in _rows(chunks)] == [(2, "First"), (6, "Multi\nline")]
+    assert reader.failed == 3
+    assert [error["line"] for error in reader.errors] == [3, 4, 7]
+    assert reader.errors[0]["detail"].startswith("title: ")
+    assert reader.errors[1]["detail"].startswith("priority: ")
+
+
+def test_errors_are_capped_but_all_counted():
+    data = b"".join(b'{"title": ""}\n' for _ in range(5))
+
+    reader, chunks = _read(data, NDJSON, max_errors=2)
+
+    assert chunks == []
+    assert reader.failed == 5
+    assert [error["line"] for error in reader.errors] == [1, 2]
+
+
+def test_rejected_rows_count_towards_the_cap():
+    reader, _ = _read(b"", NDJSON, max_errors=1)
+
+    reader.reject(3, "Category not found")
+    reader.reject(4, "Category not found")
+
+    assert reader.failed == 2
+    assert reader.errors == [{"line": 3, "detail": "Category not found"}]
+
+
+def test_ndjson_blank_lines_are_skipped():
+    data = b'{"title": "One"}\n\n   \n{"title": "Two"}\n\n'
+
+    reader, chunks = _read(data, NDJSON)
+
+    assert reader.failed == 0
+    assert [(line, row.title) for line, row in _rows(chunks)] == [(1, "One"), (4, "Two")]